@@ -1,6 +1,7 @@
 from celery import Celery
 import os
-from celery.signals import task_prerun, task_postrun
+import logging
+from celery.signals import task_prerun, task_postrun, worker_process_init
 from django.utils import timezone
 import pytz
 
@@ -21,6 +22,15 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 
 app.autodiscover_tasks()
 
+@worker_process_init.connect
+def warm_area_geometry_cache(**kwargs):
+    # cada processo do worker já começa com os polígonos das áreas interpretados
+    try:
+        from tmsapp.scriptApp.action.area_geometry_cache import warm_area_geometries
+        warm_area_geometries()
+    except Exception as e:
+        logging.warning(f"[AreaGeometry] Falha ao pré-carregar áreas: {e}")
+
 @app.task(bind=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
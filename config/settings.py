@@ -271,6 +271,22 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_TASK_TRACK_STARTED = True
 
+# Tarefas periódicas (requer `celery -A config beat`)
+CELERY_BEAT_SCHEDULE = {
+    'evict-geocode-cache': {
+        'task': 'tmsapp.tasks.geocode_maintenance.evict_geocode_cache',
+        'schedule': 60 * 60 * 24,
+    },
+    'retry-geocoding': {
+        'task': 'tmsapp.tasks.geocode_maintenance.retry_geocoding',
+        'schedule': 60 * 15,
+    },
+    'warm-distance-matrix': {
+        'task': 'tmsapp.tasks.distance_matrix_maintenance.warm_distance_matrix_task',
+        'schedule': 60 * 60 * 24,
+    },
+}
+
 # Opcional: parâmetros de transporte (timeouts, retries)
 CELERY_BROKER_TRANSPORT_OPTIONS = {
     'visibility_timeout': 3600,   # 1h para tasks não confirmadas
@@ -283,6 +299,103 @@ CELERY_BROKER_TRANSPORT_OPTIONS = {
 }
 
 
+# Importação de entregas
+# Planilhas com mais linhas que DELIVERY_IMPORT_STREAMING_MIN_ROWS são importadas
+# em blocos de DELIVERY_IMPORT_CHUNK_SIZE linhas, cada bloco em sua própria transação.
+DELIVERY_IMPORT_CHUNK_SIZE = int(os.getenv('DELIVERY_IMPORT_CHUNK_SIZE', '5000'))
+DELIVERY_IMPORT_STREAMING_MIN_ROWS = int(os.getenv('DELIVERY_IMPORT_STREAMING_MIN_ROWS', '20000'))
+# Em PostgreSQL, planilhas com pelo menos DELIVERY_IMPORT_COPY_MIN_ROWS linhas são carregadas
+# com COPY numa tabela de staging e mescladas via SQL (0 desativa)
+DELIVERY_IMPORT_COPY_MIN_ROWS = int(os.getenv('DELIVERY_IMPORT_COPY_MIN_ROWS', '100000'))
+# Planilhas com pelo menos DELIVERY_IMPORT_FANOUT_MIN_ROWS linhas são divididas em blocos
+# processados em paralelo pelos workers do Celery (0 desativa; requer disco compartilhado)
+DELIVERY_IMPORT_FANOUT_MIN_ROWS = int(os.getenv('DELIVERY_IMPORT_FANOUT_MIN_ROWS', '50000'))
+
+# Geocodificação em lote (importação): threads simultâneas, chamadas por segundo
+# e a cada quantos endereços resolvidos o progresso é atualizado
+GEOCODE_MAX_WORKERS = int(os.getenv('GEOCODE_MAX_WORKERS', '8'))
+GEOCODE_RATE_LIMIT = float(os.getenv('GEOCODE_RATE_LIMIT', '20'))
+GEOCODE_PROGRESS_BATCH = int(os.getenv('GEOCODE_PROGRESS_BATCH', '50'))
+
+# Cache persistente de geocodificação: validade dos endereços encontrados (dias)
+# e dos endereços não encontrados (horas)
+GEOCODE_CACHE_TTL_DAYS = int(os.getenv('GEOCODE_CACHE_TTL_DAYS', '180'))
+GEOCODE_CACHE_NEGATIVE_TTL_HOURS = int(os.getenv('GEOCODE_CACHE_NEGATIVE_TTL_HOURS', '24'))
+
+# Geocodificação ao salvar entregas/locais: por padrão o registro fica pendente e a fila
+# (process_geocode_queue) resolve em lote GEOCODE_QUEUE_DELAY segundos depois, até
+# GEOCODE_QUEUE_BATCH_SIZE registros por vez; GEOCODE_ON_SAVE_SYNC=True geocodifica no save()
+GEOCODE_ON_SAVE_SYNC = os.getenv('GEOCODE_ON_SAVE_SYNC', 'False') == 'True'
+GEOCODE_QUEUE_DELAY = int(os.getenv('GEOCODE_QUEUE_DELAY', '2'))
+GEOCODE_QUEUE_BATCH_SIZE = int(os.getenv('GEOCODE_QUEUE_BATCH_SIZE', '200'))
+
+# Retentativa periódica (retry_geocoding) dos endereços não encontrados: espera de
+# GEOCODE_RETRY_BASE_MINUTES dobrando a cada falha até GEOCODE_RETRY_MAX_MINUTES, no máximo
+# GEOCODE_RETRY_MAX_ATTEMPTS tentativas; cada execução usa até GEOCODE_RETRY_TIME_BUDGET
+# segundos e GEOCODE_RETRY_MAX_WORKERS chamadas simultâneas, em lotes de GEOCODE_RETRY_BATCH_SIZE.
+# Pendentes há mais de GEOCODE_RETRY_PENDING_MINUTES também entram na retentativa.
+GEOCODE_RETRY_BASE_MINUTES = int(os.getenv('GEOCODE_RETRY_BASE_MINUTES', '30'))
+GEOCODE_RETRY_MAX_MINUTES = int(os.getenv('GEOCODE_RETRY_MAX_MINUTES', str(60 * 24)))
+GEOCODE_RETRY_MAX_ATTEMPTS = int(os.getenv('GEOCODE_RETRY_MAX_ATTEMPTS', '8'))
+GEOCODE_RETRY_TIME_BUDGET = int(os.getenv('GEOCODE_RETRY_TIME_BUDGET', '240'))
+GEOCODE_RETRY_MAX_WORKERS = int(os.getenv('GEOCODE_RETRY_MAX_WORKERS', '4'))
+GEOCODE_RETRY_BATCH_SIZE = int(os.getenv('GEOCODE_RETRY_BATCH_SIZE', '100'))
+GEOCODE_RETRY_PENDING_MINUTES = int(os.getenv('GEOCODE_RETRY_PENDING_MINUTES', '10'))
+
+
+# Progresso das tasks: envia no máximo uma atualização a cada TASK_PROGRESS_MIN_INTERVAL
+# segundos, ou quando o percentual avança TASK_PROGRESS_MIN_DELTA pontos; o último estado
+# fica no Redis por TASK_PROGRESS_TTL segundos
+TASK_PROGRESS_MIN_INTERVAL = float(os.getenv('TASK_PROGRESS_MIN_INTERVAL', '0.5'))
+TASK_PROGRESS_MIN_DELTA = int(os.getenv('TASK_PROGRESS_MIN_DELTA', '1'))
+TASK_PROGRESS_TTL = int(os.getenv('TASK_PROGRESS_TTL', '3600'))
+
+# Roteirização: modo padrão de alocação das entregas nos veículos
+# ('greedy' = veículo a veículo, 'ffd' = first-fit decreasing, 'bfd' = best-fit decreasing,
+#  'vrp' = um único problema VROOM com todos os veículos e capacidades)
+ROUTE_ALLOCATION_MODE = os.getenv('ROUTE_ALLOCATION_MODE', 'greedy')
+# Tempo máximo (s) de resposta do VROOM no modo 'vrp'
+ROUTE_VRP_TIMEOUT = int(os.getenv('ROUTE_VRP_TIMEOUT', '120'))
+
+# Provedor de roteirização (tmsapp.scriptApp.action.routing_provider):
+# 'vroom'  = VROOM + ORS nos hosts abaixo
+# 'local'  = solver local (haversine + vizinho mais próximo + 2-opt/or-opt, sem rede)
+# 'record' = chama VROOM/ORS e grava as respostas em ROUTING_REPLAY_DIR
+# 'replay' = responde com o que foi gravado (testes de carga sem os servidores reais);
+#            chamadas não gravadas vão para o solver local se ROUTING_REPLAY_MISS='local'
+#            ou falham se 'error'; ROUTING_REPLAY_LATENCY=True reproduz o tempo original
+ROUTING_PROVIDER = os.getenv('ROUTING_PROVIDER', 'vroom')
+ROUTING_VROOM_URL = os.getenv('ROUTING_VROOM_URL', 'https://vroom.starseguro.com.br/')
+ROUTING_ORS_URL = os.getenv('ROUTING_ORS_URL', 'https://ors.starseguro.com.br/ors').rstrip('/')
+ROUTING_REPLAY_DIR = os.getenv('ROUTING_REPLAY_DIR', str(BASE_DIR / 'routing_replay'))
+ROUTING_REPLAY_MISS = os.getenv('ROUTING_REPLAY_MISS', 'local')
+ROUTING_REPLAY_LATENCY = os.getenv('ROUTING_REPLAY_LATENCY', 'False') == 'True'
+# Cache no Redis das rotas do provedor 'vroom' (mesma partida + paradas + perfil):
+# TTL renovado a cada acerto e no máximo ROUTE_CACHE_MAX_ENTRIES rotas (LRU)
+ROUTE_CACHE_ENABLED = os.getenv('ROUTE_CACHE_ENABLED', 'True') == 'True'
+ROUTE_CACHE_TTL = int(os.getenv('ROUTE_CACHE_TTL', str(7 * 24 * 3600)))
+ROUTE_CACHE_MAX_ENTRIES = int(os.getenv('ROUTE_CACHE_MAX_ENTRIES', '20000'))
+# Matriz persistente de distância/duração por estrada (DistanceMatrixEntry), por célula
+# espacial (lat/lon arredondados em ROUTE_MATRIX_BUCKET_DECIMALS casas, ~11 m com 4).
+# Completada pela matriz do ORS em blocos de até ROUTE_MATRIX_MAX_LOCATIONS pontos;
+# entradas com mais de ROUTE_MATRIX_TTL_DAYS dias são pedidas de novo.
+# warm_distance_matrix (diária) cobre pontos de saída, áreas e os ROUTE_MATRIX_FREQUENT_LIMIT
+# endereços mais entregues nos últimos ROUTE_MATRIX_FREQUENT_DAYS dias
+ROUTE_MATRIX_ENABLED = os.getenv('ROUTE_MATRIX_ENABLED', 'True') == 'True'
+ROUTE_MATRIX_BUCKET_DECIMALS = int(os.getenv('ROUTE_MATRIX_BUCKET_DECIMALS', '4'))
+ROUTE_MATRIX_MAX_LOCATIONS = int(os.getenv('ROUTE_MATRIX_MAX_LOCATIONS', '50'))
+ROUTE_MATRIX_TTL_DAYS = int(os.getenv('ROUTE_MATRIX_TTL_DAYS', '90'))
+ROUTE_MATRIX_FREQUENT_DAYS = int(os.getenv('ROUTE_MATRIX_FREQUENT_DAYS', '90'))
+ROUTE_MATRIX_FREQUENT_LIMIT = int(os.getenv('ROUTE_MATRIX_FREQUENT_LIMIT', '200'))
+# Com ROUTE_LOCAL_FALLBACK=True o solver local substitui o provedor quando ele falha
+ROUTE_LOCAL_FALLBACK = os.getenv('ROUTE_LOCAL_FALLBACK', 'True') == 'True'
+ROUTE_LOCAL_SOLVER_TIME_BUDGET = float(os.getenv('ROUTE_LOCAL_SOLVER_TIME_BUDGET', '2'))
+# Linha reta -> distância de rua estimada, e velocidade média para a duração
+ROUTE_LOCAL_DETOUR_FACTOR = float(os.getenv('ROUTE_LOCAL_DETOUR_FACTOR', '1.3'))
+ROUTE_LOCAL_SPEED_KMH = float(os.getenv('ROUTE_LOCAL_SPEED_KMH', '30'))
+# Chamadas simultâneas ao VROOM/ORS ao otimizar as rotas dos veículos
+ROUTE_OPTIMIZE_MAX_WORKERS = int(os.getenv('ROUTE_OPTIMIZE_MAX_WORKERS', '6'))
+
 ASGI_APPLICATION = "config.asgi.application"
 
 CHANNEL_LAYERS = {
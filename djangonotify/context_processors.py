@@ -1,6 +1,7 @@
 # djangonotify/context_processors.py
 from django.core.paginator import Paginator
 from .models import Notification, TaskRecord
+from .progress import get_progress_many
 def notifications_and_tasks(request):
     user = request.user
     if not user.is_authenticated:
@@ -22,6 +23,18 @@ def notifications_and_tasks(request):
     # 4) Pagina as tarefas normalmente
     tasks_qs = TaskRecord.objects.filter(user=user).order_by('-created_at')
     task_page = Paginator(tasks_qs, 10).get_page(request.GET.get('task_page'))
+
+    # 5) Tasks em andamento: o progresso mais recente fica no Redis (ProgressPublisher)
+    running = [
+        task for task in task_page
+        if task.status not in (TaskRecord.STATUS_SUCCESS, TaskRecord.STATUS_FAILURE)
+    ]
+    latest = get_progress_many([task.task_id for task in running])
+    for task in running:
+        state = latest.get(task.task_id)
+        if state and state['status'] == task.status:
+            task.porcent = state['percent']
+            task.message = state['message']
     return {
         'notifications':     notifications,
         'has_unread':        unread_qs.exists(),
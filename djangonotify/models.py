@@ -81,13 +81,15 @@ class TaskRecord(models.Model):
         if t:
             t.cancel()
 
-    def save(self, *args, **kwargs):
-        is_new = self.pk is None
-        prev_status = None
-        if not is_new:
-            prev = TaskRecord.objects.get(pk=self.pk)
-            prev_status = prev.status
+    def touch(self):
+        """
+        Sinaliza que a task continua viva sem gravar no banco: apenas reinicia o timer.
+        Usado pelo ProgressPublisher entre uma gravação e outra.
+        """
+        if self.pk and self.status not in (self.STATUS_SUCCESS, self.STATUS_FAILURE):
+            self._start_timer()
 
+    def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
 
         # se for novo, já inicia o timer
@@ -0,0 +1,150 @@
+import json
+import logging
+import threading
+import time
+from typing import Optional
+
+import redis
+from django.conf import settings
+
+from .models import TaskRecord
+from .utils import broadcast_progress
+
+PROGRESS_KEY = "task_progress:{task_id}"
+
+_redis_client = None
+_redis_lock = threading.Lock()
+
+
+def get_redis():
+    """Cliente Redis compartilhado (por processo) para o estado de progresso."""
+    global _redis_client
+    if _redis_client is None:
+        with _redis_lock:
+            if _redis_client is None:
+                _redis_client = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=1)
+    return _redis_client
+
+
+def get_progress(task_id: str) -> Optional[dict]:
+    """Último estado publicado da task (mantido no Redis), ou None."""
+    try:
+        raw = get_redis().get(PROGRESS_KEY.format(task_id=task_id))
+    except redis.RedisError as e:
+        logging.warning(f"[Progress] Falha ao ler progresso de {task_id}: {e}")
+        return None
+    return json.loads(raw) if raw else None
+
+
+def get_progress_many(task_ids) -> dict:
+    """Estado de várias tasks em uma única ida ao Redis: {task_id: estado}."""
+    task_ids = [task_id for task_id in task_ids if task_id]
+    if not task_ids:
+        return {}
+    try:
+        values = get_redis().mget([PROGRESS_KEY.format(task_id=task_id) for task_id in task_ids])
+    except redis.RedisError as e:
+        logging.warning(f"[Progress] Falha ao ler progresso: {e}")
+        return {}
+    return {task_id: json.loads(raw) for task_id, raw in zip(task_ids, values) if raw}
+
+
+class ProgressPublisher:
+    """
+    Publica o progresso de uma task de forma agrupada:
+    - atualizações dentro do mesmo status só são enviadas (Redis + WebSocket) se passou
+      min_interval segundos ou o percentual andou min_delta pontos desde o último envio
+    - o TaskRecord só é gravado quando o status muda e na conclusão/falha; entre uma
+      gravação e outra o timer de timeout é mantido vivo com TaskRecord.touch()
+    - o estado mais recente fica no Redis (get_progress) para quem precisar consultá-lo
+    """
+
+    def __init__(self, task_id: str, user_id: int, min_interval: float = None, min_delta: int = None):
+        self.task_id = task_id
+        self.user_id = user_id
+        self.min_interval = settings.TASK_PROGRESS_MIN_INTERVAL if min_interval is None else min_interval
+        self.min_delta = settings.TASK_PROGRESS_MIN_DELTA if min_delta is None else min_delta
+        self.ttl = settings.TASK_PROGRESS_TTL
+
+        self._record: Optional[TaskRecord] = None
+        self._last_status = None
+        self._last_percent = None
+        self._last_sent_at = 0.0
+        self._pending = None
+
+    @property
+    def record(self) -> TaskRecord:
+        if self._record is None:
+            self._record, _ = TaskRecord.objects.get_or_create(
+                task_id=self.task_id, defaults={'user_id': self.user_id}
+            )
+        return self._record
+
+    def publish(self, message: str, percent: int, status: str = 'progress', extra: dict = None,
+                force: bool = False) -> bool:
+        """
+        Registra o progresso; retorna True se foi efetivamente enviado.
+        force=True envia e grava no banco mesmo sem mudança de status.
+        """
+        state = {'message': message, 'percent': percent, 'status': status, 'extra': extra}
+        is_final = status in (TaskRecord.STATUS_SUCCESS, TaskRecord.STATUS_FAILURE)
+        status_changed = status != self._last_status
+
+        if not (force or is_final or status_changed or self._is_due(percent)):
+            self._pending = state
+            return False
+
+        self._send(state, persist=force or is_final or status_changed)
+        return True
+
+    def flush(self) -> None:
+        """Envia a última atualização retida, gravando-a no TaskRecord."""
+        if self._pending:
+            self._send(self._pending, persist=True)
+
+    def release(self) -> None:
+        """
+        Envia o que estiver retido e para de vigiar a task neste processo (cancela o timer),
+        quando a continuação fica a cargo de outras tasks/processos.
+        """
+        self.flush()
+        if self._record is not None:
+            self._record._cancel_timer()
+
+    def _is_due(self, percent: int) -> bool:
+        if time.monotonic() - self._last_sent_at >= self.min_interval:
+            return True
+        if percent is None or self._last_percent is None:
+            return False
+        return abs(percent - self._last_percent) >= self.min_delta
+
+    def _send(self, state: dict, persist: bool) -> None:
+        record = self.record
+        record.status = state['status']
+        record.porcent = state['percent']
+        record.message = state['message']
+        if persist:
+            record.save(update_fields=['status', 'porcent', 'message', 'updated_at'])
+        else:
+            record.touch()
+
+        self._store(state)
+        broadcast_progress(record, self.task_id, self.user_id, state['message'], state['percent'],
+                           state['status'], state['extra'])
+
+        self._last_status = state['status']
+        self._last_percent = state['percent']
+        self._last_sent_at = time.monotonic()
+        self._pending = None
+
+    def _store(self, state: dict) -> None:
+        payload = {
+            'message': state['message'],
+            'percent': state['percent'],
+            'status': state['status'],
+            'updated_at': time.time(),
+        }
+        try:
+            get_redis().set(PROGRESS_KEY.format(task_id=self.task_id), json.dumps(payload), ex=self.ttl)
+        except redis.RedisError as e:
+            logging.warning(f"[Progress] Falha ao gravar progresso de {self.task_id}: {e}")
@@ -16,7 +16,15 @@ def send_progress(task_id: str, user_id: int, message: str, percent: int, status
     tr.message = message
     tr.save(update_fields=['status','porcent','message','updated_at'])
 
-    # 2) Prepara payload
+    # 2) Envia via WebSocket
+    broadcast_progress(tr, task_id, user_id, message, percent, status, extra)
+
+def broadcast_progress(tr: TaskRecord, task_id: str, user_id: int, message: str, percent: int,
+                       status: str, extra: dict = None):
+    """
+    Envia o progresso via WebSocket, sem gravar no banco.
+    Grupos: "tasks_{user_id}"
+    """
     payload = {
         'id': tr.id,
         'name': tr.name,
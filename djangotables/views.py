@@ -129,8 +129,11 @@ def djangotables(request):
                 field_obj = None
             val = getattr(obj, f, None)
 
-            # desserializa geojson salvo como string
+            # desserializa geojson salvo como string (models com cache expõem geojson_data)
             if f == 'geojson' and isinstance(val, str):
+                if hasattr(type(obj), 'geojson_data'):
+                    row[f] = obj.geojson_data
+                    continue
                 try:
                     row[f] = json.loads(val)
                 except json.JSONDecodeError:
@@ -14,7 +14,7 @@ from .models import (
     CompanyLocation, Route, RouteDelivery,
     RouteArea, RouteComposition, RouteCompositionDelivery,
     Carrier, Driver, LoadPlan, VehicleAssignment,
-    Vehicle, Delivery
+    Vehicle, Delivery, DeliveryImportFile, GeocodeCache, CepIndex, DistanceMatrixEntry
 )
 from config.unfold.admin import BaseAdmin
 
@@ -29,10 +29,16 @@ class CompanyLocationAdmin(BaseAdmin):
         ('is_active', BooleanRadioFilter),
         ('is_principal', ChoicesCheckboxFilter),
         ('is_departure_point', ChoicesCheckboxFilter),
+        ('geocode_status', ChoicesRadioFilter),
     )
     search_fields = ('name', 'code', 'address', 'city', 'state', 'postal_code')
     ordering = ('name',)
 
+    def save_model(self, request, obj, form, change):
+        # avisa este usuário quando a geocodificação em segundo plano terminar
+        obj.geocode_notify_user_id = request.user.id
+        super().save_model(request, obj, form, change)
+
 class RouteDeliveryInline(admin.TabularInline):
     model = RouteDelivery
     extra = 0
@@ -211,6 +217,7 @@ class DeliveryAdmin(BaseAdmin):
         ('status', ChoicesRadioFilter),
         ('date_delivery', RangeDateFilter), 
         ('is_active', BooleanRadioFilter),
+        ('geocode_status', ChoicesRadioFilter),
     )
     search_fields = (
         'order_number',
@@ -219,3 +226,46 @@ class DeliveryAdmin(BaseAdmin):
     )
     ordering = ('-date_delivery',)
     list_select_related = ('customer',)
+
+    def save_model(self, request, obj, form, change):
+        # avisa este usuário quando a geocodificação em segundo plano terminar
+        obj.geocode_notify_user_id = request.user.id
+        super().save_model(request, obj, form, change)
+
+@admin.register(DeliveryImportFile)
+class DeliveryImportFileAdmin(BaseAdmin):
+    list_display = (
+        'file_name', 'deliveries_created', 'deliveries_updated',
+        'deliveries_unchanged', 'imported_by', 'imported_at'
+    )
+    list_filter = (('imported_at', RangeDateFilter),)
+    search_fields = ('file_name', 'file_hash')
+    ordering = ('-imported_at',)
+
+
+@admin.register(GeocodeCache)
+class GeocodeCacheAdmin(BaseAdmin):
+    list_display = (
+        'address', 'latitude', 'longitude', 'provider', 'tier',
+        'hit_count', 'resolved_at'
+    )
+    list_filter = (
+        ('provider', ChoicesRadioFilter),
+        ('resolved_at', RangeDateFilter),
+    )
+    search_fields = ('address',)
+    ordering = ('-hit_count',)
+
+@admin.register(CepIndex)
+class CepIndexAdmin(BaseAdmin):
+    list_display = ('cep', 'street', 'neighborhood', 'city', 'state', 'latitude', 'longitude')
+    list_filter = (('state', ChoicesRadioFilter),)
+    search_fields = ('cep', 'street', 'neighborhood', 'city')
+    ordering = ('cep',)
+
+@admin.register(DistanceMatrixEntry)
+class DistanceMatrixEntryAdmin(BaseAdmin):
+    list_display = ('origin', 'destination', 'distance_m', 'duration_s', 'source', 'updated_at')
+    list_filter = (('updated_at', RangeDateFilter),)
+    search_fields = ('origin', 'destination')
+    ordering = ('-updated_at',)
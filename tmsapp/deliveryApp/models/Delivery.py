@@ -2,9 +2,9 @@ from django.db import models
 from simple_history.models import HistoricalRecords
 from auditlog.registry import auditlog
 from django.contrib.auth.models import User
-from tmsapp.action import geocode_endereco
 from crmapp.models import Customer
 from django.utils import timezone
+from .GeocodedModel import GeocodedModel
 
 class DeliveryStatus(models.TextChoices):
     PENDING             = 'pending',             'Pendente'
@@ -17,11 +17,11 @@ class DeliveryStatus(models.TextChoices):
     FAILED              = 'failed',              'Falha na Entrega'
     CANCELLED           = 'cancelled',           'Cancelado'
 
-class Delivery(models.Model):
+class Delivery(GeocodedModel):
     """
     Registro de entrega de pedidos a clientes, com dados de geocodificação automática.
     """
-    order_number = models.CharField('Número do Pedido', max_length=50)
+    order_number = models.CharField('Número do Pedido', max_length=50, unique=True)
 
     street = models.CharField('Rua', max_length=255)
     number = models.CharField('Número', max_length=20)
@@ -60,6 +60,12 @@ class Delivery(models.Model):
     
     is_active = models.BooleanField('Ativo', default=True)
 
+    # Hash dos campos vindos da planilha; reimportações pulam linhas sem alteração
+    import_fingerprint = models.CharField(
+        'Impressão da Importação', max_length=64,
+        blank=True, null=True, editable=False
+    )
+
     created_at = models.DateTimeField('Data de Cadastro', auto_now_add=True)
     updated_at = models.DateTimeField('Data de Atualização', auto_now=True)
     created_by = models.ForeignKey(
@@ -132,40 +138,12 @@ class Delivery(models.Model):
         assignment = self.composition_assignments.first()
         return assignment.route_composition_id if assignment else None
        
-    def save(self, *args, **kwargs):
-        # decidir se deve geocodificar
-        should_geocode = False
-
-        # 1) se não havia coords antes, sempre geocodifica
-        if not (self.latitude and self.longitude):
-            should_geocode = True
-        else:
-            # 2) caso exista no banco, buscar antigo e comparar campos de endereço
-            if self.pk:
-                try:
-                    old = Delivery.objects.get(pk=self.pk)
-                except Delivery.DoesNotExist:
-                    should_geocode = True
-                else:
-                    # se qualquer campo de endereço mudou, refaz geocodificação
-                    for field in ('street','number','postal_code','neighborhood','city','state'):
-                        if getattr(old, field) != getattr(self, field):
-                            should_geocode = True
-                            break
-
-        if should_geocode:
-            lat, lon = geocode_endereco(
-                self.street,
-                self.number,
-                self.postal_code,
-                self.neighborhood,
-                self.city,
-                self.state
-            )
-            if lat is not None and lon is not None:
-                self.latitude, self.longitude = lat, lon
-
-        super().save(*args, **kwargs)
+    @classmethod
+    def geocode_candidates(cls):
+        # entregas concluídas/canceladas não precisam mais de coordenadas
+        return cls.objects.filter(is_active=True).exclude(
+            status__in=[DeliveryStatus.DELIVERED, DeliveryStatus.CANCELLED]
+        )
 
     def __str__(self) -> str:
         return f"Pedido {self.order_number}"
@@ -0,0 +1,29 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+
+class DeliveryImportFile(models.Model):
+    """
+    Planilha de entregas já importada, identificada pelo hash do conteúdo.
+    Um novo upload com o mesmo hash é ignorado, a menos que a importação seja forçada.
+    """
+    file_hash = models.CharField('Hash do Arquivo', max_length=64, unique=True)
+    file_name = models.CharField('Nome do Arquivo', max_length=255, blank=True)
+
+    deliveries_created = models.PositiveIntegerField('Entregas Criadas', default=0)
+    deliveries_updated = models.PositiveIntegerField('Entregas Atualizadas', default=0)
+    deliveries_unchanged = models.PositiveIntegerField('Entregas Sem Alteração', default=0)
+
+    imported_at = models.DateTimeField('Importado em', auto_now=True)
+    imported_by = models.ForeignKey(
+        User, verbose_name='Importado por',
+        on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='delivery_import_files'
+    )
+
+    class Meta:
+        verbose_name = 'Arquivo de Importação'
+        verbose_name_plural = 'Arquivos de Importação'
+
+    def __str__(self) -> str:
+        return self.file_name or self.file_hash
@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+from tmsapp.action import geocode_endereco, enqueue_geocoding
+
+
+class GeocodeStatus(models.TextChoices):
+    PENDING = 'pending', 'Pendente'
+    OK      = 'ok',      'Geocodificado'
+    FAILED  = 'failed',  'Falhou'
+
+
+# Campos gravados a cada tentativa de geocodificação
+GEOCODE_STATE_FIELDS = (
+    'latitude', 'longitude', 'geocode_status',
+    'geocode_attempts', 'geocode_last_attempt_at', 'geocode_next_attempt_at',
+)
+
+
+class GeocodedModel(models.Model):
+    """
+    Base dos models com endereço geocodificado.
+    Ao salvar com endereço novo/alterado (ou sem coordenadas), o registro fica
+    'pendente' e a geocodificação roda em segundo plano (process_geocode_queue);
+    save(geocode_sync=True) mantém o comportamento antigo, geocodificando na hora.
+    Endereços não encontrados ficam como 'falhou' e são retentados por retry_geocoding.
+    """
+    # Campos de endereço, na ordem dos argumentos de geocode_endereco
+    GEOCODE_FIELDS = ('street', 'number', 'postal_code', 'neighborhood', 'city', 'state')
+
+    geocode_status = models.CharField(
+        'Geocodificação', max_length=10,
+        choices=GeocodeStatus.choices,
+        default=GeocodeStatus.PENDING,
+        db_index=True
+    )
+    # Tentativas desde a última mudança de endereço; falhas são retentadas pela task
+    # retry_geocoding com espera exponencial (geocode_next_attempt_at)
+    geocode_attempts = models.PositiveSmallIntegerField('Tentativas de Geocodificação', default=0, editable=False)
+    geocode_last_attempt_at = models.DateTimeField('Última Tentativa', blank=True, null=True, editable=False)
+    geocode_next_attempt_at = models.DateTimeField(
+        'Próxima Tentativa', blank=True, null=True, editable=False, db_index=True
+    )
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def geocode_candidates(cls) -> models.QuerySet:
+        """Registros que ainda interessam à retentativa de geocodificação."""
+        return cls.objects.all()
+
+    @classmethod
+    def geocode_retry_backoff(cls, attempts: int) -> timedelta:
+        """Espera antes da próxima tentativa: base * 2^(tentativas - 1), limitada ao máximo."""
+        minutes = settings.GEOCODE_RETRY_BASE_MINUTES * 2 ** max(attempts - 1, 0)
+        return timedelta(minutes=min(minutes, settings.GEOCODE_RETRY_MAX_MINUTES))
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # guarda o endereço carregado para comparar no save() sem reconsultar o banco
+        if not instance.get_deferred_fields().intersection(cls.GEOCODE_FIELDS):
+            instance._loaded_address = instance.geocode_address()
+        return instance
+
+    def geocode_address(self) -> tuple:
+        return tuple(getattr(self, field) for field in self.GEOCODE_FIELDS)
+
+    def needs_geocoding(self) -> bool:
+        # 1) sem coordenadas: geocodifica, salvo se a última tentativa para este endereço falhou
+        if not (self.latitude and self.longitude):
+            return self.geocode_status != GeocodeStatus.FAILED or self.address_changed()
+        # 2) com coordenadas: só se o endereço mudou
+        return bool(self.pk) and self.address_changed()
+
+    def address_changed(self) -> bool:
+        """Compara os campos de endereço com os carregados do banco (True para registro novo)."""
+        if not self.pk:
+            return True
+        previous = getattr(self, '_loaded_address', None)
+        if previous is None:
+            previous = type(self).objects.filter(pk=self.pk).values_list(*self.GEOCODE_FIELDS).first()
+            if previous is None:
+                return True
+        return tuple(previous) != self.geocode_address()
+
+    def apply_geocode(self, latitude, longitude) -> None:
+        """Aplica o resultado de uma tentativa de geocodificação (None, None = não encontrado)."""
+        now = timezone.now()
+        self.geocode_attempts += 1
+        self.geocode_last_attempt_at = now
+        if latitude is not None and longitude is not None:
+            self.latitude, self.longitude = latitude, longitude
+            self.geocode_status = GeocodeStatus.OK
+            self.geocode_next_attempt_at = None
+        else:
+            self.geocode_status = GeocodeStatus.FAILED
+            self.geocode_next_attempt_at = now + self.geocode_retry_backoff(self.geocode_attempts)
+
+    def save(self, *args, geocode_sync: bool = None, **kwargs):
+        sync = settings.GEOCODE_ON_SAVE_SYNC if geocode_sync is None else geocode_sync
+        should_geocode = self.needs_geocoding()
+
+        if should_geocode:
+            if self.address_changed():
+                self.geocode_attempts = 0
+            self.geocode_next_attempt_at = None
+            if sync:
+                self.apply_geocode(*geocode_endereco(*self.geocode_address()))
+            else:
+                self.geocode_status = GeocodeStatus.PENDING
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], *GEOCODE_STATE_FIELDS}
+        elif not self.pk:
+            # registro novo já com coordenadas informadas
+            self.geocode_status = GeocodeStatus.OK
+
+        super().save(*args, **kwargs)
+        self._loaded_address = self.geocode_address()
+
+        if should_geocode and not sync:
+            user_id = getattr(self, 'geocode_notify_user_id', None)
+            transaction.on_commit(lambda: enqueue_geocoding(self._meta.label, self.pk, user_id))
@@ -1,3 +1,5 @@
+from .GeocodedModel import *
 from .Delivery import *
+from .DeliveryImportFile import *
 
 
@@ -27,6 +27,8 @@ class DeliveryCreateView(LoginRequiredMixin, CreateView):
     success_url = reverse_lazy('tmsapp:deliveryapp:delivery_list')
 
     def form_valid(self, form):
+        # avisa este usuário quando a geocodificação em segundo plano terminar
+        form.instance.geocode_notify_user_id = self.request.user.id
         messages.success(self.request, 'Entrega criada com sucesso.')
         return super().form_valid(form)
 
@@ -48,6 +50,8 @@ class DeliveryUpdateView(LoginRequiredMixin, UpdateView):
     success_url = reverse_lazy('tmsapp:deliveryapp:delivery_list')
 
     def form_valid(self, form):
+        # avisa este usuário quando a geocodificação em segundo plano terminar
+        form.instance.geocode_notify_user_id = self.request.user.id
         messages.success(self.request, 'Entrega atualizada com sucesso.')
         return super().form_valid(form)
 
@@ -89,7 +93,10 @@ def import_deliveries_view(request):
                 for chunk in upload.chunks():
                     tmp.write(chunk)
             tkrecord = TaskRecord.objects.create(user=request.user, name='Importar entregas', status='started')
-            import_deliveries_from_sheet.delay(request.user.id, tkrecord.id, path)
+            import_deliveries_from_sheet.delay(
+                request.user.id, tkrecord.id, path,
+                force=bool(request.POST.get('force')), file_name=upload.name
+            )
             messages.success(request, "Importação iniciada com sucesso!")
 
     except Exception as e:
@@ -1,7 +1,7 @@
 import logging
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
-from tmsapp.action import get_geojson_by_ors
+from tmsapp.action import get_routing_provider
 
 logger = logging.getLogger(__name__)
 
@@ -55,7 +55,7 @@ def calc_routes(route, composition, loadplan_id):
             route.route_area.departure_location or
             CompanyLocation.objects.filter(is_principal=True, is_active=True).first()
         )
-        geojson, duration, distance, ordered = get_geojson_by_ors(coords, departure)
+        geojson, duration, distance, ordered = get_routing_provider().optimize(coords, departure)
 
         # 5) atualiza o modelo
         route.distance_km = distance / 1000
@@ -0,0 +1,81 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from shapely.geometry import Point, shape
+
+from tmsapp.scriptApp.action import assign_points_to_areas
+
+# Caixa aproximada da região metropolitana do Rio (lon_min, lat_min, lon_max, lat_max)
+BBOX = (-43.80, -23.08, -43.10, -22.75)
+
+
+class Command(BaseCommand):
+    help = 'Compara a atribuição de entregas às áreas: min() por distância x STRtree.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--areas', type=int, default=40, help='Áreas sintéticas')
+        parser.add_argument('--deliveries', type=int, default=8000, help='Entregas sintéticas')
+        parser.add_argument('--from-db', action='store_true', help='Usa as áreas ativas cadastradas')
+        parser.add_argument('--repeat', type=int, default=3, help='Execuções de cada método (vale a melhor)')
+
+    def handle(self, *args, **options):
+        random.seed(42)
+        polygons = self._load_areas() if options['from_db'] else self._generate_areas(options['areas'])
+        if not polygons:
+            raise CommandError('Nenhuma área com polígono válido.')
+        lons = [random.uniform(BBOX[0], BBOX[2]) for _ in range(options['deliveries'])]
+        lats = [random.uniform(BBOX[1], BBOX[3]) for _ in range(options['deliveries'])]
+        self.stdout.write(f'{len(polygons)} áreas, {len(lons)} entregas')
+
+        def brute_force():
+            result = []
+            for lon, lat in zip(lons, lats):
+                pt = Point(lon, lat)
+                index = min(range(len(polygons)), key=lambda i: polygons[i].distance(pt))
+                result.append((index, polygons[index].distance(pt)))
+            return result
+
+        def indexed():
+            indices, distances = assign_points_to_areas(polygons, lons, lats)
+            return list(zip(indices.tolist(), distances.tolist()))
+
+        timings, results = {}, {}
+        for name, method in (('min() por distância', brute_force), ('STRtree', indexed)):
+            best = None
+            for _ in range(max(1, options['repeat'])):
+                started = time.perf_counter()
+                results[name] = method()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+            self.stdout.write(f'{name:<22} {best:8.3f}s  {len(lons) / best:12,.0f} entregas/s')
+
+        baseline, fast = results.values()
+        mismatches = sum(1 for (a, da), (b, db) in zip(baseline, fast) if a != b or abs(da - db) > 1e-12)
+        if mismatches:
+            raise CommandError(f'{mismatches} atribuições diferentes entre os métodos')
+
+        slow, quick = timings.values()
+        self.stdout.write(self.style.SUCCESS(f'Atribuições idênticas. Ganho: {slow / quick:.1f}x'))
+
+    def _load_areas(self):
+        from tmsapp.scriptApp.models import RouteArea
+
+        polygons = []
+        for area in RouteArea.objects.filter(is_active=True).exclude(geojson__isnull=True):
+            try:
+                polygons.append(shape(json.loads(area.geojson)))
+            except Exception:
+                continue
+        return polygons
+
+    def _generate_areas(self, count: int):
+        """Polígonos irregulares espalhados pela caixa, com sobreposições e vazios entre eles."""
+        polygons = []
+        for _ in range(count):
+            center = Point(random.uniform(BBOX[0], BBOX[2]), random.uniform(BBOX[1], BBOX[3]))
+            radius = random.uniform(0.02, 0.06)
+            polygons.append(center.buffer(radius, quad_segs=random.randint(4, 16)).simplify(radius / 20))
+        return polygons
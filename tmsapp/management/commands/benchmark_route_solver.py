@@ -0,0 +1,39 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from tmsapp.scriptApp.action.distance_matrix import haversine_matrix
+from tmsapp.scriptApp.action.local_route_solver import nearest_neighbour_tour, optimize_tour, tour_length
+
+# Caixa aproximada da região metropolitana do Rio (lon_min, lat_min, lon_max, lat_max)
+BBOX = (-43.80, -23.08, -43.10, -22.75)
+
+
+class Command(BaseCommand):
+    help = 'Mede o solver local de rotas (sem rede): vizinho mais próximo x 2-opt/or-opt.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stops', type=int, nargs='+', default=[25, 50, 100, 200],
+                            help='Quantidades de paradas a testar')
+        parser.add_argument('--seed', type=int, default=42, help='Semente dos pontos sintéticos')
+        parser.add_argument('--time-budget', type=float, default=0,
+                            help='Segundos de melhoria por rota (0 = até não melhorar; determinístico)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'paradas':>8} {'vizinho (km)':>13} {'2-opt/or-opt (km)':>18} {'ganho':>7} {'tempo':>8}")
+        for stops in options['stops']:
+            rng = random.Random(options['seed'] + stops)
+            depot = ((BBOX[0] + BBOX[2]) / 2, (BBOX[1] + BBOX[3]) / 2)
+            lons = [depot[0]] + [rng.uniform(BBOX[0], BBOX[2]) for _ in range(stops)]
+            lats = [depot[1]] + [rng.uniform(BBOX[1], BBOX[3]) for _ in range(stops)]
+            matrix = haversine_matrix(lons, lats)
+
+            baseline = tour_length(matrix, nearest_neighbour_tour(matrix)) / 1000
+            started = time.perf_counter()
+            tour = optimize_tour(matrix, options['time_budget'] or None)
+            elapsed = time.perf_counter() - started
+            improved = tour_length(matrix, tour) / 1000
+
+            gain = (1 - improved / baseline) * 100 if baseline else 0.0
+            self.stdout.write(f'{stops:>8} {baseline:>13.1f} {improved:>18.1f} {gain:>6.1f}% {elapsed:>7.3f}s')
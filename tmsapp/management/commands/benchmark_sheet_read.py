@@ -0,0 +1,93 @@
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+from tmsapp.scriptApp.action import read_file_to_dataframe
+from tmsapp.scriptApp.action.read_file_to_dataframe import csv_read_options
+
+# Cabeçalho no formato exportado pelo ERP
+ERP_HEADER = [
+    'doctocliente', 'nomecliente', 'emailcliente', 'telefoneentrega', 'numerosaida', 'idfilial',
+    'enderecoentrega', 'numeroentrega', 'bairroentrega', 'cidadeentrega', 'estadoentrega',
+    'cepentrega', 'observacao', 'pontoreferenciaentrega', 'cubagemm3', 'peso', 'valtotnota',
+    'dataentrega',
+]
+
+
+class Command(BaseCommand):
+    help = 'Compara o tempo de leitura de CSV: parser python com sep=None x detecção + parser C.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help='CSV a ser lido (padrão: gera um arquivo sintético)')
+        parser.add_argument('--rows', type=int, default=200000, help='Linhas do arquivo sintético')
+        parser.add_argument('--repeat', type=int, default=3, help='Execuções de cada leitor (vale a melhor)')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        generated = not path
+        if generated:
+            path = self._generate_csv(options['rows'])
+        elif not os.path.exists(path):
+            raise CommandError(f'Arquivo não encontrado: {path}')
+
+        try:
+            self.stdout.write(f'Arquivo: {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)')
+            self.stdout.write(f'Opções detectadas: {csv_read_options(path)}')
+
+            readers = {
+                'python (sep=None)': lambda: pd.read_csv(path, encoding='ISO-8859-1', sep=None, engine='python'),
+                'c (detecção)': lambda: read_file_to_dataframe(path),
+            }
+            timings = {}
+            for name, reader in readers.items():
+                best = None
+                for _ in range(max(1, options['repeat'])):
+                    started = time.perf_counter()
+                    dataframe = reader()
+                    elapsed = time.perf_counter() - started
+                    best = elapsed if best is None else min(best, elapsed)
+                timings[name] = best
+                self.stdout.write(
+                    f'{name:<20} {best:8.2f}s  {len(dataframe) / best:12,.0f} linhas/s  '
+                    f'doctocliente={dataframe["doctocliente"].dtype}'
+                )
+                del dataframe
+
+            baseline, fast = timings.values()
+            self.stdout.write(self.style.SUCCESS(f'Ganho: {baseline / fast:.1f}x'))
+        finally:
+            if generated:
+                os.remove(path)
+
+    def _generate_csv(self, rows: int) -> str:
+        """Gera um CSV sintético (';', vírgula decimal, ISO-8859-1) parecido com o do ERP."""
+        random.seed(42)
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w', encoding='ISO-8859-1', newline='') as handle:
+            handle.write(';'.join(ERP_HEADER) + '\n')
+            for index in range(rows):
+                handle.write(';'.join([
+                    f'{random.randint(0, 99999999999):011d}',
+                    f'Cliente {index}',
+                    f'cliente{index}@exemplo.com',
+                    f'(21) 9{random.randint(10000000, 99999999)}',
+                    f'{1000000 + index}',
+                    '1',
+                    f'Rua São João {random.randint(1, 500)}',
+                    str(random.randint(1, 3000)),
+                    'Centro',
+                    'Rio de Janeiro - RJ',
+                    'RJ',
+                    f'{random.randint(20000000, 28999999):08d}',
+                    'Entregar no período da manhã',
+                    'Próximo à praça',
+                    f'{random.uniform(0.01, 3):.3f}'.replace('.', ','),
+                    f'{random.uniform(1, 500):.2f}'.replace('.', ','),
+                    f'{random.uniform(10, 9000):.2f}'.replace('.', ','),
+                    f'{random.randint(1, 28):02d}/07/2025',
+                ]) + '\n')
+        return path
@@ -0,0 +1,111 @@
+from decimal import Decimal, InvalidOperation
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tmsapp.scriptApp.models import CepIndex
+
+# Nomes de coluna aceitos no CSV para cada campo da base local
+COLUMN_ALIASES = {
+    'cep': ('cep', 'postal_code', 'codigo_postal'),
+    'street': ('logradouro', 'rua', 'endereco', 'street'),
+    'neighborhood': ('bairro', 'neighborhood'),
+    'city': ('cidade', 'localidade', 'municipio', 'city'),
+    'state': ('uf', 'estado', 'state'),
+    'latitude': ('latitude', 'lat'),
+    'longitude': ('longitude', 'lng', 'lon', 'long'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Carrega (ou atualiza) a base local de CEPs a partir de um dump CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help='Caminho do arquivo CSV')
+        parser.add_argument('--sep', default=None, help='Separador do CSV (padrão: detecta automaticamente)')
+        parser.add_argument('--encoding', default='utf-8', help='Codificação do arquivo (padrão: utf-8)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Linhas gravadas por lote')
+        parser.add_argument('--truncate', action='store_true', help='Apaga a base atual antes de carregar')
+
+    def handle(self, *args, **options):
+        reader_options = {
+            'dtype': str,
+            'keep_default_na': False,
+            'encoding': options['encoding'],
+            'chunksize': options['batch_size'],
+        }
+        if options['sep']:
+            reader_options['sep'] = options['sep']
+        else:
+            reader_options.update(sep=None, engine='python')
+
+        try:
+            chunks = pd.read_csv(options['csv_path'], **reader_options)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Não foi possível ler {options["csv_path"]}: {e}')
+
+        if options['truncate']:
+            CepIndex.objects.all().delete()
+
+        total = 0
+        for chunk in chunks:
+            columns = self._resolve_columns(chunk.columns)
+            entries = {}
+            for row in chunk.itertuples(index=False):
+                entry = self._build_entry(row, columns)
+                if entry:
+                    entries[entry.cep] = entry
+
+            with transaction.atomic():
+                CepIndex.objects.bulk_create(
+                    entries.values(),
+                    update_conflicts=True,
+                    unique_fields=['cep'],
+                    update_fields=['street', 'neighborhood', 'city', 'state', 'latitude', 'longitude', 'updated_at'],
+                    batch_size=options['batch_size'],
+                )
+            total += len(entries)
+            self.stdout.write(f'{total} CEPs carregados...')
+
+        self.stdout.write(self.style.SUCCESS(f'Base de CEPs carregada: {total} registros.'))
+
+    def _resolve_columns(self, columns) -> dict:
+        """Mapeia campo -> posição da coluna no CSV, usando COLUMN_ALIASES."""
+        normalized = [str(column).strip().lower() for column in columns]
+        resolved = {}
+        for field, aliases in COLUMN_ALIASES.items():
+            for alias in aliases:
+                if alias in normalized:
+                    resolved[field] = normalized.index(alias)
+                    break
+        if 'cep' not in resolved:
+            raise CommandError('O CSV precisa ter uma coluna "cep".')
+        return resolved
+
+    def _build_entry(self, row, columns):
+        def value(field) -> str:
+            position = columns.get(field)
+            return str(row[position]).strip() if position is not None else ''
+
+        cep = ''.join(filter(str.isdigit, value('cep')))
+        if len(cep) != 8:
+            return None
+
+        return CepIndex(
+            cep=cep,
+            street=value('street')[:255],
+            neighborhood=value('neighborhood')[:100],
+            city=value('city')[:100],
+            state=value('state')[:2].upper(),
+            latitude=self._parse_coordinate(value('latitude')),
+            longitude=self._parse_coordinate(value('longitude')),
+        )
+
+    def _parse_coordinate(self, text: str):
+        if not text:
+            return None
+        try:
+            return round(Decimal(text.replace(',', '.')), 6)
+        except InvalidOperation:
+            return None
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 00:09
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tmsapp', '0025_delivery_date_delivery_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True, verbose_name='Chave')),
+                ('address', models.CharField(max_length=500, verbose_name='Endereço Normalizado')),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='Latitude')),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='Longitude')),
+                ('provider', models.CharField(choices=[('google', 'Google Geocoding')], default='google', max_length=20, verbose_name='Provedor')),
+                ('tier', models.PositiveSmallIntegerField(blank=True, help_text='Tentativa de geocode_endereco que resolveu o endereço (1, 2 ou 3)', null=True, verbose_name='Tentativa')),
+                ('hit_count', models.PositiveIntegerField(default=0, verbose_name='Acertos')),
+                ('last_hit_at', models.DateTimeField(blank=True, null=True, verbose_name='Último Acerto')),
+                ('resolved_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Resolvido em')),
+            ],
+            options={
+                'verbose_name': 'Cache de Geocodificação',
+                'verbose_name_plural': 'Cache de Geocodificação',
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-18 00:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tmsapp', '0026_geocodecache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CepIndex',
+            fields=[
+                ('cep', models.CharField(max_length=8, primary_key=True, serialize=False, verbose_name='CEP')),
+                ('street', models.CharField(blank=True, default='', max_length=255, verbose_name='Logradouro')),
+                ('neighborhood', models.CharField(blank=True, default='', max_length=100, verbose_name='Bairro')),
+                ('city', models.CharField(blank=True, default='', max_length=100, verbose_name='Cidade')),
+                ('state', models.CharField(blank=True, default='', max_length=2, verbose_name='UF')),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='Latitude')),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='Longitude')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Data de Atualização')),
+            ],
+            options={
+                'verbose_name': 'CEP',
+                'verbose_name_plural': 'Base de CEPs',
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-18 00:15
+
+from django.db import migrations, models
+
+
+def check_duplicate_order_numbers(apps, schema_editor):
+    # O índice único falharia com um erro genérico do banco; as entregas repetidas estão
+    # ligadas a rotas/composições diferentes, então a mesclagem fica a cargo da operação
+    Delivery = apps.get_model('tmsapp', 'Delivery')
+    duplicates = list(
+        Delivery.objects.values('order_number')
+        .annotate(total=models.Count('id'))
+        .filter(total__gt=1)
+        .order_by('order_number')
+        .values_list('order_number', 'total')
+    )
+    if duplicates:
+        sample = ', '.join(f"{order_number} ({total}x)" for order_number, total in duplicates[:20])
+        raise RuntimeError(
+            f"{len(duplicates)} números de pedido repetidos em Delivery impedem o índice único: {sample}"
+            f"{' ...' if len(duplicates) > 20 else ''}. "
+            f"Mescle ou renomeie as entregas repetidas e rode o migrate novamente."
+        )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tmsapp', '0027_cepindex'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_order_numbers, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='delivery',
+            name='order_number',
+            field=models.CharField(max_length=50, unique=True, verbose_name='Número do Pedido'),
+        ),
+        migrations.AlterField(
+            model_name='historicaldelivery',
+            name='order_number',
+            field=models.CharField(db_index=True, max_length=50, verbose_name='Número do Pedido'),
+        ),
+    ]
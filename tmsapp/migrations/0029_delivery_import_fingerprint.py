@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-18 00:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tmsapp', '0028_delivery_order_number_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='delivery',
+            name='import_fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, verbose_name='Impressão da Importação'),
+        ),
+        migrations.AddField(
+            model_name='historicaldelivery',
+            name='import_fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, verbose_name='Impressão da Importação'),
+        ),
+        migrations.CreateModel(
+            name='DeliveryImportFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_hash', models.CharField(max_length=64, unique=True, verbose_name='Hash do Arquivo')),
+                ('file_name', models.CharField(blank=True, max_length=255, verbose_name='Nome do Arquivo')),
+                ('deliveries_created', models.PositiveIntegerField(default=0, verbose_name='Entregas Criadas')),
+                ('deliveries_updated', models.PositiveIntegerField(default=0, verbose_name='Entregas Atualizadas')),
+                ('deliveries_unchanged', models.PositiveIntegerField(default=0, verbose_name='Entregas Sem Alteração')),
+                ('imported_at', models.DateTimeField(auto_now=True, verbose_name='Importado em')),
+                ('imported_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='delivery_import_files', to=settings.AUTH_USER_MODEL, verbose_name='Importado por')),
+            ],
+            options={
+                'verbose_name': 'Arquivo de Importação',
+                'verbose_name_plural': 'Arquivos de Importação',
+            },
+        ),
+    ]
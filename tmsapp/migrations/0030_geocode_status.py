@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-18 00:25
+
+from django.db import migrations, models
+
+
+def backfill_geocode_status(apps, schema_editor):
+    # Registros existentes: com coordenadas ficam 'ok'; sem coordenadas já tiveram a
+    # geocodificação tentada no save antigo, então ficam 'failed' (e não voltam para a fila)
+    for model_name in ('Delivery', 'CompanyLocation'):
+        model = apps.get_model('tmsapp', model_name)
+        located = model.objects.filter(latitude__isnull=False, longitude__isnull=False)
+        located.update(geocode_status='ok')
+        model.objects.exclude(pk__in=located.values('pk')).update(geocode_status='failed')
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tmsapp', '0029_delivery_import_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companylocation',
+            name='geocode_status',
+            field=models.CharField(choices=[('pending', 'Pendente'), ('ok', 'Geocodificado'), ('failed', 'Falhou')], db_index=True, default='pending', max_length=10, verbose_name='Geocodificação'),
+        ),
+        migrations.AddField(
+            model_name='delivery',
+            name='geocode_status',
+            field=models.CharField(choices=[('pending', 'Pendente'), ('ok', 'Geocodificado'), ('failed', 'Falhou')], db_index=True, default='pending', max_length=10, verbose_name='Geocodificação'),
+        ),
+        migrations.AddField(
+            model_name='historicalcompanylocation',
+            name='geocode_status',
+            field=models.CharField(choices=[('pending', 'Pendente'), ('ok', 'Geocodificado'), ('failed', 'Falhou')], db_index=True, default='pending', max_length=10, verbose_name='Geocodificação'),
+        ),
+        migrations.AddField(
+            model_name='historicaldelivery',
+            name='geocode_status',
+            field=models.CharField(choices=[('pending', 'Pendente'), ('ok', 'Geocodificado'), ('failed', 'Falhou')], db_index=True, default='pending', max_length=10, verbose_name='Geocodificação'),
+        ),
+        migrations.RunPython(backfill_geocode_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2 on 2026-10-18 00:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tmsapp', '0030_geocode_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companylocation',
+            name='geocode_attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Tentativas de Geocodificação'),
+        ),
+        migrations.AddField(
+            model_name='companylocation',
+            name='geocode_last_attempt_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Última Tentativa'),
+        ),
+        migrations.AddField(
+            model_name='companylocation',
+            name='geocode_next_attempt_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True, verbose_name='Próxima Tentativa'),
+        ),
+        migrations.AddField(
+            model_name='delivery',
+            name='geocode_attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Tentativas de Geocodificação'),
+        ),
+        migrations.AddField(
+            model_name='delivery',
+            name='geocode_last_attempt_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Última Tentativa'),
+        ),
+        migrations.AddField(
+            model_name='delivery',
+            name='geocode_next_attempt_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True, verbose_name='Próxima Tentativa'),
+        ),
+        migrations.AddField(
+            model_name='historicalcompanylocation',
+            name='geocode_attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Tentativas de Geocodificação'),
+        ),
+        migrations.AddField(
+            model_name='historicalcompanylocation',
+            name='geocode_last_attempt_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Última Tentativa'),
+        ),
+        migrations.AddField(
+            model_name='historicalcompanylocation',
+            name='geocode_next_attempt_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True, verbose_name='Próxima Tentativa'),
+        ),
+        migrations.AddField(
+            model_name='historicaldelivery',
+            name='geocode_attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Tentativas de Geocodificação'),
+        ),
+        migrations.AddField(
+            model_name='historicaldelivery',
+            name='geocode_last_attempt_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Última Tentativa'),
+        ),
+        migrations.AddField(
+            model_name='historicaldelivery',
+            name='geocode_next_attempt_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True, verbose_name='Próxima Tentativa'),
+        ),
+    ]
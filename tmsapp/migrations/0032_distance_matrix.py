@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-18 00:41
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tmsapp', '0031_geocode_attempts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DistanceMatrixEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origin', models.CharField(max_length=32, verbose_name='Origem')),
+                ('destination', models.CharField(max_length=32, verbose_name='Destino')),
+                ('distance_m', models.FloatField(verbose_name='Distância (m)')),
+                ('duration_s', models.FloatField(verbose_name='Duração (s)')),
+                ('source', models.CharField(default='vroom', max_length=20, verbose_name='Provedor')),
+                ('updated_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Matriz de Distâncias',
+                'verbose_name_plural': 'Matriz de Distâncias',
+                'constraints': [models.UniqueConstraint(fields=('origin', 'destination'), name='unique_distance_matrix_pair')],
+            },
+        ),
+    ]
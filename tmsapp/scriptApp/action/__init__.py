@@ -1,3 +1,14 @@
-from .read_file_to_dataframe import read_file_to_dataframe
-from .get_geojson_by_ors import get_geojson_by_ors
-from .geocode_endereco import geocode_endereco
\ No newline at end of file
+from .read_file_to_dataframe import read_file_to_dataframe, iter_file_chunks, count_file_rows
+from .get_geojson_by_ors import get_geojson_by_ors, get_geojson_by_sequence
+from .geocode_endereco import geocode_endereco
+from .geocode_batch import geocode_many
+from .http_client import get_http_client, http_client_stats
+from .bulk_upsert import bulk_upsert, supports_bulk_upsert
+from .geocode_queue import enqueue_geocoding
+from .area_index import assign_points_to_areas
+from .area_geometry_cache import get_area_geometry, get_area_geometries, invalidate_area_geometry
+from .solve_vrp_by_vroom import solve_vrp_by_vroom
+from .local_route_solver import solve_route_locally
+from .routing_provider import RoutingProvider, get_routing_provider, get_fallback_provider
+from .route_cache import route_cache_stats
+from .distance_matrix import get_matrix, distance_matrix_stats
\ No newline at end of file
@@ -0,0 +1,99 @@
+import json
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+import shapely
+from shapely.geometry import shape
+
+
+@dataclass(frozen=True)
+class AreaGeometry:
+    """Polígono de uma RouteArea já interpretado, preparado e serializado."""
+    area_id: int
+    updated_at: Optional[datetime]
+    geometry: object                                # shapely preparado (contains/intersects rápidos)
+    bounds: Tuple[float, float, float, float]       # (lon_min, lat_min, lon_max, lat_max)
+    centroid: Tuple[float, float]                   # (lon, lat)
+    geojson: dict
+    geojson_str: str
+
+
+# Cache do processo atual: {area_id: (updated_at, AreaGeometry | None)}.
+# None guarda também os polígonos inválidos, para não reinterpretá-los a cada chamada.
+_cache: Dict[int, Tuple[Optional[datetime], Optional[AreaGeometry]]] = {}
+_lock = threading.Lock()
+_stats = Counter()
+
+
+def _parse(area) -> Optional[AreaGeometry]:
+    if not area.geojson:
+        return None
+    try:
+        geojson = json.loads(area.geojson) if isinstance(area.geojson, str) else area.geojson
+        geometry = shape(geojson)
+    except Exception as e:
+        logging.warning(f"[AreaGeometry] Polígono inválido na área {area.pk}: {e}")
+        return None
+    if geometry.is_empty:
+        return None
+
+    shapely.prepare(geometry)
+    centroid = geometry.centroid
+    return AreaGeometry(
+        area_id=area.pk,
+        updated_at=area.updated_at,
+        geometry=geometry,
+        bounds=tuple(geometry.bounds),
+        centroid=(centroid.x, centroid.y),
+        geojson=geojson,
+        geojson_str=json.dumps(geojson, separators=(',', ':')),
+    )
+
+
+def get_area_geometry(area) -> Optional[AreaGeometry]:
+    """
+    Geometria da área, reaproveitada enquanto (id, updated_at) não mudar.
+    Retorna None para áreas sem polígono ou com polígono inválido.
+    """
+    with _lock:
+        cached = _cache.get(area.pk)
+        hit = cached is not None and cached[0] == area.updated_at
+        _stats['hits' if hit else 'misses'] += 1
+    if hit:
+        return cached[1]
+
+    entry = _parse(area)
+    with _lock:
+        _cache[area.pk] = (area.updated_at, entry)
+    return entry
+
+
+def get_area_geometries(areas: Iterable) -> Dict[int, AreaGeometry]:
+    """{area_id: AreaGeometry} das áreas com polígono válido."""
+    result = {}
+    for area in areas:
+        entry = get_area_geometry(area)
+        if entry is not None:
+            result[area.pk] = entry
+    return result
+
+
+def invalidate_area_geometry(area_id: int) -> None:
+    with _lock:
+        _cache.pop(area_id, None)
+
+
+def warm_area_geometries() -> int:
+    """Carrega no cache as áreas ativas (chamado na inicialização dos workers)."""
+    from tmsapp.scriptApp.models import RouteArea
+
+    return len(get_area_geometries(RouteArea.objects.filter(is_active=True)))
+
+
+def area_geometry_cache_stats() -> Dict[str, int]:
+    with _lock:
+        return {'size': len(_cache), **_stats}
@@ -0,0 +1,48 @@
+from typing import Sequence, Tuple
+
+import numpy as np
+import shapely
+from shapely.strtree import STRtree
+
+
+def assign_points_to_areas(polygons: Sequence, lons: Sequence[float], lats: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Para cada ponto (lon, lat), retorna o índice do polígono mais próximo e a distância até ele
+    (0 para pontos dentro/na borda), com o mesmo resultado de
+    min(range(len(polygons)), key=lambda i: polygons[i].distance(ponto)):
+    em empate vale o polígono de menor índice.
+
+    1. um STRtree sobre os polígonos (preparados) resolve de uma vez os pontos contidos
+    2. só os pontos fora de todas as áreas vão para a busca de vizinho mais próximo
+    """
+    points = shapely.points(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+    count = len(points)
+    indices = np.full(count, -1, dtype=np.intp)
+    distances = np.zeros(count, dtype=float)
+    if not count or not len(polygons):
+        return indices, distances
+
+    geometries = np.asarray(polygons, dtype=object)
+    shapely.prepare(geometries)
+    tree = STRtree(geometries)
+
+    # 1) pontos dentro (ou na borda) de alguma área: distância 0, menor índice entre as que contêm
+    point_idx, area_idx = tree.query(points, predicate='intersects')
+    if len(point_idx):
+        inside = np.full(count, len(geometries), dtype=np.intp)
+        np.minimum.at(inside, point_idx, area_idx)
+        found = inside < len(geometries)
+        indices[found] = inside[found]
+
+    # 2) demais pontos: vizinho mais próximo (all_matches para desempatar pelo menor índice)
+    outside = np.flatnonzero(indices < 0)
+    if len(outside):
+        (query_idx, area_idx), nearest_distances = tree.query_nearest(
+            points[outside], all_matches=True, return_distance=True
+        )
+        nearest = np.full(len(outside), len(geometries), dtype=np.intp)
+        np.minimum.at(nearest, query_idx, area_idx)
+        indices[outside] = nearest
+        distances[outside[query_idx]] = nearest_distances
+
+    return indices, distances
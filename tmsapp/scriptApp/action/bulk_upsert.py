@@ -0,0 +1,92 @@
+from typing import Any, Dict, Iterable, Sequence
+
+from django.db import connections, models, router
+
+
+def supports_bulk_upsert(model) -> bool:
+    """
+    True se o banco do model aceita INSERT ... ON CONFLICT (coluna) DO UPDATE ... RETURNING
+    (PostgreSQL e SQLite 3.35+). Nos demais, use o caminho bulk_create/bulk_update.
+    """
+    features = connections[router.db_for_write(model)].features
+    return features.supports_update_conflicts_with_target and features.can_return_rows_from_bulk_insert
+
+
+def _is_blank(value) -> bool:
+    return value is None or value == ''
+
+
+def bulk_upsert(
+    objs: Iterable[models.Model],
+    unique_field: str,
+    update_fields: Sequence[str],
+    keep_existing_when_blank: Sequence[str] = (),
+    batch_size: int = 500,
+) -> Dict[Any, int]:
+    """
+    Insere ou atualiza vários objetos com um INSERT ... ON CONFLICT por lote.
+    - unique_field precisa ter índice único no banco
+    - objetos repetidos (mesmo unique_field) são mesclados: vale o último valor não vazio
+    - update_fields são sobrescritos nas linhas existentes; os listados em
+      keep_existing_when_blank mantêm o valor atual quando o novo é NULL/''
+    - campos auto_now são sempre atualizados; defaults e auto_now_add valem na inserção
+
+    Como bulk_create, não chama save() nem dispara signals.
+    Retorna {valor de unique_field: pk} de todas as linhas gravadas.
+    """
+    objs = list(objs)
+    if not objs:
+        return {}
+
+    model = type(objs[0])
+    meta = model._meta
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+
+    fields = [field for field in meta.concrete_fields if not field.primary_key]
+    unique = meta.get_field(unique_field)
+    unique_index = fields.index(unique)
+
+    merged: Dict[Any, list] = {}
+    for obj in objs:
+        values = [field.get_db_prep_save(field.pre_save(obj, add=True), connection) for field in fields]
+        key = values[unique_index]
+        previous = merged.get(key)
+        if previous is not None:
+            values = [old if _is_blank(new) else new for new, old in zip(values, previous)]
+        merged[key] = values
+
+    table = quote(meta.db_table)
+    assignments = []
+    for field in fields:
+        if field.name not in update_fields and not getattr(field, 'auto_now', False):
+            continue
+        column = quote(field.column)
+        if field.name in keep_existing_when_blank:
+            incoming = f"EXCLUDED.{column}"
+            if isinstance(field, (models.CharField, models.TextField)):
+                incoming = f"NULLIF({incoming}, '')"
+            assignments.append(f"{column} = COALESCE({incoming}, {table}.{column})")
+        else:
+            assignments.append(f"{column} = EXCLUDED.{column}")
+
+    columns = ', '.join(quote(field.column) for field in fields)
+    placeholders = '(' + ', '.join(['%s'] * len(fields)) + ')'
+    statement = (
+        f"INSERT INTO {table} ({columns}) VALUES {{values}} "
+        f"ON CONFLICT ({quote(unique.column)}) DO UPDATE SET {', '.join(assignments)} "
+        f"RETURNING {quote(meta.pk.column)}, {quote(unique.column)}"
+    )
+
+    ids: Dict[Any, int] = {}
+    rows = list(merged.values())
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            cursor.execute(
+                statement.format(values=', '.join([placeholders] * len(batch))),
+                [value for row in batch for value in row],
+            )
+            for pk, key in cursor.fetchall():
+                ids[key] = pk
+    return ids
@@ -0,0 +1,103 @@
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+
+def only_digits(cep) -> str:
+    return ''.join(filter(str.isdigit, str(cep or '')))
+
+
+def lookup_cep(cep: str):
+    """
+    Consulta o CEP na base local (CepIndex).
+    Retorna a instância ou None se o CEP não estiver carregado.
+    """
+    from tmsapp.scriptApp.models import CepIndex
+
+    cep_num = only_digits(cep)
+    if len(cep_num) != 8:
+        return None
+    return CepIndex.objects.filter(pk=cep_num).first()
+
+
+def remember_cep(cep: str, street: str, neighborhood: str, city: str, state: str) -> None:
+    """
+    Guarda na base local um CEP obtido do ViaCEP, sem sobrescrever um centróide já carregado.
+    """
+    from tmsapp.scriptApp.models import CepIndex
+
+    cep_num = only_digits(cep)
+    if len(cep_num) != 8:
+        return
+    CepIndex.objects.update_or_create(
+        pk=cep_num,
+        defaults={
+            'street': street[:255],
+            'neighborhood': neighborhood[:100],
+            'city': city[:100],
+            'state': state[:2],
+        }
+    )
+
+
+def cep_centroid(cep: str) -> Optional[Tuple[float, float]]:
+    """Retorna o centróide aproximado (lat, lng) do CEP, se conhecido localmente."""
+    entry = lookup_cep(cep)
+    if entry is None or not entry.has_centroid:
+        return None
+    return float(entry.latitude), float(entry.longitude)
+
+
+class CepSnapshot:
+    """
+    CEPs de um lote carregados da base local com uma única query, para a geocodificação
+    em threads (geocode_many) não tocar no banco: get/centroid/remember têm o mesmo
+    papel de lookup_cep/cep_centroid/remember_cep, mas os CEPs aprendidos do ViaCEP
+    ficam em memória até save(), chamado pela thread que criou o snapshot.
+    """
+
+    def __init__(self, ceps: Iterable[str]):
+        from tmsapp.scriptApp.models import CepIndex
+
+        wanted = {only_digits(cep) for cep in ceps}
+        wanted = [cep for cep in wanted if len(cep) == 8]
+        self.entries: Dict[str, object] = {entry.pk: entry for entry in CepIndex.objects.filter(pk__in=wanted)}
+        self.learned: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def get(self, cep: str):
+        cep_num = only_digits(cep)
+        with self._lock:
+            return self.entries.get(cep_num) or self.learned.get(cep_num)
+
+    def centroid(self, cep: str) -> Optional[Tuple[float, float]]:
+        entry = self.get(cep)
+        if entry is None or not entry.has_centroid:
+            return None
+        return float(entry.latitude), float(entry.longitude)
+
+    def remember(self, cep: str, street: str, neighborhood: str, city: str, state: str) -> None:
+        from tmsapp.scriptApp.models import CepIndex
+
+        cep_num = only_digits(cep)
+        if len(cep_num) != 8:
+            return
+        with self._lock:
+            self.learned[cep_num] = CepIndex(
+                cep=cep_num, street=street[:255], neighborhood=neighborhood[:100],
+                city=city[:100], state=state[:2],
+            )
+
+    def save(self) -> None:
+        """Grava de uma vez os CEPs aprendidos, sem sobrescrever centróides já carregados."""
+        from tmsapp.scriptApp.models import CepIndex
+
+        if not self.learned:
+            return
+        CepIndex.objects.bulk_create(
+            self.learned.values(),
+            update_conflicts=True,
+            unique_fields=['cep'],
+            update_fields=['street', 'neighborhood', 'city', 'state', 'updated_at'],
+        )
+        self.entries.update(self.learned)
+        self.learned = {}
@@ -0,0 +1,193 @@
+import logging
+import threading
+from collections import Counter
+from datetime import timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+EARTH_RADIUS_M = 6371000.0
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(name: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def haversine_matrix(lons, lats) -> np.ndarray:
+    """Matriz (n x n) de distâncias em linha reta (metros) entre os pontos."""
+    lon = np.radians(np.asarray(lons, dtype=float))
+    lat = np.radians(np.asarray(lats, dtype=float))
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def bucket_key(lon, lat) -> str:
+    """Célula espacial do ponto: 'lat,lon' arredondados em ROUTE_MATRIX_BUCKET_DECIMALS casas."""
+    decimals = settings.ROUTE_MATRIX_BUCKET_DECIMALS
+    return f"{float(lat):.{decimals}f},{float(lon):.{decimals}f}"
+
+
+def _load(keys: List[str], index: Dict[str, int], distances: np.ndarray, durations: np.ndarray) -> None:
+    from tmsapp.scriptApp.models import DistanceMatrixEntry
+
+    cutoff = timezone.now() - timedelta(days=settings.ROUTE_MATRIX_TTL_DAYS)
+    rows = DistanceMatrixEntry.objects.filter(
+        origin__in=keys, destination__in=keys, updated_at__gte=cutoff
+    ).values_list('origin', 'destination', 'distance_m', 'duration_s')
+    loaded = 0
+    for origin, destination, distance_m, duration_s in rows:
+        i, j = index[origin], index[destination]
+        distances[i, j] = distance_m
+        durations[i, j] = duration_s
+        loaded += 1
+    _count('stored', loaded)
+
+
+def _fill(keys: List[str], coords: List[List[float]], distances: np.ndarray, durations: np.ndarray) -> None:
+    """
+    Pede ao provedor só os blocos que têm pares faltando (pontos novos), em chamadas de
+    até ROUTE_MATRIX_MAX_LOCATIONS pontos, e grava os pares novos no banco.
+    """
+    from tmsapp.scriptApp.models import DistanceMatrixEntry
+    from .routing_provider import get_routing_provider
+
+    provider = get_routing_provider()
+    if provider.name == 'local':
+        return   # seriam só estimativas haversine; não vale guardar
+
+    size = max(1, settings.ROUTE_MATRIX_MAX_LOCATIONS // 2)
+    chunks = [np.arange(start, min(start + size, len(keys))) for start in range(0, len(keys), size)]
+    now = timezone.now()
+    entries = []
+    for a, first in enumerate(chunks):
+        for second in chunks[a:]:
+            block = np.unique(np.concatenate([first, second]))
+            missing = np.isnan(distances[np.ix_(block, block)])
+            if not missing.any():
+                continue
+            try:
+                result = provider.matrix([coords[i] for i in block])
+            except Exception as e:
+                logging.warning(f"[DistanceMatrix] Falha na matriz do provedor '{provider.name}': {e}")
+                _count('errors')
+                return _store(DistanceMatrixEntry, entries)
+
+            for bi, bj in zip(*np.nonzero(missing)):
+                distance_m = result['distances'][bi][bj]
+                duration_s = result['durations'][bi][bj]
+                if distance_m is None or duration_s is None:
+                    continue   # par sem rota no ORS
+                i, j = block[bi], block[bj]
+                distances[i, j] = distance_m
+                durations[i, j] = duration_s
+                entries.append(DistanceMatrixEntry(
+                    origin=keys[i], destination=keys[j],
+                    distance_m=distance_m, duration_s=duration_s,
+                    source=provider.name, updated_at=now,
+                ))
+    _store(DistanceMatrixEntry, entries)
+
+
+def _store(model, entries: list) -> None:
+    if not entries:
+        return
+    model.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=['origin', 'destination'],
+        update_fields=['distance_m', 'duration_s', 'source', 'updated_at'],
+        batch_size=1000,
+    )
+    _count('fetched', len(entries))
+
+
+def get_matrix(points: Sequence[Sequence[float]], fill: bool = True,
+               estimate: bool = True) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Matrizes (n x n) de distância (m) e duração (s) por estrada entre os pontos [lon, lat].
+
+    Pares já guardados vêm do banco; com fill=True os que faltam são pedidos ao provedor
+    de roteirização e gravados. O que ainda faltar é estimado por haversine
+    (ROUTE_LOCAL_DETOUR_FACTOR / ROUTE_LOCAL_SPEED_KMH) ou, com estimate=False, faz a
+    função retornar None.
+    """
+    keys = [bucket_key(lon, lat) for lon, lat in points]
+    unique = list(dict.fromkeys(keys))
+    index = {key: i for i, key in enumerate(unique)}
+    coords = [None] * len(unique)
+    for key, (lon, lat) in zip(keys, points):
+        if coords[index[key]] is None:
+            coords[index[key]] = [float(lon), float(lat)]
+
+    distances = np.full((len(unique), len(unique)), np.nan)
+    durations = np.full((len(unique), len(unique)), np.nan)
+    np.fill_diagonal(distances, 0.0)
+    np.fill_diagonal(durations, 0.0)
+
+    if len(unique) > 1 and settings.ROUTE_MATRIX_ENABLED:
+        _load(unique, index, distances, durations)
+        if fill and np.isnan(distances).any():
+            _fill(unique, coords, distances, durations)
+
+    missing = np.isnan(distances)
+    if missing.any():
+        if not estimate:
+            return None
+        straight = haversine_matrix([c[0] for c in coords], [c[1] for c in coords])
+        straight *= settings.ROUTE_LOCAL_DETOUR_FACTOR
+        distances[missing] = straight[missing]
+        durations[missing] = straight[missing] / (settings.ROUTE_LOCAL_SPEED_KMH / 3.6)
+        _count('estimated', int(missing.sum()))
+
+    positions = [index[key] for key in keys]
+    return distances[np.ix_(positions, positions)], durations[np.ix_(positions, positions)]
+
+
+def warm_distance_matrix() -> int:
+    """
+    Preenche a matriz entre os pontos de saída ativos, os centróides das áreas ativas e os
+    endereços de entrega mais frequentes (ROUTE_MATRIX_FREQUENT_DAYS / _LIMIT).
+    Retorna quantos pontos foram considerados.
+    """
+    from django.db.models import Count
+    from django.db.models.functions import Round
+    from tmsapp.scriptApp.models import CompanyLocation, RouteArea
+    from tmsapp.deliveryApp.models import Delivery
+    from .area_geometry_cache import get_area_geometries
+
+    points = [
+        [float(lon), float(lat)]
+        for lat, lon in CompanyLocation.objects.filter(
+            is_active=True, latitude__isnull=False, longitude__isnull=False
+        ).values_list('latitude', 'longitude')
+    ]
+    points += [list(geometry.centroid) for geometry in get_area_geometries(RouteArea.objects.filter(is_active=True)).values()]
+
+    decimals = settings.ROUTE_MATRIX_BUCKET_DECIMALS
+    since = timezone.now().date() - timedelta(days=settings.ROUTE_MATRIX_FREQUENT_DAYS)
+    frequent = (
+        Delivery.objects.filter(date_delivery__gte=since, latitude__isnull=False, longitude__isnull=False)
+        .annotate(lat_bucket=Round('latitude', decimals), lon_bucket=Round('longitude', decimals))
+        .values('lat_bucket', 'lon_bucket')
+        .annotate(total=Count('id'))
+        .filter(total__gte=2)
+        .order_by('-total')[:settings.ROUTE_MATRIX_FREQUENT_LIMIT]
+    )
+    points += [[float(row['lon_bucket']), float(row['lat_bucket'])] for row in frequent]
+
+    if len(points) > 1:
+        get_matrix(points, fill=True)
+    return len(points)
+
+
+def distance_matrix_stats() -> Dict[str, int]:
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,100 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from . import geocode_cache
+from .cep_index import CepSnapshot
+from .geocode_endereco import CEP_CENTROID_TIER, geocode_endereco_with_tier
+
+# (rua, número, cep, bairro, cidade, estado) — mesma ordem dos argumentos de geocode_endereco
+AddressKey = Tuple[str, Optional[str], Optional[str], Optional[str], Optional[str], Optional[str]]
+Coordinates = Tuple[Optional[float], Optional[float]]
+
+
+class RateLimiter:
+    """
+    Limita as chamadas a no máximo `rate` por segundo, compartilhado entre threads.
+    rate=0 ou None desativa o limite.
+    """
+
+    def __init__(self, rate: Optional[float]):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def geocode_many(
+    addresses: Iterable[AddressKey],
+    max_workers: int = 8,
+    rate_limit: Optional[float] = None,
+    batch_size: int = 50,
+    on_batch_done: Optional[Callable[[int, int], None]] = None,
+    use_cache: bool = True,
+) -> Dict[AddressKey, Coordinates]:
+    """
+    Geocodifica vários endereços em paralelo.
+    - endereços repetidos são resolvidos uma única vez
+    - o cache (GeocodeCache) e a base de CEPs (CepIndex) são consultados e atualizados
+      em lote, na thread chamadora; as threads de geocodificação não acessam o banco
+    - no máximo max_workers chamadas simultâneas e rate_limit chamadas por segundo
+    - on_batch_done(concluídos, total) é chamado a cada batch_size endereços resolvidos
+
+    Retorna {endereço: (lat, lng)}; (None, None) quando não foi possível geocodificar.
+    """
+    unique_addresses = list(dict.fromkeys(addresses))
+    results: Dict[AddressKey, Coordinates] = {}
+    if not unique_addresses:
+        return results
+
+    if use_cache:
+        results.update(geocode_cache.lookup_many(unique_addresses))
+    pending = [address for address in unique_addresses if address not in results]
+    total = len(pending)
+    if not total:
+        return results
+
+    limiter = RateLimiter(rate_limit)
+    ceps = CepSnapshot(address[2] for address in pending if address[2])
+    to_store = {}
+
+    def resolve(address: AddressKey):
+        limiter.wait()
+        return geocode_endereco_with_tier(*address, ceps=ceps)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total))) as executor:
+        futures = {executor.submit(resolve, address): address for address in pending}
+        for done, future in enumerate(as_completed(futures), start=1):
+            address = futures[future]
+            try:
+                lat, lng, tier, had_error = future.result()
+            except Exception as e:
+                logging.warning(f"[Geocode] Falha ao geocodificar {address}", exc_info=e)
+                lat, lng, tier, had_error = None, None, None, True
+
+            results[address] = (lat, lng)
+            # O centróide do CEP não ocupa o cache; "não encontrado" só é guardado
+            # quando nenhuma tentativa falhou por erro transitório
+            if tier != CEP_CENTROID_TIER and (tier is not None or not had_error):
+                to_store[address] = (lat, lng, tier)
+
+            if on_batch_done and (done % batch_size == 0 or done == total):
+                on_batch_done(done, total)
+
+    ceps.save()
+    if use_cache and to_store:
+        geocode_cache.store_many(to_store)
+
+    return results
@@ -0,0 +1,161 @@
+import hashlib
+import re
+import threading
+from collections import Counter
+from datetime import timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .geocode_endereco import normalize_for_compare
+
+Coordinates = Tuple[Optional[float], Optional[float]]
+
+# Contadores do processo atual (acertos, falhas, gravações e remoções)
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(name: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def geocode_cache_stats() -> Dict[str, int]:
+    """Retorna os contadores de acertos/falhas do cache neste processo."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def normalize_address(
+    endereco: str,
+    numero: Optional[str] = None,
+    postal_code: Optional[str] = None,
+    bairro: Optional[str] = None,
+    cidade: Optional[str] = None,
+    estado: Optional[str] = None,
+) -> str:
+    """
+    Monta o endereço normalizado usado como chave do cache:
+    sem acentos, minúsculo, espaços colapsados e CEP apenas com dígitos.
+    """
+    def clean(value) -> str:
+        return re.sub(r'\s+', ' ', normalize_for_compare(value)).strip()
+
+    cep = ''.join(filter(str.isdigit, str(postal_code or '')))
+    return '|'.join([clean(endereco), clean(numero), cep, clean(bairro), clean(cidade), clean(estado)])
+
+
+def build_geocode_key(*address) -> Tuple[str, str]:
+    """Retorna (hash, endereço normalizado) para os argumentos de geocode_endereco."""
+    normalized = normalize_address(*address)
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest(), normalized
+
+
+def _expiration_cutoffs():
+    now = timezone.now()
+    found_cutoff = now - timedelta(days=settings.GEOCODE_CACHE_TTL_DAYS)
+    missing_cutoff = now - timedelta(hours=settings.GEOCODE_CACHE_NEGATIVE_TTL_HOURS)
+    return found_cutoff, missing_cutoff
+
+
+def _is_fresh(entry, found_cutoff, missing_cutoff) -> bool:
+    cutoff = found_cutoff if entry.is_found else missing_cutoff
+    return entry.resolved_at >= cutoff
+
+
+def _as_coordinates(entry) -> Coordinates:
+    if not entry.is_found:
+        return None, None
+    return float(entry.latitude), float(entry.longitude)
+
+
+def lookup_many(addresses: Iterable[tuple]) -> Dict[tuple, Coordinates]:
+    """
+    Consulta vários endereços no cache com uma única query.
+    Retorna apenas os endereços com entrada válida (inclusive "não encontrado").
+    """
+    from tmsapp.scriptApp.models import GeocodeCache
+
+    keys = {}
+    for address in addresses:
+        keys.setdefault(build_geocode_key(*address)[0], []).append(address)
+    if not keys:
+        return {}
+
+    found_cutoff, missing_cutoff = _expiration_cutoffs()
+    results = {}
+    hit_ids = []
+    for entry in GeocodeCache.objects.filter(key__in=keys.keys()):
+        if not _is_fresh(entry, found_cutoff, missing_cutoff):
+            continue
+        hit_ids.append(entry.pk)
+        for address in keys[entry.key]:
+            results[address] = _as_coordinates(entry)
+
+    if hit_ids:
+        GeocodeCache.objects.filter(pk__in=hit_ids).update(
+            hit_count=F('hit_count') + 1, last_hit_at=timezone.now()
+        )
+    _count('hits', len(hit_ids))
+    _count('misses', len(keys) - len(hit_ids))
+    return results
+
+
+def lookup(*address) -> Optional[Coordinates]:
+    """Consulta um endereço no cache. Retorna None quando não há entrada válida."""
+    return lookup_many([address]).get(address)
+
+
+def store_many(results: Dict[tuple, Tuple[Optional[float], Optional[float], Optional[int]]], provider: str = 'google') -> None:
+    """
+    Grava (ou renova) entradas do cache.
+    results: {endereço: (lat, lng, tentativa)}; lat/lng None guarda "não encontrado".
+    """
+    from tmsapp.scriptApp.models import GeocodeCache
+
+    entries = {}
+    now = timezone.now()
+    for address, (lat, lng, tier) in results.items():
+        key, normalized = build_geocode_key(*address)
+        entries[key] = GeocodeCache(
+            key=key,
+            address=normalized[:500],
+            latitude=round(lat, 6) if lat is not None else None,
+            longitude=round(lng, 6) if lng is not None else None,
+            provider=provider,
+            tier=tier,
+            resolved_at=now,
+        )
+    if not entries:
+        return
+
+    GeocodeCache.objects.bulk_create(
+        entries.values(),
+        update_conflicts=True,
+        unique_fields=['key'],
+        update_fields=['address', 'latitude', 'longitude', 'provider', 'tier', 'resolved_at'],
+        batch_size=500,
+    )
+    _count('stores', len(entries))
+
+
+def store(address: tuple, lat: Optional[float], lng: Optional[float], tier: Optional[int], provider: str = 'google') -> None:
+    """Grava uma entrada do cache."""
+    store_many({address: (lat, lng, tier)}, provider=provider)
+
+
+def evict_expired() -> int:
+    """Remove entradas vencidas (encontradas e não encontradas). Retorna quantas foram removidas."""
+    from django.db.models import Q
+    from tmsapp.scriptApp.models import GeocodeCache
+
+    found_cutoff, missing_cutoff = _expiration_cutoffs()
+    deleted, _ = GeocodeCache.objects.filter(
+        Q(latitude__isnull=False, resolved_at__lt=found_cutoff) |
+        Q(latitude__isnull=True, resolved_at__lt=missing_cutoff)
+    ).delete()
+    _count('evictions', deleted)
+    return deleted
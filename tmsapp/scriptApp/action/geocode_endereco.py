@@ -1,14 +1,18 @@
 import logging
 import os
 import random
-import requests
 from typing import Optional, Tuple
 import unicodedata
 
 from decouple import config
 
+from .http_client import get_http_client
+
 GOOGLE_API_KEY = config('GOOGLE_API_KEY', default=None)
 
+# Tentativa de geocode_endereco que usa o centróide do CEP (base local)
+CEP_CENTROID_TIER = 4
+
 
 def generate_random_color() -> str:
     """Gera uma cor hexadecimal aleatória."""
@@ -35,22 +39,47 @@ def normalize_for_compare(text: str) -> str:
 def consultar_cep_viacep(
     cep: str,
     bairro_esperado: Optional[str] = None,
-    cidade_esperada: Optional[str] = None
+    cidade_esperada: Optional[str] = None,
+    ceps=None
 ) -> Optional[dict]:
-    """Consulta o CEP e confirma bairro/cidade após normalizar."""
+    """
+    Consulta o CEP e confirma bairro/cidade após normalizar.
+    A base local (CepIndex) é consultada primeiro; o ViaCEP só é chamado para
+    CEPs desconhecidos, e a resposta passa a fazer parte da base local.
+    Com `ceps` (CepSnapshot) a base local é lida e atualizada só em memória.
+    """
+    from .cep_index import lookup_cep, remember_cep
+
     cep_num = ''.join(filter(str.isdigit, str(cep)))
     if len(cep_num) != 8:
         logging.warning(f"[ViaCEP] CEP inválido: {cep}")
         return None
 
-    url = f"https://viacep.com.br/ws/{cep_num}/json/"
     try:
-        resp = requests.get(url, timeout=5)
-        resp.raise_for_status()
-        data = resp.json()
-        if data.get("erro"):
-            logging.warning(f"[ViaCEP] CEP não encontrado: {cep_num}")
-            return None
+        local = ceps.get(cep_num) if ceps is not None else lookup_cep(cep_num)
+        if local:
+            data = {
+                "logradouro": local.street,
+                "bairro":     local.neighborhood,
+                "localidade": local.city,
+                "uf":         local.state,
+                "cep":        f"{cep_num[:5]}-{cep_num[5:]}",
+            }
+        else:
+            url = f"https://viacep.com.br/ws/{cep_num}/json/"
+            resp = get_http_client('viacep').get(url, timeout=5)
+            resp.raise_for_status()
+            data = resp.json()
+            if data.get("erro"):
+                logging.warning(f"[ViaCEP] CEP não encontrado: {cep_num}")
+                return None
+            (ceps.remember if ceps is not None else remember_cep)(
+                cep_num,
+                sanitize_str(data.get("logradouro")),
+                sanitize_str(data.get("bairro")),
+                sanitize_str(data.get("localidade")),
+                sanitize_str(data.get("uf")),
+            )
 
         # Normaliza e compara:
         bairro_ret = data.get("bairro", "")
@@ -85,29 +114,92 @@ def geocode_endereco(
     postal_code: Optional[str] = None,
     bairro: Optional[str] = None,
     cidade: Optional[str] = None,
-    estado: Optional[str] = None
+    estado: Optional[str] = None,
+    use_cache: bool = True
 ) -> Tuple[Optional[float], Optional[float]]:
     """
     Tenta obter latitude/longitude do endereço via Google Geocoding API.
+    0) Consulta o cache persistente (GeocodeCache) pelo endereço normalizado
     1) Geocode com components
     2) Se falhar e tiver postal_code, consulta ViaCEP + geocode completo
     3) Geocode com string completa (autocomplete)
+    4) Centróide do CEP na base local (CepIndex), também usado sem chave/rede
+    O resultado das tentativas 1-3 (inclusive "não encontrado") é gravado no cache,
+    exceto quando alguma tentativa falhou por erro de rede/HTTP.
     """
+    from . import geocode_cache
+
+    address = (endereco, numero, postal_code, bairro, cidade, estado)
+    if use_cache:
+        cached = geocode_cache.lookup(*address)
+        if cached is not None:
+            return cached
+
+    lat, lng, tier, had_error = geocode_endereco_with_tier(*address)
+
+    # O centróide do CEP é aproximado e local: não ocupa o cache.
+    # "Não encontrado" só é guardado quando nenhuma tentativa falhou por erro transitório
+    if use_cache and tier != CEP_CENTROID_TIER and (tier is not None or not had_error):
+        geocode_cache.store(address, lat, lng, tier)
+    return lat, lng
+
+
+def geocode_endereco_with_tier(
+    endereco: str,
+    numero: Optional[str] = None,
+    postal_code: Optional[str] = None,
+    bairro: Optional[str] = None,
+    cidade: Optional[str] = None,
+    estado: Optional[str] = None,
+    ceps=None
+) -> Tuple[Optional[float], Optional[float], Optional[int], bool]:
+    """
+    Executa as tentativas de geocodificação sem consultar o cache.
+    Com `ceps` (CepSnapshot) não há acesso ao banco, o que permite rodar em threads.
+    Retorna (lat, lng, tentativa que resolveu, houve erro de configuração/rede/HTTP).
+    """
+    lat, lng, tier, had_error = _geocode_google(endereco, numero, postal_code, bairro, cidade, estado, ceps)
+    if tier is None and postal_code:
+        # 4) Fallback offline: centróide do CEP na base local
+        from .cep_index import cep_centroid
+
+        centroid = ceps.centroid(postal_code) if ceps is not None else cep_centroid(postal_code)
+        if centroid:
+            logging.warning(f"[Geocode] Usando centróide do CEP {postal_code}")
+            return centroid[0], centroid[1], CEP_CENTROID_TIER, had_error
+    return lat, lng, tier, had_error
+
+
+def _geocode_google(
+    endereco: str,
+    numero: Optional[str] = None,
+    postal_code: Optional[str] = None,
+    bairro: Optional[str] = None,
+    cidade: Optional[str] = None,
+    estado: Optional[str] = None,
+    ceps=None
+) -> Tuple[Optional[float], Optional[float], Optional[int], bool]:
+    """Tentativas 1-3 (Google Geocoding, com apoio do ViaCEP/base local de CEPs)."""
     API_URL = "https://maps.googleapis.com/maps/api/geocode/json"
     key = GOOGLE_API_KEY
     if not key:
         logging.error("[Geocode] Chave da API do Google não configurada.")
-        return None, None
+        return None, None, None, True
+
+    errors = []
 
     def attempt_geocode(params: dict) -> Optional[Tuple[float, float]]:
         try:
-            resp = requests.get(API_URL, params=params, timeout=10)
+            resp = get_http_client('google').get(API_URL, params=params, timeout=(5, 10))
             resp.raise_for_status()
             j = resp.json()
             if j.get('status') == 'OK' and j.get('results'):
                 loc = j['results'][0]['geometry']['location']
                 return loc['lat'], loc['lng']
+            if j.get('status') not in ('OK', 'ZERO_RESULTS'):
+                errors.append(j.get('status'))
         except Exception as e:
+            errors.append(e)
             logging.warning(f"[Geocode] Falha ao geocodificar com params={params}", exc_info=e)
         return None
 
@@ -130,11 +222,11 @@ def geocode_endereco(
     logging.debug(f"[Geocode] Tentativa 1 components: {params1}")
     result = attempt_geocode(params1)
     if result:
-        return result
+        return result[0], result[1], 1, bool(errors)
 
     # 2) Tentativa via ViaCEP
     if postal_code:
-        via_cep = consultar_cep_viacep(postal_code, bairro, cidade)
+        via_cep = consultar_cep_viacep(postal_code, bairro, cidade, ceps)
         if via_cep:
             addr = ", ".join(filter(None, [
                 via_cep["rua"],
@@ -149,7 +241,7 @@ def geocode_endereco(
             logging.warning(f"[Geocode] Tentativa 2 ViaCEP: {params2}")
             result = attempt_geocode(params2)
             if result:
-                return result
+                return result[0], result[1], 2, bool(errors)
 
     # 3) Tentativa geral (autocomplete)
 
@@ -173,7 +265,7 @@ def geocode_endereco(
     result = attempt_geocode(params3)
     logging.warning(f"[Geocode] Tentativa 3 autocomplete: {params3} LATITUDE: {result}")
     if result:
-        return result
+        return result[0], result[1], 3, bool(errors)
 
-    return None, None
+    return None, None, None, bool(errors)
 
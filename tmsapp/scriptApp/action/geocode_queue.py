@@ -0,0 +1,137 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+import redis
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .geocode_batch import geocode_many
+
+# Quem deve ser avisado quando um registro pendente for geocodificado: {"<model>:<pk>": user_id}
+NOTIFY_KEY = "geocode_queue:notify"
+# Marca que já existe uma execução da fila agendada (evita uma task por save)
+SCHEDULED_KEY = "geocode_queue:scheduled"
+SCHEDULED_TTL = 60
+
+
+def enqueue_geocoding(model_label: str, pk: int, user_id: Optional[int] = None) -> None:
+    """
+    Coloca um registro na fila de geocodificação.
+    O registro já está salvo com geocode_status='pending' (é isso que o mantém na fila);
+    aqui só guardamos quem avisar e agendamos a execução da fila, se ainda não houver uma.
+    """
+    from djangonotify.progress import get_redis
+
+    if user_id:
+        try:
+            get_redis().hset(NOTIFY_KEY, f"{model_label}:{pk}", user_id)
+        except redis.RedisError as e:
+            logging.warning(f"[GeocodeQueue] Falha ao registrar aviso de {model_label}:{pk}: {e}")
+    schedule_geocode_queue()
+
+
+def schedule_geocode_queue() -> None:
+    """Agenda process_geocode_queue uma única vez por janela (saves em sequência viram um lote)."""
+    from djangonotify.progress import get_redis
+    from tmsapp.tasks import process_geocode_queue
+
+    try:
+        if not get_redis().set(SCHEDULED_KEY, 1, nx=True, ex=SCHEDULED_TTL):
+            return
+    except redis.RedisError as e:
+        logging.warning(f"[GeocodeQueue] Falha ao verificar agendamento: {e}")
+    try:
+        process_geocode_queue.apply_async(countdown=settings.GEOCODE_QUEUE_DELAY)
+    except Exception as e:
+        # o registro continua pendente e será pego pela retentativa periódica (retry_geocoding)
+        logging.warning(f"[GeocodeQueue] Falha ao agendar a fila de geocodificação: {e}")
+
+
+def pop_notify_targets(model_label: str, pks: List[int]) -> Dict[int, int]:
+    """Retorna e remove {pk: user_id} dos registros que pediram aviso."""
+    from djangonotify.progress import get_redis
+
+    if not pks:
+        return {}
+    fields = [f"{model_label}:{pk}" for pk in pks]
+    try:
+        pipeline = get_redis().pipeline()
+        pipeline.hmget(NOTIFY_KEY, fields)
+        pipeline.hdel(NOTIFY_KEY, *fields)
+        user_ids, _ = pipeline.execute()
+    except redis.RedisError as e:
+        logging.warning(f"[GeocodeQueue] Falha ao ler avisos: {e}")
+        return {}
+    return {pk: int(user_id) for pk, user_id in zip(pks, user_ids) if user_id}
+
+
+def geocode_records(model, records: List, max_workers: Optional[int] = None) -> List:
+    """
+    Geocodifica os registros (GeocodedModel) em lote e grava coordenadas, status
+    e controle de tentativas com um único bulk_update.
+    """
+    from tmsapp.deliveryApp.models import GEOCODE_STATE_FIELDS
+
+    if not records:
+        return []
+
+    results = geocode_many(
+        [record.geocode_address() for record in records],
+        max_workers=max_workers or settings.GEOCODE_MAX_WORKERS,
+        rate_limit=settings.GEOCODE_RATE_LIMIT,
+    )
+    for record in records:
+        record.apply_geocode(*results.get(record.geocode_address(), (None, None)))
+
+    model.objects.bulk_update(records, GEOCODE_STATE_FIELDS, batch_size=500)
+    return records
+
+
+def geocode_pending_records(model, limit: int) -> List:
+    """Geocodifica até `limit` registros pendentes do model e retorna os processados."""
+    from tmsapp.deliveryApp.models import GeocodeStatus
+
+    records = list(
+        model.objects.filter(geocode_status=GeocodeStatus.PENDING).order_by('pk')[:limit]
+    )
+    return geocode_records(model, records)
+
+
+def geocode_retry_due(model, limit: int) -> List:
+    """
+    Retenta até `limit` registros cuja próxima tentativa já venceu:
+    - 'falhou' com geocode_next_attempt_at <= agora e menos de GEOCODE_RETRY_MAX_ATTEMPTS tentativas
+    - 'pendente' há mais de GEOCODE_RETRY_PENDING_MINUTES (a fila não chegou a processá-los)
+    Os mais atrasados primeiro.
+    """
+    from tmsapp.deliveryApp.models import GeocodeStatus
+
+    now = timezone.now()
+    due_failed = Q(
+        geocode_status=GeocodeStatus.FAILED,
+        geocode_attempts__lt=settings.GEOCODE_RETRY_MAX_ATTEMPTS,
+    ) & (Q(geocode_next_attempt_at__isnull=True) | Q(geocode_next_attempt_at__lte=now))
+    stale_pending = Q(
+        geocode_status=GeocodeStatus.PENDING,
+        updated_at__lte=now - timedelta(minutes=settings.GEOCODE_RETRY_PENDING_MINUTES),
+    )
+    records = list(
+        model.geocode_candidates()
+        .filter(due_failed | stale_pending)
+        .order_by(F('geocode_next_attempt_at').asc(nulls_first=True), 'pk')[:limit]
+    )
+    return geocode_records(model, records, max_workers=settings.GEOCODE_RETRY_MAX_WORKERS)
+
+
+def group_by_user(model_label: str, records: List) -> Dict[int, List]:
+    """Agrupa os registros processados por usuário a ser avisado."""
+    targets = pop_notify_targets(model_label, [record.pk for record in records])
+    grouped = defaultdict(list)
+    for record in records:
+        user_id = targets.get(record.pk)
+        if user_id:
+            grouped[user_id].append(record)
+    return grouped
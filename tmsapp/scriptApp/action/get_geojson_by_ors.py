@@ -2,6 +2,11 @@ import json
 import requests
 from typing import List, Dict, Optional, Tuple, Any
 
+from django.conf import settings
+
+from .distance_matrix import get_matrix
+from .http_client import get_http_client
+
 
 def get_geojson_by_ors(
     coordinates: List[Dict[str, Any]], 
@@ -26,16 +31,7 @@ def get_geojson_by_ors(
     if not coordinates:
         raise ValueError("Lista de coordenadas não pode estar vazia")
     
-    # Define ponto de partida
-    if (departure_location and 
-        hasattr(departure_location, 'latitude') and 
-        hasattr(departure_location, 'longitude') and
-        departure_location.latitude and 
-        departure_location.longitude):
-        start_coord = [float(departure_location.longitude), float(departure_location.latitude)]
-    else:
-        # Usa primeira coordenada como padrão
-        start_coord = [float(coordinates[0]['long']), float(coordinates[0]['lat'])]
+    start_coord = departure_coord(departure_location, coordinates)
     
     # Prepara jobs para VROOM
     jobs = []
@@ -60,12 +56,24 @@ def get_geojson_by_ors(
         ]
     }
 
+    # Se todos os pares já estão na matriz persistente, o VROOM não precisa recalculá-la
+    stored = get_matrix([start_coord] + [job["location"] for job in jobs], fill=False, estimate=False)
+    if stored is not None:
+        distances, durations = stored
+        payload["matrices"] = {"driving-car": {
+            "durations": durations.round().astype(int).tolist(),
+            "distances": distances.round().astype(int).tolist(),
+        }}
+        payload["vehicles"][0]["start_index"] = payload["vehicles"][0]["end_index"] = 0
+        for idx, job in enumerate(jobs, start=1):
+            job["location_index"] = idx
+
     try:
         # Chamada ao VROOM
-        vroom_response = requests.post(
-            "https://vroom.starseguro.com.br/", 
+        vroom_response = get_http_client('vroom').post(
+            settings.ROUTING_VROOM_URL, 
             json=payload,
-            timeout=30
+            timeout=(5, 30)
         )
         vroom_response.raise_for_status()
         
@@ -79,7 +87,7 @@ def get_geojson_by_ors(
         raise KeyError(f"Resposta VROOM inválida: 'routes' ausente\n{json.dumps(vroom_data, indent=2)}")
 
     route = vroom_data["routes"][0]
-    coordenadas_ordenadas = [start_coord]
+    jobs_by_id = {job["id"]: job for job in jobs}
     delivery_ordered = []
 
     # Reorganiza entregas conforme otimização VROOM
@@ -87,26 +95,68 @@ def get_geojson_by_ors(
         if step["type"] != "job":
             continue
             
-        job = next((j for j in jobs if j["id"] == step["id"]), None)
+        job = jobs_by_id.get(step["id"])
         if job:
             coord = job["location"]
-            coordenadas_ordenadas.append(coord)
             delivery_ordered.append({
                 "order_number": job["description"],
                 "lat": coord[1],
                 "long": coord[0]
             })
 
+    return _route_geojson(start_coord, delivery_ordered)
+
+
+def departure_coord(departure_location: Optional[Any], coordinates: List[Dict[str, Any]]) -> List[float]:
+    """[lon, lat] do ponto de partida; sem local de partida válido, usa a primeira coordenada"""
+    if (departure_location and 
+        hasattr(departure_location, 'latitude') and 
+        hasattr(departure_location, 'longitude') and
+        departure_location.latitude and 
+        departure_location.longitude):
+        return [float(departure_location.longitude), float(departure_location.latitude)]
+    return [float(coordinates[0]['long']), float(coordinates[0]['lat'])]
+
+
+def get_geojson_by_sequence(
+    coordinates: List[Dict[str, Any]], 
+    departure_location: Optional[Any] = None
+) -> Tuple[Dict, int, int, List[Dict]]:
+    """
+    Gera GeoJSON com ORS para entregas já sequenciadas (sem otimizar a ordem)
+    
+    Args:
+        coordinates: Lista de coordenadas na ordem de visita [{'lat': x, 'long': y, 'order_number': z}, ...]
+        departure_location: CompanyLocation de partida com latitude/longitude (opcional)
+    
+    Returns:
+        Tuple contendo: (geojson, duration, distance, delivery_ordered)
+    """
+    if not coordinates:
+        raise ValueError("Lista de coordenadas não pode estar vazia")
+
+    delivery_ordered = [
+        {"order_number": str(c['order_number']), "lat": float(c['lat']), "long": float(c['long'])}
+        for c in coordinates
+    ]
+    return _route_geojson(departure_coord(departure_location, coordinates), delivery_ordered)
+
+
+def _route_geojson(start_coord: List[float], delivery_ordered: List[Dict]) -> Tuple[Dict, int, int, List[Dict]]:
+    """Chama o ORS para o trajeto partida -> entregas na ordem dada"""
+    coordenadas_ordenadas = [start_coord]
+    coordenadas_ordenadas.extend([d['long'], d['lat']] for d in delivery_ordered)
+
     # Payload para ORS
     geojson_payload = {"coordinates": coordenadas_ordenadas}
     
     try:
         # Chamada ao ORS para GeoJSON
-        ors_response = requests.post(
-            "https://ors.starseguro.com.br/ors/v2/directions/driving-car/geojson",
+        ors_response = get_http_client('ors').post(
+            f"{settings.ROUTING_ORS_URL}/v2/directions/driving-car/geojson",
             headers={"Content-Type": "application/json"},
             json=geojson_payload,
-            timeout=30
+            timeout=(5, 30)
         )
         ors_response.raise_for_status()
         
@@ -0,0 +1,192 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Configuração padrão de cada serviço externo; pode ser sobrescrita por
+# settings.HTTP_UPSTREAMS = {'vroom': {'max_concurrency': 8, ...}}
+DEFAULT_UPSTREAM_CONFIG = {
+    'max_connections': 10,      # conexões keep-alive mantidas no pool
+    'max_concurrency': 10,      # requisições simultâneas permitidas
+    'retries': 2,               # novas tentativas em falha de conexão / status de retry_statuses
+    'read_retries': 2,          # novas tentativas após timeout de leitura (a requisição já chegou)
+    'retry_statuses': (429, 500, 502, 503, 504),
+    'backoff_factor': 0.5,      # espera 0.5s, 1s, 2s... entre tentativas
+    'failure_threshold': 5,     # falhas seguidas que abrem o circuito
+    'reset_timeout': 30,        # segundos com o circuito aberto antes de testar de novo
+}
+
+# VROOM/ORS: timeouts de leitura longos (até ROUTE_VRP_TIMEOUT); repetir um timeout de
+# leitura ou um 500/504 multiplicaria a espera antes de a falha chegar ao circuit breaker,
+# então só falhas de conexão, 429 e 503 são retentadas
+ROUTING_RETRY = {'read_retries': 0, 'retry_statuses': (429, 503)}
+
+UPSTREAMS = {
+    'google': {'max_connections': 20, 'max_concurrency': 20},
+    'viacep': {},
+    'vroom': {'max_concurrency': 4, 'failure_threshold': 3, **ROUTING_RETRY},
+    'ors': {'max_concurrency': 4, 'failure_threshold': 3, **ROUTING_RETRY},
+}
+
+
+class CircuitOpenError(requests.RequestException):
+    """Levantada quando o circuito do serviço está aberto e a chamada é recusada sem rede."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker simples:
+    - fechado: chamadas passam; failure_threshold falhas seguidas abrem o circuito
+    - aberto: chamadas falham imediatamente até reset_timeout expirar
+    - meio-aberto: uma chamada de teste passa; sucesso fecha, falha reabre
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_progress = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_progress:
+                raise CircuitOpenError(f"Serviço {self.name} indisponível (circuito aberto)")
+            self._trial_in_progress = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_progress = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            should_open = self._trial_in_progress or self._failures >= self.failure_threshold
+            self._trial_in_progress = False
+            if should_open:
+                if self._opened_at is None:
+                    logging.warning(f"[HTTP] Circuito aberto para {self.name} após {self._failures} falhas")
+                self._opened_at = time.monotonic()
+
+
+class UpstreamClient:
+    """
+    Cliente HTTP de um serviço externo: sessão com pool keep-alive, retentativas
+    com backoff, limite de requisições simultâneas, circuit breaker e contadores.
+    """
+
+    def __init__(self, name: str, max_connections: int, max_concurrency: int, retries: int,
+                 read_retries: int, retry_statuses: tuple, backoff_factor: float,
+                 failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._stats_lock = threading.Lock()
+        self._stats = {'requests': 0, 'errors': 0, 'rejected': 0, 'latency_total_ms': 0.0, 'latency_max_ms': 0.0}
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=read_retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=tuple(retry_statuses),
+            allowed_methods=None,  # VROOM/ORS recebem POSTs idempotentes
+            raise_on_status=False,
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            self._record(rejected=True)
+            raise
+
+        with self._semaphore:
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.RequestException:
+                self.breaker.record_failure()
+                self._record(started, error=True)
+                raise
+
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+            self._record(started, error=True)
+        else:
+            self.breaker.record_success()
+            self._record(started)
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def _record(self, started: Optional[float] = None, error: bool = False, rejected: bool = False) -> None:
+        with self._stats_lock:
+            if rejected:
+                self._stats['rejected'] += 1
+                return
+            elapsed_ms = (time.monotonic() - started) * 1000
+            self._stats['requests'] += 1
+            self._stats['latency_total_ms'] += elapsed_ms
+            self._stats['latency_max_ms'] = max(self._stats['latency_max_ms'], elapsed_ms)
+            if error:
+                self._stats['errors'] += 1
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['latency_avg_ms'] = stats['latency_total_ms'] / stats['requests'] if stats['requests'] else 0.0
+        stats['circuit'] = self.breaker.state
+        return stats
+
+
+_clients: Dict[str, UpstreamClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_http_client(name: str) -> UpstreamClient:
+    """Retorna o cliente compartilhado (por processo) do serviço externo `name`."""
+    client = _clients.get(name)
+    if client:
+        return client
+    with _clients_lock:
+        if name not in _clients:
+            config = {**DEFAULT_UPSTREAM_CONFIG, **UPSTREAMS.get(name, {})}
+            config.update(getattr(settings, 'HTTP_UPSTREAMS', {}).get(name, {}))
+            _clients[name] = UpstreamClient(name, **config)
+        return _clients[name]
+
+
+def http_client_stats() -> Dict[str, Dict]:
+    """Contadores de latência/erros de cada serviço externo usado neste processo."""
+    return {name: client.stats() for name, client in list(_clients.items())}
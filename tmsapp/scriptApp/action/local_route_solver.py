@@ -0,0 +1,188 @@
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from .distance_matrix import get_matrix
+from .get_geojson_by_ors import departure_coord
+
+
+def nearest_neighbour_tour(matrix: np.ndarray) -> np.ndarray:
+    """Tour fechado começando no nó 0: sempre o vizinho mais próximo ainda não visitado."""
+    n = len(matrix)
+    tour = np.zeros(n, dtype=np.intp)
+    visited = np.zeros(n, dtype=bool)
+    visited[0] = True
+    current = 0
+    for position in range(1, n):
+        candidates = np.where(visited, np.inf, matrix[current])
+        current = int(np.argmin(candidates))
+        tour[position] = current
+        visited[current] = True
+    return tour
+
+
+def tour_length(matrix: np.ndarray, tour: np.ndarray, closed: bool = True) -> float:
+    length = float(matrix[tour[:-1], tour[1:]].sum())
+    if closed and len(tour) > 1:
+        length += float(matrix[tour[-1], tour[0]])
+    return length
+
+
+def two_opt(matrix: np.ndarray, tour: np.ndarray, deadline: Optional[float] = None) -> Tuple[np.ndarray, bool]:
+    """
+    2-opt no tour fechado (nó 0 fixo na posição 0): para cada aresta (a, b) avalia
+    de uma vez, com NumPy, todas as trocas por (c, d) e aplica a melhor.
+    Retorna (tour, melhorou).
+    """
+    tour = tour.copy()
+    n = len(tour)
+    improved_any = False
+    improved = n > 3
+    while improved:
+        improved = False
+        for i in range(0, n - 2):
+            if deadline is not None and time.monotonic() > deadline:
+                return tour, improved_any
+            a, b = tour[i], tour[i + 1]
+            j = np.arange(i + 2, n if i > 0 else n - 1)
+            if not len(j):
+                continue
+            c = tour[j]
+            d = tour[(j + 1) % n]
+            delta = matrix[a, c] + matrix[b, d] - matrix[a, b] - matrix[c, d]
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-9:
+                k = int(j[best])
+                tour[i + 1:k + 1] = tour[i + 1:k + 1][::-1]
+                improved = improved_any = True
+    return tour, improved_any
+
+
+def or_opt(matrix: np.ndarray, tour: np.ndarray, deadline: Optional[float] = None,
+           max_segment: int = 3) -> Tuple[np.ndarray, bool]:
+    """
+    Or-opt no tour fechado (nó 0 fixo): move trechos de 1 a max_segment paradas, no
+    sentido original ou invertido, para a posição mais barata do restante do tour.
+    Retorna (tour, melhorou).
+    """
+    tour = list(tour)
+    n = len(tour)
+    improved_any = False
+    improved = n > 3
+    while improved:
+        improved = False
+        for length in range(1, max_segment + 1):
+            start = 1
+            while start + length <= n:
+                if deadline is not None and time.monotonic() > deadline:
+                    return np.asarray(tour, dtype=np.intp), improved_any
+                segment = tour[start:start + length]
+                prev_node, next_node = tour[start - 1], tour[(start + length) % n]
+                first, last = segment[0], segment[-1]
+                removal_gain = (matrix[prev_node, first] + matrix[last, next_node]
+                                - matrix[prev_node, next_node])
+
+                rest = np.asarray(tour[:start] + tour[start + length:], dtype=np.intp)
+                u, v = rest, np.roll(rest, -1)
+                forward = matrix[u, first] + matrix[last, v] - matrix[u, v]
+                backward = matrix[u, last] + matrix[first, v] - matrix[u, v]
+                costs = np.minimum(forward, backward)
+                costs[start - 1] = np.inf   # posição original
+                best = int(np.argmin(costs))
+
+                if costs[best] < removal_gain - 1e-9:
+                    moved = segment if forward[best] <= backward[best] else segment[::-1]
+                    rest = rest.tolist()
+                    tour = rest[:best + 1] + moved + rest[best + 1:]
+                    improved = improved_any = True
+                else:
+                    start += 1
+    return np.asarray(tour, dtype=np.intp), improved_any
+
+
+def optimize_tour(matrix: np.ndarray, time_budget: Optional[float] = None) -> np.ndarray:
+    """Vizinho mais próximo + 2-opt/or-opt alternados até não melhorar ou o tempo acabar."""
+    deadline = time.monotonic() + time_budget if time_budget else None
+    tour = nearest_neighbour_tour(matrix)
+    while True:
+        tour, improved_2opt = two_opt(matrix, tour, deadline)
+        tour, improved_oropt = or_opt(matrix, tour, deadline)
+        if not improved_oropt or (deadline is not None and time.monotonic() > deadline):
+            return tour
+
+
+def straight_line_geojson(path: List[List[float]], distance_m: float, duration_s: float) -> Dict:
+    """GeoJSON no formato da resposta de directions do ORS, com o trajeto em linha reta."""
+    lons = [point[0] for point in path]
+    lats = [point[1] for point in path]
+    return {
+        "type": "FeatureCollection",
+        "bbox": [min(lons), min(lats), max(lons), max(lats)],
+        "features": [{
+            "type": "Feature",
+            "bbox": [min(lons), min(lats), max(lons), max(lats)],
+            "geometry": {"type": "LineString", "coordinates": path},
+            "properties": {
+                "summary": {"distance": distance_m, "duration": duration_s},
+                "way_points": [0, len(path) - 1],
+                "solver": "local",
+            },
+        }],
+    }
+
+
+def solve_route_locally(
+    coordinates: List[Dict[str, Any]],
+    departure_location: Optional[Any] = None,
+    time_budget: Optional[float] = None,
+    optimize: bool = True
+) -> Tuple[Dict, int, int, List[Dict]]:
+    """
+    Substituto local (sem rede) do get_geojson_by_ors: matriz de distâncias, tour por
+    vizinho mais próximo + 2-opt/or-opt e GeoJSON em linha reta.
+
+    A ordem é otimizada como no VROOM (saída e retorno ao ponto de partida); distância e
+    duração cobrem, como no ORS, o trajeto partida -> última entrega. Usa as distâncias por
+    estrada já guardadas na matriz persistente (distance_matrix); os pares sem registro
+    são estimados pela linha reta x ROUTE_LOCAL_DETOUR_FACTOR a ROUTE_LOCAL_SPEED_KMH.
+
+    Args:
+        coordinates: Lista de coordenadas [{'lat': x, 'long': y, 'order_number': z}, ...]
+        departure_location: CompanyLocation de partida com latitude/longitude (opcional)
+        time_budget: segundos para a melhoria (None = ROUTE_LOCAL_SOLVER_TIME_BUDGET; 0 = sem limite)
+        optimize: False mantém a ordem recebida (só gera o traçado)
+
+    Returns:
+        Tuple contendo: (geojson, duration, distance, delivery_ordered)
+    """
+    if not coordinates:
+        raise ValueError("Lista de coordenadas não pode estar vazia")
+
+    start_coord = departure_coord(departure_location, coordinates)
+    lons = [start_coord[0]] + [float(c['long']) for c in coordinates]
+    lats = [start_coord[1]] + [float(c['lat']) for c in coordinates]
+    distances, durations = get_matrix(list(zip(lons, lats)), fill=False)
+
+    if optimize:
+        if time_budget is None:
+            time_budget = settings.ROUTE_LOCAL_SOLVER_TIME_BUDGET
+        # 2-opt/or-opt assumem matriz simétrica; as de estrada quase são
+        tour = optimize_tour((distances + distances.T) / 2, time_budget)
+    else:
+        tour = np.arange(len(lons), dtype=np.intp)
+
+    distance_m = tour_length(distances, tour, closed=False)
+    duration_s = tour_length(durations, tour, closed=False)
+
+    path = [[lons[node], lats[node]] for node in tour]
+    delivery_ordered = [
+        {
+            "order_number": str(coordinates[node - 1]['order_number']),
+            "lat": lats[node],
+            "long": lons[node]
+        }
+        for node in tour[1:]
+    ]
+    return straight_line_geojson(path, distance_m, duration_s), duration_s, distance_m, delivery_ordered
@@ -1,12 +1,147 @@
+import codecs
+import csv
 import os
+from typing import Dict, Iterator, Optional
+
 import pandas as pd
+from openpyxl import load_workbook
+
+# Colunas do ERP lidas sempre como texto (CPF, CEP e pedido não podem virar float)
+STRING_COLUMNS = ('doctocliente', 'cepentrega', 'numerosaida')
+
+CSV_DELIMITERS = ';,\t|'
+SNIFF_SAMPLE_BYTES = 64 * 1024
+
+
+def _sniff_encoding(file_path: str) -> str:
+    """
+    UTF-8 só quando o arquivo inteiro é UTF-8 válido e tem acentos; caso contrário
+    ISO-8859-1, que aceita qualquer byte (padrão histórico das exportações do ERP).
+    O arquivo todo é verificado: um byte Latin-1 depois do início quebraria a leitura.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    has_non_ascii = False
+    with open(file_path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b''):
+            try:
+                decoder.decode(block)
+            except UnicodeDecodeError:
+                return 'ISO-8859-1'
+            has_non_ascii = has_non_ascii or not block.isascii()
+    try:
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return 'ISO-8859-1'
+    return 'utf-8-sig' if has_non_ascii else 'ISO-8859-1'
+
+
+def _sniff_delimiter(text: str) -> str:
+    """
+    O cabeçalho decide (nomes de coluna não contêm separador); o Sniffer só entra
+    quando o cabeçalho não tem nenhum separador conhecido.
+    """
+    lines = text.splitlines()[:20]
+    header = lines[0] if lines else ''
+    delimiter = max(CSV_DELIMITERS, key=header.count)
+    if header.count(delimiter):
+        return delimiter
+    try:
+        return csv.Sniffer().sniff('\n'.join(lines), delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        return ';'
+
+
+def csv_read_options(file_path: str) -> Dict:
+    """
+    Detecta a codificação (arquivo inteiro) e o separador (amostra do início) e devolve as
+    opções de pd.read_csv para o parser C (bem mais rápido que sep=None/engine='python').
+    """
+    with open(file_path, 'rb') as handle:
+        sample = handle.read(SNIFF_SAMPLE_BYTES)
+
+    encoding = _sniff_encoding(file_path)
+    return {
+        'sep': _sniff_delimiter(sample.decode(encoding, errors='ignore')),
+        'encoding': encoding,
+        'engine': 'c',
+        'dtype': {column: str for column in STRING_COLUMNS},
+    }
+
 
 def read_file_to_dataframe(file_path: str) -> pd.DataFrame:
     _, ext = os.path.splitext(file_path)
 
     if ext.lower() == '.csv':
-        return pd.read_csv(file_path, encoding='ISO-8859-1', sep=None, engine='python', delimiter=None)
+        return pd.read_csv(file_path, **csv_read_options(file_path))
     elif ext.lower() in ['.xls', '.xlsx']:
-        return pd.read_excel(file_path)
+        return pd.read_excel(file_path, dtype={column: str for column in STRING_COLUMNS})
+    else:
+        raise ValueError("Formato de arquivo não suportado. Use .csv ou .xlsx")
+
+
+def count_file_rows(file_path: str) -> Optional[int]:
+    """
+    Estima o número de linhas de dados (sem o cabeçalho) sem carregar a planilha.
+    Retorna None quando não é possível estimar de forma barata (ex: .xls).
+    """
+    _, ext = os.path.splitext(file_path)
+
+    if ext.lower() == '.csv':
+        lines = 0
+        with open(file_path, 'rb') as handle:
+            for block in iter(lambda: handle.read(1024 * 1024), b''):
+                lines += block.count(b'\n')
+        return max(lines - 1, 0)
+    elif ext.lower() == '.xlsx':
+        workbook = load_workbook(file_path, read_only=True)
+        try:
+            max_row = workbook.active.max_row
+        finally:
+            workbook.close()
+        return max(max_row - 1, 0) if max_row else None
+    return None
+
+
+def _iter_xlsx_chunks(file_path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Lê um .xlsx em modo read_only, linha a linha, montando DataFrames de até chunk_size linhas."""
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = ['' if value is None else str(value) for value in header]
+
+        buffer = []
+        for values in rows:
+            if all(value is None for value in values):
+                continue
+            buffer.append(values[:len(columns)])
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame(buffer, columns=columns)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=columns)
+    finally:
+        workbook.close()
+
+
+def iter_file_chunks(file_path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Lê a planilha em blocos de até chunk_size linhas, sem manter o arquivo inteiro em memória.
+    - .csv: pandas com chunksize
+    - .xlsx: openpyxl em modo read_only
+    - .xls: não há leitura incremental; o arquivo é lido inteiro e fatiado
+    """
+    _, ext = os.path.splitext(file_path)
+
+    if ext.lower() == '.csv':
+        yield from pd.read_csv(file_path, chunksize=chunk_size, **csv_read_options(file_path))
+    elif ext.lower() == '.xlsx':
+        yield from _iter_xlsx_chunks(file_path, chunk_size)
+    elif ext.lower() == '.xls':
+        dataframe = pd.read_excel(file_path, dtype={column: str for column in STRING_COLUMNS})
+        for start in range(0, len(dataframe), chunk_size):
+            yield dataframe.iloc[start:start + chunk_size]
     else:
-        raise ValueError("Formato de arquivo não suportado. Use .csv ou .xlsx")
\ No newline at end of file
+        raise ValueError("Formato de arquivo não suportado. Use .csv ou .xlsx")
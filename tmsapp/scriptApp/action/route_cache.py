@@ -0,0 +1,125 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Dict, Optional
+
+import redis
+from django.conf import settings
+
+from .get_geojson_by_ors import departure_coord
+
+# Resultado: route_cache:<método>:<sha1>; uso recente: sorted set {chave: último acesso}
+ENTRY_KEY = "route_cache:{method}:{digest}"
+LRU_KEY = "route_cache:lru"
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def route_cache_key(method: str, profile: str, coordinates, departure_location, ordered: bool) -> str:
+    """
+    Chave do resultado: ponto de partida + paradas + perfil do veículo.
+    optimize não depende da ordem recebida (paradas ordenadas); directions depende.
+    """
+    stops = [(round(float(c['long']), 6), round(float(c['lat']), 6), str(c['order_number'])) for c in coordinates]
+    if not ordered:
+        stops.sort()
+    start = [round(value, 6) for value in departure_coord(departure_location, coordinates)]
+    payload = json.dumps([profile, start, stops], separators=(',', ':'))
+    return ENTRY_KEY.format(method=method, digest=hashlib.sha1(payload.encode()).hexdigest())
+
+
+class CachedRoutingProvider:
+    """
+    Cache no Redis de optimize/directions de outro provedor: editar a rota e desfazer
+    (tirar e devolver uma entrega, por exemplo) volta na hora, sem VROOM/ORS.
+
+    Cada entrada vale ROUTE_CACHE_TTL segundos, renovados a cada acerto; acima de
+    ROUTE_CACHE_MAX_ENTRIES as menos usadas recentemente são removidas (LRU).
+    Falha no Redis não impede a roteirização: a chamada vai direto ao provedor.
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.name = inner.name
+        self.profile = inner.profile
+
+    def optimize(self, coordinates, departure_location=None):
+        key = route_cache_key('optimize', self.profile, coordinates, departure_location, ordered=False)
+        return self._cached(key, self.inner.optimize, coordinates, departure_location)
+
+    def directions(self, coordinates, departure_location=None):
+        key = route_cache_key('directions', self.profile, coordinates, departure_location, ordered=True)
+        return self._cached(key, self.inner.directions, coordinates, departure_location)
+
+    def matrix(self, locations):
+        return self.inner.matrix(locations)
+
+    def solve_vrp(self, jobs, vehicles):
+        return self.inner.solve_vrp(jobs, vehicles)
+
+    def _cached(self, key: str, compute, coordinates, departure_location):
+        cached = self._get(key)
+        if cached is not None:
+            _count('hits')
+            return cached
+        _count('misses')
+        result = compute(coordinates, departure_location)
+        self._set(key, result)
+        return result
+
+    def _get(self, key: str) -> Optional[tuple]:
+        from djangonotify.progress import get_redis
+
+        try:
+            raw = get_redis().get(key)
+            if raw is None:
+                return None
+            pipeline = get_redis().pipeline()
+            pipeline.expire(key, settings.ROUTE_CACHE_TTL)
+            pipeline.zadd(LRU_KEY, {key: time.time()})
+            pipeline.execute()
+        except redis.RedisError as e:
+            _count('errors')
+            logging.warning(f"[RouteCache] Falha ao ler {key}: {e}")
+            return None
+        return tuple(json.loads(zlib.decompress(raw)))
+
+    def _set(self, key: str, result) -> None:
+        from djangonotify.progress import get_redis
+
+        now = time.time()
+        raw = zlib.compress(json.dumps(list(result), separators=(',', ':'), default=str).encode())
+        try:
+            pipeline = get_redis().pipeline()
+            pipeline.set(key, raw, ex=settings.ROUTE_CACHE_TTL)
+            pipeline.zadd(LRU_KEY, {key: now})
+            # entradas que já expiraram pelo TTL saem do índice
+            pipeline.zremrangebyscore(LRU_KEY, '-inf', now - settings.ROUTE_CACHE_TTL)
+            pipeline.zcard(LRU_KEY)
+            size = pipeline.execute()[-1]
+
+            excess = size - settings.ROUTE_CACHE_MAX_ENTRIES
+            if excess > 0:
+                evicted = [member for member, _ in get_redis().zpopmin(LRU_KEY, excess)]
+                if evicted:
+                    get_redis().delete(*evicted)
+                    with _stats_lock:
+                        _stats['evicted'] += len(evicted)
+        except redis.RedisError as e:
+            _count('errors')
+            logging.warning(f"[RouteCache] Falha ao gravar {key}: {e}")
+
+
+def route_cache_stats() -> Dict[str, int]:
+    with _stats_lock:
+        return dict(_stats)
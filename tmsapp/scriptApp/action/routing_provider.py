@@ -0,0 +1,213 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from django.conf import settings
+
+from .distance_matrix import haversine_matrix
+from .get_geojson_by_ors import departure_coord, get_geojson_by_ors, get_geojson_by_sequence
+from .http_client import get_http_client
+from .local_route_solver import solve_route_locally
+from .route_cache import CachedRoutingProvider
+from .solve_vrp_by_vroom import solve_vrp_by_vroom
+
+RouteResult = Tuple[Dict, float, float, List[Dict]]   # (geojson, duração s, distância m, entregas ordenadas)
+
+
+class RoutingProvider:
+    """
+    Interface dos serviços de roteirização usados pelo planner, pelo recálculo de rotas
+    (calc_routes) e pela matriz de distâncias.
+
+    - optimize: ordena as entregas e gera o traçado (contrato do get_geojson_by_ors)
+    - directions: só o traçado, mantendo a ordem recebida
+    - matrix: distâncias (m) e durações (s) entre [lon, lat]
+    - solve_vrp: alocação + sequência de vários veículos (contrato do solve_vrp_by_vroom)
+    """
+    name = ''
+    profile = 'driving-car'
+
+    def optimize(self, coordinates: List[Dict[str, Any]], departure_location: Optional[Any] = None) -> RouteResult:
+        raise NotImplementedError
+
+    def directions(self, coordinates: List[Dict[str, Any]], departure_location: Optional[Any] = None) -> RouteResult:
+        raise NotImplementedError
+
+    def matrix(self, locations: List[List[float]]) -> Dict[str, List[List[float]]]:
+        raise NotImplementedError
+
+    def solve_vrp(self, jobs: List[Dict[str, Any]], vehicles: List[Dict[str, Any]]) -> Dict[str, Any]:
+        raise NotImplementedError(f"Provedor '{self.name}' não resolve VRP")
+
+
+class VroomOrsProvider(RoutingProvider):
+    """VROOM + ORS (ROUTING_VROOM_URL / ROUTING_ORS_URL)."""
+    name = 'vroom'
+
+    def optimize(self, coordinates, departure_location=None):
+        return get_geojson_by_ors(coordinates, departure_location)
+
+    def directions(self, coordinates, departure_location=None):
+        return get_geojson_by_sequence(coordinates, departure_location)
+
+    def matrix(self, locations):
+        try:
+            response = get_http_client('ors').post(
+                f"{settings.ROUTING_ORS_URL}/v2/matrix/driving-car",
+                headers={"Content-Type": "application/json"},
+                json={"locations": locations, "metrics": ["distance", "duration"]},
+                timeout=(5, 60)
+            )
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise Exception(f"Erro na requisição ORS matrix: {str(e)}")
+
+        data = response.json()
+        return {'distances': data['distances'], 'durations': data['durations']}
+
+    def solve_vrp(self, jobs, vehicles):
+        return solve_vrp_by_vroom(jobs, vehicles)
+
+
+class LocalProvider(RoutingProvider):
+    """Solver local, sem rede: haversine + vizinho mais próximo + 2-opt/or-opt, traçado em linha reta."""
+    name = 'local'
+
+    def optimize(self, coordinates, departure_location=None):
+        return solve_route_locally(coordinates, departure_location)
+
+    def directions(self, coordinates, departure_location=None):
+        return solve_route_locally(coordinates, departure_location, optimize=False)
+
+    def matrix(self, locations):
+        distances = haversine_matrix([lon for lon, _ in locations], [lat for _, lat in locations])
+        distances = distances * settings.ROUTE_LOCAL_DETOUR_FACTOR
+        durations = distances / (settings.ROUTE_LOCAL_SPEED_KMH / 3.6)
+        return {'distances': distances.tolist(), 'durations': durations.tolist()}
+
+
+class ReplayProvider(RoutingProvider):
+    """
+    Grava (record) ou reproduz (replay) do disco as respostas de outro provedor, para
+    testes de carga do planner e da tela de roteirização sem chamar os servidores reais.
+
+    Cada chamada vira <directory>/<método>/<sha1 dos argumentos>.json com o resultado e o
+    tempo que a chamada original levou. No replay, com ROUTING_REPLAY_LATENCY=True esse
+    tempo é reproduzido; chamadas não gravadas vão para `miss_provider` (ou levantam
+    KeyError se ele for None).
+    """
+
+    def __init__(self, directory, upstream: Optional[RoutingProvider] = None, record: bool = False,
+                 miss_provider: Optional[RoutingProvider] = None, simulate_latency: bool = False):
+        self.directory = Path(directory)
+        self.upstream = upstream
+        self.record = record
+        self.miss_provider = miss_provider
+        self.simulate_latency = simulate_latency
+        self.name = 'record' if record else 'replay'
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'recorded': 0}
+
+    def optimize(self, coordinates, departure_location=None):
+        return tuple(self._call('optimize', self._route_key(coordinates, departure_location),
+                                coordinates, departure_location))
+
+    def directions(self, coordinates, departure_location=None):
+        return tuple(self._call('directions', self._route_key(coordinates, departure_location),
+                                coordinates, departure_location))
+
+    def matrix(self, locations):
+        return self._call('matrix', [[float(lon), float(lat)] for lon, lat in locations], locations)
+
+    def solve_vrp(self, jobs, vehicles):
+        result = self._call('solve_vrp', {'jobs': jobs, 'vehicles': vehicles}, jobs, vehicles)
+        # JSON só tem chaves string: volta os ids dos veículos para int
+        return {'routes': {int(k): v for k, v in result['routes'].items()}, 'unassigned': result['unassigned']}
+
+    @staticmethod
+    def _route_key(coordinates, departure_location):
+        return {
+            'start': departure_coord(departure_location, coordinates) if coordinates else None,
+            'stops': [[float(c['long']), float(c['lat']), str(c['order_number'])] for c in coordinates],
+        }
+
+    def _path(self, method: str, key_data) -> Path:
+        digest = hashlib.sha1(json.dumps(key_data, sort_keys=True, default=str).encode()).hexdigest()
+        return self.directory / method / f'{digest}.json'
+
+    def _call(self, method: str, key_data, *args):
+        path = self._path(method, key_data)
+
+        if self.record:
+            started = time.monotonic()
+            result = getattr(self.upstream, method)(*args)
+            self._write(path, {'elapsed': time.monotonic() - started, 'result': result})
+            return result
+
+        try:
+            with open(path, encoding='utf-8') as fh:
+                recorded = json.load(fh)
+        except FileNotFoundError:
+            with self._lock:
+                self.stats['misses'] += 1
+            if self.miss_provider is None:
+                raise KeyError(f"Resposta não gravada para {method} ({path.name})")
+            return getattr(self.miss_provider, method)(*args)
+
+        with self._lock:
+            self.stats['hits'] += 1
+        if self.simulate_latency:
+            time.sleep(recorded.get('elapsed', 0))
+        return recorded['result']
+
+    def _write(self, path: Path, payload: dict) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump(payload, fh, default=str)
+        os.replace(tmp, path)
+        with self._lock:
+            self.stats['recorded'] += 1
+
+
+_provider: Optional[RoutingProvider] = None
+_provider_lock = threading.Lock()
+
+
+def _build_provider(name: str) -> RoutingProvider:
+    if name == 'local':
+        return LocalProvider()
+    if name in ('record', 'replay'):
+        return ReplayProvider(
+            settings.ROUTING_REPLAY_DIR,
+            upstream=VroomOrsProvider(),
+            record=name == 'record',
+            miss_provider=LocalProvider() if settings.ROUTING_REPLAY_MISS == 'local' else None,
+            simulate_latency=settings.ROUTING_REPLAY_LATENCY,
+        )
+    if name != 'vroom':
+        logging.warning(f"[Routing] ROUTING_PROVIDER '{name}' desconhecido, usando 'vroom'")
+    if settings.ROUTE_CACHE_ENABLED:
+        return CachedRoutingProvider(VroomOrsProvider())
+    return VroomOrsProvider()
+
+
+def get_routing_provider() -> RoutingProvider:
+    """Provedor configurado em ROUTING_PROVIDER ('vroom', 'local', 'record' ou 'replay'), um por processo."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = _build_provider(settings.ROUTING_PROVIDER)
+    return _provider
+
+
+def get_fallback_provider() -> RoutingProvider:
+    """Provedor usado quando o configurado falha (solver local)."""
+    return LocalProvider()
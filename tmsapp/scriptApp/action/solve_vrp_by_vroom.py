@@ -0,0 +1,74 @@
+import json
+import requests
+from typing import Any, Dict, List
+
+from django.conf import settings
+
+from .http_client import get_http_client
+
+
+def solve_vrp_by_vroom(jobs: List[Dict[str, Any]], vehicles: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Resolve num único pedido ao VROOM a alocação e o sequenciamento de várias entregas
+    em vários veículos, respeitando capacidade (peso e volume) e, opcionalmente, skills.
+
+    Args:
+        jobs: [{'id': int, 'lat': x, 'long': y, 'amount': [gramas, cm³], 'skills': [..] (opcional)}, ...]
+        vehicles: [{'id': int, 'start': [lon, lat] ou None, 'capacity': [gramas, cm³],
+                    'skills': [..] (opcional)}, ...]
+
+    Returns:
+        {'routes': {vehicle_id: [job_id, ...] na ordem de visita}, 'unassigned': [job_id, ...]}
+
+    Raises:
+        Exception: Se houver erro na chamada VROOM
+        KeyError: Se a resposta VROOM não contiver 'routes'
+    """
+    if not jobs or not vehicles:
+        raise ValueError("VRP precisa de ao menos uma entrega e um veículo")
+
+    vroom_jobs = []
+    for job in jobs:
+        vroom_job = {
+            "id": job['id'],
+            "location": [float(job['long']), float(job['lat'])],
+            "amount": [int(value) for value in job['amount']],
+        }
+        if job.get('skills'):
+            vroom_job["skills"] = list(job['skills'])
+        vroom_jobs.append(vroom_job)
+
+    vroom_vehicles = []
+    for vehicle in vehicles:
+        vroom_vehicle = {
+            "id": vehicle['id'],
+            "capacity": [int(value) for value in vehicle['capacity']],
+            "profile": "driving-car"
+        }
+        if vehicle.get('start'):
+            vroom_vehicle["start"] = vehicle['start']
+            vroom_vehicle["end"] = vehicle['start']
+        if vehicle.get('skills'):
+            vroom_vehicle["skills"] = list(vehicle['skills'])
+        vroom_vehicles.append(vroom_vehicle)
+
+    try:
+        vroom_response = get_http_client('vroom').post(
+            settings.ROUTING_VROOM_URL,
+            json={"jobs": vroom_jobs, "vehicles": vroom_vehicles},
+            timeout=(5, settings.ROUTE_VRP_TIMEOUT)
+        )
+        vroom_response.raise_for_status()
+    except requests.RequestException as e:
+        raise Exception(f"Erro na requisição VROOM: {str(e)}")
+
+    vroom_data = vroom_response.json()
+    if "routes" not in vroom_data:
+        raise KeyError(f"Resposta VROOM inválida: 'routes' ausente\n{json.dumps(vroom_data, indent=2)}")
+
+    routes = {
+        route["vehicle"]: [step["id"] for step in route["steps"] if step["type"] == "job"]
+        for route in vroom_data["routes"]
+    }
+    unassigned = [item["id"] for item in vroom_data.get("unassigned", [])]
+    return {'routes': routes, 'unassigned': unassigned}
@@ -0,0 +1,29 @@
+from django.db import models
+
+
+class CepIndex(models.Model):
+    """
+    Base local de CEPs (carregada de um dump CSV via `manage.py load_cep_index`).
+    Substitui a consulta ao ViaCEP e fornece um centróide aproximado do CEP.
+    """
+    cep = models.CharField('CEP', max_length=8, primary_key=True)
+    street = models.CharField('Logradouro', max_length=255, blank=True, default='')
+    neighborhood = models.CharField('Bairro', max_length=100, blank=True, default='')
+    city = models.CharField('Cidade', max_length=100, blank=True, default='')
+    state = models.CharField('UF', max_length=2, blank=True, default='')
+
+    latitude = models.DecimalField('Latitude', max_digits=9, decimal_places=6, blank=True, null=True)
+    longitude = models.DecimalField('Longitude', max_digits=9, decimal_places=6, blank=True, null=True)
+
+    updated_at = models.DateTimeField('Data de Atualização', auto_now=True)
+
+    class Meta:
+        verbose_name = 'CEP'
+        verbose_name_plural = 'Base de CEPs'
+
+    def __str__(self) -> str:
+        return f"{self.cep} - {self.street}"
+
+    @property
+    def has_centroid(self) -> bool:
+        return self.latitude is not None and self.longitude is not None
@@ -6,7 +6,7 @@ from geopy.exc import GeocoderTimedOut
 from simple_history.models import HistoricalRecords
 from auditlog.registry import auditlog
 from django.contrib.auth.models import User
-from tmsapp.action import geocode_endereco
+from tmsapp.deliveryApp.models import GeocodedModel
 
 class LocationType(models.TextChoices):
     """Enumeração dos tipos de local de empresa."""
@@ -18,7 +18,7 @@ class LocationType(models.TextChoices):
     OTHER = 'other', 'Outro'
 
 
-class CompanyLocation(models.Model):
+class CompanyLocation(GeocodedModel):
     """
     Representa um endereço físico da empresa (armazém, loja, centro de distribuição, 
     pontos de saída, etc.). Gerencia geocoding automático e garante apenas um local principal.
@@ -85,6 +85,8 @@ class CompanyLocation(models.Model):
     )
     history = HistoricalRecords()
 
+    GEOCODE_FIELDS = ('address', 'number', 'postal_code', 'neighborhood', 'city', 'state')
+
     class Meta:
         verbose_name = 'Local da Empresa'
         verbose_name_plural = 'Locais da Empresa'
@@ -108,6 +110,10 @@ class CompanyLocation(models.Model):
             if existing_principal.exists():
                 raise ValidationError('Já existe um local principal ativo definido.')
    
+    @classmethod
+    def geocode_candidates(cls):
+        return cls.objects.filter(is_active=True)
+
     @property
     def get_type(self):
         return self.type.capitalize()
@@ -127,38 +133,3 @@ class CompanyLocation(models.Model):
             self.country
         ]
         return ', '.join(filter(None, parts))
-    
-    def save(self, *args, **kwargs):
-        # decidir se deve geocodificar
-        should_geocode = False
-
-        # 1) se não havia coords antes, sempre geocodifica
-        if not (self.latitude and self.longitude):
-            should_geocode = True
-        else:
-            # 2) caso exista no banco, buscar antigo e comparar campos de endereço
-            if self.pk:
-                try:
-                    old = CompanyLocation.objects.get(pk=self.pk)
-                except CompanyLocation.DoesNotExist:
-                    should_geocode = True
-                else:
-                    # se qualquer campo de endereço mudou, refaz geocodificação
-                    for field in ('address','number','postal_code','neighborhood','city','state'):
-                        if getattr(old, field) != getattr(self, field):
-                            should_geocode = True
-                            break
-
-        if should_geocode:
-            lat, lon = geocode_endereco(
-                self.address,
-                self.number,
-                self.postal_code,
-                self.neighborhood,
-                self.city,
-                self.state
-            )
-            if lat is not None and lon is not None:
-                self.latitude, self.longitude = lat, lon
-
-        super().save(*args, **kwargs)
\ No newline at end of file
@@ -0,0 +1,32 @@
+from django.db import models
+from django.utils import timezone
+
+
+class DistanceMatrixEntry(models.Model):
+    """
+    Distância e duração por estrada entre dois pontos geocodificados (origem -> destino).
+    Os pontos são guardados pela célula espacial (lon/lat arredondados, ver
+    distance_matrix.bucket_key), então endereços vizinhos reaproveitam a mesma entrada.
+    Alimentada pelas chamadas de matriz do ORS; usada pelo planner e pelo solver local.
+    """
+    origin = models.CharField('Origem', max_length=32)
+    destination = models.CharField('Destino', max_length=32)
+
+    distance_m = models.FloatField('Distância (m)')
+    duration_s = models.FloatField('Duração (s)')
+
+    source = models.CharField('Provedor', max_length=20, default='vroom')
+    updated_at = models.DateTimeField('Atualizado em', default=timezone.now, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['origin', 'destination'],
+                name='unique_distance_matrix_pair'
+            )
+        ]
+        verbose_name = 'Matriz de Distâncias'
+        verbose_name_plural = 'Matriz de Distâncias'
+
+    def __str__(self) -> str:
+        return f"{self.origin} -> {self.destination}"
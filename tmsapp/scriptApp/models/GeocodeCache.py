@@ -0,0 +1,45 @@
+from django.db import models
+from django.utils import timezone
+
+
+class GeocodeProvider(models.TextChoices):
+    """Origem das coordenadas armazenadas no cache."""
+    GOOGLE = 'google', 'Google Geocoding'
+
+
+class GeocodeCache(models.Model):
+    """
+    Cache persistente de geocodificação, indexado pelo endereço normalizado.
+    Consultado antes de qualquer chamada HTTP; entradas sem coordenadas
+    (endereço não encontrado) também são guardadas, com validade menor.
+    """
+    key = models.CharField('Chave', max_length=64, unique=True)
+    address = models.CharField('Endereço Normalizado', max_length=500)
+
+    latitude = models.DecimalField('Latitude', max_digits=9, decimal_places=6, blank=True, null=True)
+    longitude = models.DecimalField('Longitude', max_digits=9, decimal_places=6, blank=True, null=True)
+
+    provider = models.CharField(
+        'Provedor', max_length=20,
+        choices=GeocodeProvider.choices,
+        default=GeocodeProvider.GOOGLE
+    )
+    tier = models.PositiveSmallIntegerField(
+        'Tentativa', blank=True, null=True,
+        help_text='Tentativa de geocode_endereco que resolveu o endereço (1, 2 ou 3)'
+    )
+
+    hit_count = models.PositiveIntegerField('Acertos', default=0)
+    last_hit_at = models.DateTimeField('Último Acerto', blank=True, null=True)
+    resolved_at = models.DateTimeField('Resolvido em', default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = 'Cache de Geocodificação'
+        verbose_name_plural = 'Cache de Geocodificação'
+
+    def __str__(self) -> str:
+        return self.address
+
+    @property
+    def is_found(self) -> bool:
+        return self.latitude is not None and self.longitude is not None
@@ -1,3 +1,4 @@
+import json
 import re
 from django.db import models
 from django.core.exceptions import ValidationError
@@ -78,6 +79,44 @@ class RouteArea(models.Model):
         if self.hex_color and not re.match(r'^#[0-9A-Fa-f]{6}$', self.hex_color):
             raise ValidationError({'hex_color': 'Formato de cor inválido. Use #RRGGBB.'})
 
+    def save(self, *args, **kwargs):
+        from tmsapp.scriptApp.action.area_geometry_cache import invalidate_area_geometry
+
+        super().save(*args, **kwargs)
+        invalidate_area_geometry(self.pk)
+
+    def delete(self, *args, **kwargs):
+        from tmsapp.scriptApp.action.area_geometry_cache import invalidate_area_geometry
+
+        area_id = self.pk
+        result = super().delete(*args, **kwargs)
+        invalidate_area_geometry(area_id)
+        return result
+
+    @property
+    def geometry(self):
+        """Polígono interpretado e preparado (cache por id + updated_at), ou None."""
+        from tmsapp.scriptApp.action.area_geometry_cache import get_area_geometry
+
+        return get_area_geometry(self)
+
+    @property
+    def geojson_data(self) -> dict | None:
+        """
+        GeoJSON já desserializado (do cache de geometrias). O que o shapely não aceita como
+        polígono (FeatureCollection, Feature sem geometria...) continua sendo exibido: nesse
+        caso vem do JSON bruto.
+        """
+        from tmsapp.scriptApp.action.area_geometry_cache import get_area_geometry
+
+        entry = get_area_geometry(self)
+        if entry is not None:
+            return entry.geojson
+        try:
+            return json.loads(self.geojson) if isinstance(self.geojson, str) and self.geojson else None
+        except json.JSONDecodeError:
+            return None
+
     @property
     def cep_ranges(self) -> list[tuple]:
         """Retorna faixas de CEP emparelhadas."""
@@ -1,4 +1,7 @@
 from .CompanyLocation import *
 from .Route import *
 from .RouteComposition import *
-from .RouteArea import *
\ No newline at end of file
+from .RouteArea import *
+from .GeocodeCache import *
+from .CepIndex import *
+from .DistanceMatrix import *
\ No newline at end of file
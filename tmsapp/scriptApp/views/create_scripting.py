@@ -25,6 +25,7 @@ def create_scripting(request):
             end_date   = datetime.strptime(end_str,   "%d/%m/%Y").date()
  
             vehicles_areas = request.POST.get("vehicles_areas", "")
+            allocation_mode = request.POST.get("allocation_mode") or settings.ROUTE_ALLOCATION_MODE
 
             # 2) formata como ISO string (YYYY-MM-DD)
             start = start_date.strftime("%Y-%m-%d")
@@ -32,7 +33,9 @@ def create_scripting(request):
 
             if sp_router == "route_perso":
                 tkrecord = TaskRecord.objects.create(user=request.user, name='Criando roterização', status='started')
-                create_script_perso_task.delay(request.user.id, tkrecord.id, vehicles_areas, start, end)
+                create_script_perso_task.delay(
+                    request.user.id, tkrecord.id, vehicles_areas, start, end, allocation_mode
+                )
                 messages.info(request, f"Processo roterização iniciado - {start} - {end}")
             else:
                 messages.error(request, f"Roterização por cidade indisponível para o momento.")
@@ -54,5 +57,6 @@ def create_scripting_view(request):
     context = {
         'vehicles': Vehicle.objects.filter(is_active=True),
         'areas': RouteArea.objects.filter(is_active=True),
+        'allocation_mode': settings.ROUTE_ALLOCATION_MODE,
     }
     return render(request, 'pages/route.html', context)
\ No newline at end of file
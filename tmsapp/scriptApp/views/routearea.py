@@ -44,14 +44,14 @@ def route_view(request, route_id):
 
         outras = []
         for r in outras_rotas:
-            try:
-                outras.append({
-                    "geojson": json.loads(r.geojson),
-                    "name": r.name,
-                    "id": r.id
-                })
-            except json.JSONDecodeError:
-                pass
+            geojson_data = r.geojson_data
+            if geojson_data is None:
+                continue
+            outras.append({
+                "geojson": geojson_data,
+                "name": r.name,
+                "id": r.id
+            })
 
         return render(request, 'pages/routes/view_routearea.html', {
             "rota": rota,
@@ -154,18 +154,19 @@ def list_routearea(request):
     # prepara lista serializável
     areas = []
     for a in areas_qs:
-        # tenta carregar geojson se existir
-        geojson_data = None
-        if a.geojson:
-            try:
-                geojson_data = json.loads(a.geojson)
-            except (TypeError, json.JSONDecodeError):
-                geojson_data = None
+        # geojson já serializado vem do cache de geometrias; o que não é polígono válido
+        # para o planner é exibido a partir do JSON bruto
+        geometry = a.geometry
+        if geometry is not None:
+            geojson_str = geometry.geojson_str
+        else:
+            geojson_data = a.geojson_data
+            geojson_str = json.dumps(geojson_data) if geojson_data is not None else None
 
         areas.append({
             'id': a.id,
             'name': a.name,
-            'geojson': json.dumps(geojson_data) if geojson_data is not None else None,
+            'geojson': geojson_str,
             'color': a.hex_color or '#0074D9',
             'area': round(a.areatotal or 0, 2),
             'km': round(a.kmtotal or 0, 2),
@@ -1,2 +1,5 @@
 from .create_script_perso_task import *
-from .import_deliveries_from_sheet import *
\ No newline at end of file
+from .import_deliveries_from_sheet import *
+from .import_deliveries_fanout import *
+from .geocode_maintenance import *
+from .distance_matrix_maintenance import *
\ No newline at end of file
@@ -0,0 +1,56 @@
+import numpy as np
+
+# Modos de alocação de entregas nos veículos aceitos pelo RoutePlanner
+ALLOCATION_GREEDY = 'greedy'   # veículo a veículo, entregas na ordem de proximidade (comportamento original)
+ALLOCATION_FFD = 'ffd'         # first-fit decreasing
+ALLOCATION_BFD = 'bfd'         # best-fit decreasing
+ALLOCATION_VRP = 'vrp'         # um único problema VROOM: alocação e sequência feitas pelo solver
+ALLOCATION_MODES = (ALLOCATION_GREEDY, ALLOCATION_FFD, ALLOCATION_BFD, ALLOCATION_VRP)
+
+
+def pack_deliveries(weights, volumes, distances, remaining_weights, remaining_volumes, mode: str = ALLOCATION_FFD):
+    """
+    Empacotamento bidimensional (peso x volume) de entregas em veículos.
+
+    Args:
+        weights, volumes: tamanho de cada entrega (inteiros: gramas, cm³)
+        distances: distância de cada entrega à área (desempate: mais próximas primeiro)
+        remaining_weights, remaining_volumes: capacidade livre de cada veículo, na ordem de preferência
+        mode: 'ffd' (primeiro veículo em que cabe) ou 'bfd' (veículo que fica mais cheio)
+
+    Returns:
+        Array com o índice do veículo de cada entrega (-1 = não coube em nenhum)
+    """
+    weights = np.asarray(weights, dtype=np.int64)
+    volumes = np.asarray(volumes, dtype=np.int64)
+    free_weight = np.array(remaining_weights, dtype=np.int64)
+    free_volume = np.array(remaining_volumes, dtype=np.int64)
+    assignment = np.full(len(weights), -1, dtype=np.intp)
+    if not len(weights) or not len(free_weight):
+        return assignment
+
+    # Tamanho relativo à maior capacidade livre: a dimensão dominante decide a ordem
+    scale_weight = max(int(free_weight.max()), 1)
+    scale_volume = max(int(free_volume.max()), 1)
+    size = np.maximum(weights / scale_weight, volumes / scale_volume)
+    order = np.lexsort((np.asarray(distances, dtype=float), -size))
+
+    # Entregas que não cabem nem no maior espaço livre já ficam de fora
+    candidates = order[(weights[order] <= free_weight.max()) & (volumes[order] <= free_volume.max())]
+
+    for index in candidates:
+        weight, volume = weights[index], volumes[index]
+        fits = (free_weight >= weight) & (free_volume >= volume)
+        if not fits.any():
+            continue
+        if mode == ALLOCATION_BFD:
+            # menor folga relativa restante depois de colocar a entrega
+            slack = np.maximum((free_weight - weight) / scale_weight, (free_volume - volume) / scale_volume)
+            vehicle = int(np.argmin(np.where(fits, slack, np.inf)))
+        else:
+            vehicle = int(np.argmax(fits))
+        assignment[index] = vehicle
+        free_weight[vehicle] -= weight
+        free_volume[vehicle] -= volume
+
+    return assignment
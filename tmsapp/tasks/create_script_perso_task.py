@@ -1,23 +1,33 @@
 import json
+import logging
 import time as time_module
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from decimal import Decimal
-import math
+
+import numpy as np
 
 from celery import shared_task
-from django.db import transaction
+from django.db import connections, transaction
+from django.utils import timezone
 from django.contrib.auth import get_user_model
-from shapely.geometry import shape, Point
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
+from auditlog.diff import model_instance_diff
+from auditlog.models import LogEntry
 
 from tmsapp.models import (
     RouteArea, RouteComposition, RouteCompositionDelivery, RouteDelivery, Route,
-    Vehicle, CompanyLocation, DeliveryStatus, Delivery
+    Vehicle, CompanyLocation, DeliveryStatus, Delivery, GeocodeStatus
 )
 
 from tmsapp.fleetApp.models import LoadPlan
-from tmsapp.action import get_geojson_by_ors
+from tmsapp.action import assign_points_to_areas, get_area_geometries, get_matrix, get_routing_provider, get_fallback_provider
 from djangonotify.utils import send_progress, send_notification
+from djangonotify.progress import ProgressPublisher
 from djangonotify.models import TaskRecord
+from .vehicle_load import VehicleLoad, delivery_size
+from .bin_packing import ALLOCATION_GREEDY, ALLOCATION_MODES, ALLOCATION_VRP, pack_deliveries
+from .delivery_pool import DeliveryPool
 
 from django.urls import reverse
 from django.conf import settings
@@ -33,14 +43,17 @@ class RoutePlanner:
     - Garante apenas UM LoadPlan por veículo
     """
     
-    def __init__(self, task, user_id, tkrecord_id, vehicles_areas, start_date, end_date):
+    def __init__(self, task, user_id, tkrecord_id, vehicles_areas, start_date, end_date,
+                 allocation_mode=ALLOCATION_GREEDY):
         self.task = task
         self.task_id = task.request.id
         self.user_id = user_id
         self.tkrecord_id = tkrecord_id
+        self.progress = ProgressPublisher(self.task_id, user_id)
         self.vehicles_areas = self._parse_custom_config(vehicles_areas)
         self.start_date = start_date
         self.end_date = end_date
+        self.allocation_mode = allocation_mode if allocation_mode in ALLOCATION_MODES else ALLOCATION_GREEDY
         self.user = User.objects.get(pk=user_id)
         self.route_comp = None
         self.departure = CompanyLocation.objects.filter(is_principal=True, is_active=True).first()
@@ -48,10 +61,18 @@ class RoutePlanner:
         self.created_plans = []
         self.unassigned_global = []
         self.processed_deliveries = set()
+        self.pool = None  # DeliveryPool (configuração customizada)
+        self.area_index = {}  # {RouteArea: índice em area_distances}
+        self.area_distances = None  # matriz área x área (m, por estrada quando conhecida)
         
         # CORREÇÃO: Controle de veículos para evitar múltiplos LoadPlans
-        self.vehicle_loads = {}  # {vehicle_id: {'deliveries': [...], 'areas': set(), 'main_area': area}}
+        self.vehicle_loads = {}  # {vehicle_id: VehicleLoad}
+        self.delivery_sizes = {}  # {delivery_id: (gramas, cm³)}
+        self.delivery_distances = {}  # {delivery_id: distância até a área atribuída}
         self.vehicle_load_plans = {}  # {vehicle_id: LoadPlan} - para controle de unicidade
+        self.routes_to_optimize = []  # [(route, deliveries, vehicle)] - otimizadas juntas no finalize
+        self.vrp_departures = {}  # {vehicle_id: CompanyLocation} - rotas já sequenciadas pelo VRP
+        self.local_fallbacks = []  # veículos cuja rota saiu do solver local (VROOM/ORS indisponível)
 
     def _update_task_record(self):
         """Atualiza o registro TaskRecord com o ID da task"""
@@ -60,8 +81,8 @@ class RoutePlanner:
         tk.save(update_fields=['task_id'])
 
     def _send_progress(self, message, percent, status='progress'):
-        """Envia progresso da task para o usuário"""
-        send_progress(self.task_id, self.user_id, message, percent, status=status)
+        """Envia progresso da task para o usuário (agrupado pelo ProgressPublisher)"""
+        self.progress.publish(message, percent, status=status)
 
     def _notify(self, title, message, level):
         """Envia notificação para o usuário"""
@@ -76,74 +97,73 @@ class RoutePlanner:
                 self._notify("Erro", "Formato inválido de vehicles_areas.", "error")
         return vehicles_areas or {}
 
-    def _calculate_distance_to_departure(self, area):
-        """Calcula distância aproximada entre área e ponto de saída"""
-        if not self.departure or not area.geojson:
-            return float('inf')
-        
-        try:
-            area_geom = shape(json.loads(area.geojson))
-            area_center = area_geom.centroid
-            
-            # Cálculo de distância aproximada usando fórmula haversine
-            lat1, lon1 = float(self.departure.latitude), float(self.departure.longitude)
-            lat2, lon2 = area_center.y, area_center.x
-            
-            return self._haversine_distance(lat1, lon1, lat2, lon2)
-        except Exception:
-            return float('inf')
-
-    def _haversine_distance(self, lat1, lon1, lat2, lon2):
-        """Calcula distância haversine entre dois pontos"""
-        R = 6371  # Raio da Terra em km
-        dlat = math.radians(lat2 - lat1)
-        dlon = math.radians(lon2 - lon1)
-        
-        a = (math.sin(dlat/2)**2 + 
-             math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * 
-             math.sin(dlon/2)**2)
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-        
-        return R * c
-
-    def _get_vehicle_remaining_capacity(self, vehicle):
-        """Calcula capacidade restante do veículo"""
-        if vehicle.id not in self.vehicle_loads:
-            return {
-                'weight': vehicle.max_weight_kg or Decimal('0'),
-                'volume': vehicle.max_volume_m3 or Decimal('0')
-            }
-        
-        current_deliveries = self.vehicle_loads[vehicle.id]['deliveries']
-        used_weight = sum(d.total_weight_kg or Decimal('0') for d in current_deliveries)
-        used_volume = sum(d.total_volume_m3 or Decimal('0') for d in current_deliveries)
-        
-        return {
-            'weight': (vehicle.max_weight_kg or Decimal('0')) - used_weight,
-            'volume': (vehicle.max_volume_m3 or Decimal('0')) - used_volume
-        }
+    def _area_points(self, geometries):
+        """Centróides das áreas [lon, lat], precedidos do ponto de saída quando ele tem coordenadas"""
+        points = [list(geometry.centroid) for geometry in geometries]
+        has_departure = (self.departure is not None and
+                         self.departure.latitude is not None and self.departure.longitude is not None)
+        if has_departure:
+            points.insert(0, [float(self.departure.longitude), float(self.departure.latitude)])
+        return points, has_departure
+
+    def prefill_area_matrix(self):
+        """
+        Completa via ORS a matriz entre o ponto de saída e as áreas ativas. Chamado fora da
+        transação do planejamento: as chamadas HTTP não seguram a transação aberta e os pares
+        gravados ficam visíveis para as threads de otimização.
+        """
+        geometries = get_area_geometries(RouteArea.objects.filter(is_active=True)).values()
+        points, _ = self._area_points(geometries)
+        if len(points) > 1:
+            get_matrix(points, fill=True)
+
+    def _rank_areas(self, geometries):
+        """
+        Distâncias por estrada (matriz persistente, já completada em prefill_area_matrix) entre
+        o ponto de saída e os centróides das áreas: ordena as áreas e guarda a matriz área x área
+        usada para completar a carga dos veículos. Só lê os pares guardados; o que faltar é estimado.
+        """
+        points, has_departure = self._area_points(geometries)
+        distances, _ = get_matrix(points, fill=False)
+        if has_departure:
+            to_departure = distances[0, 1:]
+            distances = distances[1:, 1:]
+        else:
+            to_departure = np.full(len(geometries), np.inf)
+        return to_departure, distances
+
+    def _areas_by_proximity(self, origin, areas):
+        """Áreas ordenadas pela distância por estrada a partir da área de origem"""
+        i = self.area_index.get(origin)
+        if i is None:
+            return list(areas)
+        def distance(area):
+            j = self.area_index.get(area)
+            return self.area_distances[i, j] if j is not None else float('inf')
+        
+        return sorted(areas, key=distance)
+
+    def _vehicle_load(self, vehicle):
+        """Carga acumulada do veículo (criada vazia no primeiro acesso)"""
+        load = self.vehicle_loads.get(vehicle.id)
+        if load is None:
+            load = self.vehicle_loads[vehicle.id] = VehicleLoad.for_vehicle(vehicle)
+        return load
+
+    def _delivery_size(self, delivery):
+        """(gramas, cm³) da entrega, convertidos uma única vez"""
+        size = self.delivery_sizes.get(delivery.id)
+        if size is None:
+            size = self.delivery_sizes[delivery.id] = delivery_size(delivery)
+        return size
 
     def _can_add_delivery_to_vehicle(self, vehicle, delivery):
         """Verifica se entrega pode ser adicionada ao veículo"""
-        remaining = self._get_vehicle_remaining_capacity(vehicle)
-        delivery_weight = delivery.total_weight_kg or Decimal('0')
-        delivery_volume = delivery.total_volume_m3 or Decimal('0')
-        
-        return (delivery_weight <= remaining['weight'] and 
-                delivery_volume <= remaining['volume'])
+        return self._vehicle_load(vehicle).fits(*self._delivery_size(delivery))
 
     def _add_delivery_to_vehicle(self, vehicle, delivery, area):
         """Adiciona entrega ao veículo"""
-        if vehicle.id not in self.vehicle_loads:
-            self.vehicle_loads[vehicle.id] = {
-                'deliveries': [],
-                'areas': set(),
-                'main_area': area,
-                'vehicle': vehicle
-            }
-        
-        self.vehicle_loads[vehicle.id]['deliveries'].append(delivery)
-        self.vehicle_loads[vehicle.id]['areas'].add(area)
+        self._vehicle_load(vehicle).add(delivery, area, *self._delivery_size(delivery))
         self.processed_deliveries.add(delivery.id)
 
     def load_deliveries(self):
@@ -161,7 +181,13 @@ class RoutePlanner:
                 status=DeliveryStatus.PENDING
             )
         
-        deliveries = list(qs.exclude(latitude__isnull=True, longitude__isnull=True))
+        deliveries, missing = [], []
+        for delivery in qs:
+            located = delivery.latitude is not None and delivery.longitude is not None
+            (deliveries if located else missing).append(delivery)
+        
+        if missing:
+            self._notify_missing_coordinates(missing)
         
         if not deliveries:
             self._notify("Roteirização", 
@@ -173,44 +199,64 @@ class RoutePlanner:
         self.deliveries = deliveries
         return True
 
+    def _notify_missing_coordinates(self, missing):
+        """Avisa quais entregas ficaram fora da roteirização por falta de coordenadas."""
+        pending = sum(1 for delivery in missing if delivery.geocode_status == GeocodeStatus.PENDING)
+        sample = ', '.join(delivery.code for delivery in missing[:10])
+        if len(missing) > 10:
+            sample += '...'
+        self._notify(
+            "Entregas sem coordenadas",
+            f"{len(missing)} entrega(s) ficaram fora da roteirização por não terem coordenadas "
+            f"({pending} aguardando geocodificação, {len(missing) - pending} com endereço não encontrado): "
+            f"{sample}",
+            "warning"
+        )
+
     def load_areas(self):
         """Carrega áreas ativas e ordena por proximidade do ponto de saída"""
         self._send_progress("Carregando áreas...", 10)
         
-        areas = []
+        areas, geometries = [], []
         for area in RouteArea.objects.filter(is_active=True):
             if not area.geojson:
                 continue
-            try:
-                poly = shape(json.loads(area.geojson))
-                distance = self._calculate_distance_to_departure(area)
-                areas.append((area, poly, distance))
-            except Exception:
+            # polígono interpretado/preparado vem do cache de geometrias (id + updated_at)
+            geometry = area.geometry
+            if geometry is None:
                 self._notify('Área inválida', 
                            f'Área {area.name} sem polígono válido.', 
                            'warning')
+                continue
+            areas.append(area)
+            geometries.append(geometry)
         
         if not areas:
             self._send_progress("Nenhuma área válida.", 100, status='failure')
             return False
         
-        # Ordena por proximidade do ponto de saída
-        areas.sort(key=lambda x: x[2])
-        self.areas = [(area, poly) for area, poly, _ in areas]
+        to_departure, self.area_distances = self._rank_areas(geometries)
+        self.area_index = {area: i for i, area in enumerate(areas)}
+        
+        # Ordena por proximidade do ponto de saída (estável: empate mantém a ordem do banco)
+        order = np.argsort(to_departure, kind='stable')
+        self.areas = [(areas[i], geometries[i].geometry) for i in order]
         return True
 
     def assign_deliveries(self):
         """Atribui entregas às áreas mais próximas"""
         self._send_progress("Atribuindo entregas às áreas...", 15)
         
-        for delivery in self.deliveries:
-            pt = Point(float(delivery.longitude), float(delivery.latitude))
-            nearest_area, nearest_poly = min(
-                self.areas, key=lambda ap: ap[1].distance(pt)
-            )
-            self.area_delivery_map[nearest_area].append(
-                (delivery, nearest_poly.distance(pt))
-            )
+        # Índice espacial (STRtree) em vez de medir a distância de cada entrega a cada área
+        area_indices, distances = assign_points_to_areas(
+            [poly for _, poly in self.areas],
+            [float(delivery.longitude) for delivery in self.deliveries],
+            [float(delivery.latitude) for delivery in self.deliveries],
+        )
+        for delivery, area_index, distance in zip(self.deliveries, area_indices, distances):
+            nearest_area = self.areas[area_index][0]
+            self.area_delivery_map[nearest_area].append((delivery, float(distance)))
+            self.delivery_distances[delivery.id] = float(distance)
         
         # Ordena entregas por proximidade dentro de cada área
         for area, tuples in self.area_delivery_map.items():
@@ -231,6 +277,8 @@ class RoutePlanner:
 
     def process_vehicle_config(self):
         """Processa configuração de veículos (customizada ou padrão)"""
+        if self.allocation_mode == ALLOCATION_VRP and self._process_vrp():
+            return
         if self.vehicles_areas:
             return self._process_custom_config()
         return self._process_default_config()
@@ -259,6 +307,89 @@ class RoutePlanner:
         
         self._process_areas_with_vehicle_optimization(ordered_areas, area_vehicles_map)
 
+    def _process_vrp(self):
+        """
+        Monta um único problema VROOM para toda a composição (todas as entregas com
+        peso/volume, todos os veículos com capacidade, saída/retorno no ponto de saída
+        da área) e grava o resultado nas cargas dos veículos.
+        Na configuração padrão cada veículo só atende a própria área (skills); na
+        customizada pode completar a carga com entregas de qualquer área, como no greedy.
+        Retorna False se o VROOM falhar, para seguir com a alocação sequencial.
+        """
+        self._send_progress("Montando problema VRP único...", 20)
+        
+        if self.vehicles_areas:
+            vehicle_areas = self._build_vehicle_areas_map()
+            if not vehicle_areas:
+                return True
+            restrict_areas = False
+        else:
+            vehicle_areas = {
+                vehicle: [vehicle.route_area]
+                for vehicle in Vehicle.objects.filter(route_area__isnull=False, is_active=True)
+                                              .select_related('route_area__departure_location')
+            }
+            restrict_areas = True
+        
+        served_areas = {area for areas in vehicle_areas.values() for area in areas}
+        unserved_areas = []
+        delivery_area = {}
+        jobs = []
+        for area, deliveries in self.area_delivery_map.items():
+            if restrict_areas and area not in served_areas:
+                unserved_areas.append(area)
+                continue
+            for delivery in deliveries:
+                delivery_area[delivery.id] = area
+                jobs.append({
+                    'id': delivery.id,
+                    'lat': delivery.latitude,
+                    'long': delivery.longitude,
+                    'amount': self._delivery_size(delivery),
+                    'skills': [area.pk] if restrict_areas else None,
+                })
+        
+        vehicles_by_id = {}
+        vehicle_payload = []
+        for vehicle, areas in vehicle_areas.items():
+            departure = areas[0].departure_location or self.departure
+            load = self._vehicle_load(vehicle)
+            vehicles_by_id[vehicle.id] = vehicle
+            self.vrp_departures[vehicle.id] = departure
+            vehicle_payload.append({
+                'id': vehicle.id,
+                'start': [float(departure.longitude), float(departure.latitude)]
+                         if departure and departure.latitude and departure.longitude else None,
+                'capacity': [load.remaining_g, load.remaining_cm3],
+                'skills': [area.pk for area in areas] if restrict_areas else None,
+            })
+        
+        solution = {'routes': {}, 'unassigned': []}
+        if jobs and vehicle_payload:
+            self._send_progress(f"VRP: {len(jobs)} entregas em {len(vehicle_payload)} veículos...", 30)
+            try:
+                solution = get_routing_provider().solve_vrp(jobs, vehicle_payload)
+            except Exception as e:
+                self.vrp_departures.clear()
+                self._notify("Erro no VRP", f"{e} — usando alocação sequencial.", 'warning')
+                self.allocation_mode = ALLOCATION_GREEDY
+                return False
+        
+        for area in unserved_areas:
+            self._notify(f"Área {area.name}", "Sem veículos nesta área.", 'warning')
+            self.unassigned_global.extend(self.area_delivery_map[area])
+        
+        deliveries_by_id = {delivery.id: delivery for delivery in self.deliveries}
+        for vehicle_id, job_ids in solution['routes'].items():
+            vehicle = vehicles_by_id[vehicle_id]
+            for job_id in job_ids:
+                self._add_delivery_to_vehicle(vehicle, deliveries_by_id[job_id], delivery_area[job_id])
+            self._send_progress(f"Veículo {vehicle.name}: +{len(job_ids)} entregas", None)
+        
+        self.unassigned_global.extend(deliveries_by_id[job_id] for job_id in solution['unassigned'])
+        self._send_progress(f"VRP: {len(solution['unassigned'])} entregas não alocadas", 80)
+        return True
+
     def _build_vehicle_areas_map(self):
         """Constrói mapa de veículos para áreas válidas"""
         vehicle_areas = {}
@@ -295,6 +426,7 @@ class RoutePlanner:
         Veículos completam sua carga com entregas de múltiplas áreas
         """
         total_areas = len(ordered_areas)
+        self.pool = DeliveryPool(self.area_delivery_map, self._delivery_size, self.processed_deliveries)
         
         for idx, area in enumerate(ordered_areas, 1):
             pct = int(20 + idx/total_areas*60)
@@ -316,73 +448,105 @@ class RoutePlanner:
 
     def _get_available_deliveries_for_area(self, area):
         """Retorna entregas disponíveis (não processadas) para uma área"""
-        return [
-            d for d in self.area_delivery_map.get(area, [])
-            if d.id not in self.processed_deliveries
-        ]
+        return self.pool.available(area)
 
     def _get_ordered_vehicles_for_area(self, area, area_vehicles_map):
         """Retorna veículos ordenados por capacidade restante (maior primeiro)"""
         vehicles = area_vehicles_map.get(area, [])
         
-        # Ordena por capacidade restante (peso + volume)
+        # Ordena por capacidade restante (kg + m³, em milionésimos para manter inteiros)
         def vehicle_priority(vehicle):
-            remaining = self._get_vehicle_remaining_capacity(vehicle)
-            return (remaining['weight'] + remaining['volume'], 
+            load = self._vehicle_load(vehicle)
+            return (load.remaining_g * 1000 + load.remaining_cm3, 
                     vehicle.max_weight_kg or Decimal('0'))
         
         return sorted(vehicles, key=vehicle_priority, reverse=True)
 
     def _allocate_deliveries_to_vehicles(self, area, vehicles, deliveries):
         """Aloca entregas aos veículos respeitando capacidades"""
-        remaining_deliveries = deliveries.copy()
+        remaining_deliveries = self._allocate_area(area, vehicles, deliveries)
+        
+        # Entregas não alocadas ficam para próximas tentativas
+        self.unassigned_global.extend(remaining_deliveries)
+
+    def _allocate_area(self, area, vehicles, deliveries):
+        """
+        Aloca as entregas da área nos veículos conforme self.allocation_mode
+        e retorna as que não couberam em nenhum veículo.
+        """
+        if self.allocation_mode == ALLOCATION_GREEDY:
+            allocated_counts, remaining_deliveries = self._allocate_greedy(area, vehicles, deliveries)
+        else:
+            allocated_counts, remaining_deliveries = self._allocate_packed(area, vehicles, deliveries)
         
+        for vehicle, count in zip(vehicles, allocated_counts):
+            if count:
+                self._send_progress(f"Veículo {vehicle.name}: +{count} entregas", None)
+        return remaining_deliveries
+
+    def _allocate_greedy(self, area, vehicles, deliveries):
+        """Enche um veículo por vez, percorrendo as entregas da mais próxima para a mais distante"""
+        allocated_counts = []
+        remaining_deliveries = deliveries
         for vehicle in vehicles:
             if not remaining_deliveries:
-                break
+                allocated_counts.append(0)
+                continue
             
             # Carrega o máximo possível neste veículo
-            allocated = []
-            for delivery in remaining_deliveries[:]:
+            not_loaded = []
+            for delivery in remaining_deliveries:
                 if self._can_add_delivery_to_vehicle(vehicle, delivery):
                     self._add_delivery_to_vehicle(vehicle, delivery, area)
-                    allocated.append(delivery)
-                    remaining_deliveries.remove(delivery)
-            
-            if allocated:
-                self._send_progress(
-                    f"Veículo {vehicle.name}: +{len(allocated)} entregas", 
-                    None
-                )
+                else:
+                    not_loaded.append(delivery)
+            allocated_counts.append(len(remaining_deliveries) - len(not_loaded))
+            remaining_deliveries = not_loaded
+        return allocated_counts, list(remaining_deliveries)
+
+    def _allocate_packed(self, area, vehicles, deliveries):
+        """Empacotamento FFD/BFD vetorizado (NumPy) sobre peso e volume das entregas"""
+        if not deliveries or not vehicles:
+            return [0] * len(vehicles), list(deliveries)
+        
+        sizes = np.array([self._delivery_size(delivery) for delivery in deliveries], dtype=np.int64)
+        loads = [self._vehicle_load(vehicle) for vehicle in vehicles]
+        assignment = pack_deliveries(
+            sizes[:, 0], sizes[:, 1],
+            [self.delivery_distances.get(delivery.id, 0.0) for delivery in deliveries],
+            [load.remaining_g for load in loads],
+            [load.remaining_cm3 for load in loads],
+            mode=self.allocation_mode,
+        )
         
-        # Entregas não alocadas ficam para próximas tentativas
-        self.unassigned_global.extend(remaining_deliveries)
+        # Grava na ordem original (proximidade), preservando a sequência das entregas no veículo
+        remaining_deliveries = []
+        for delivery, vehicle_index in zip(deliveries, assignment.tolist()):
+            if vehicle_index < 0:
+                remaining_deliveries.append(delivery)
+            else:
+                self._add_delivery_to_vehicle(vehicles[vehicle_index], delivery, area)
+        allocated_counts = np.bincount(assignment[assignment >= 0], minlength=len(vehicles)).tolist()
+        return allocated_counts, remaining_deliveries
 
     def _complete_vehicle_loads(self, vehicles):
         """
-        Completa carga dos veículos com entregas de outras áreas
+        Completa carga dos veículos com entregas de outras áreas:
+        em cada área, coloca a maior entrega que ainda cabe até nenhuma caber mais
         """
         for vehicle in vehicles:
-            if vehicle.id not in self.vehicle_loads:
+            load = self._vehicle_load(vehicle)
+            if not load.deliveries:
                 continue
             
-            # Tenta completar carga com entregas de outras áreas
-            for other_area, other_deliveries in self.area_delivery_map.items():
-                if not other_deliveries:
-                    continue
-                
-                available_deliveries = [
-                    d for d in other_deliveries
-                    if d.id not in self.processed_deliveries
-                ]
-                
-                for delivery in available_deliveries[:]:
-                    if self._can_add_delivery_to_vehicle(vehicle, delivery):
-                        self._add_delivery_to_vehicle(vehicle, delivery, other_area)
-                        self.unassigned_global = [
-                            d for d in self.unassigned_global 
-                            if d.id != delivery.id
-                        ]
+            # Tenta completar carga com entregas de outras áreas, das mais próximas às mais distantes
+            for other_area in self._areas_by_proximity(load.main_area, self.pool.iter_areas()):
+                while True:
+                    delivery = self.pool.largest_fitting(other_area, load.remaining_g, load.remaining_cm3)
+                    if delivery is None:
+                        break
+                    # as não alocadas são filtradas por processed_deliveries no finalize()
+                    self._add_delivery_to_vehicle(vehicle, delivery, other_area)
 
     def _process_default_config(self):
         """Processa configuração padrão usando route_area dos veículos"""
@@ -403,27 +567,7 @@ class RoutePlanner:
                 continue
             
             # CORREÇÃO: Processa TODAS as entregas da área
-            remaining_deliveries = deliveries.copy()
-            
-            # Tenta alocar todas as entregas nos veículos disponíveis
-            for vehicle in vehicles:
-                if not remaining_deliveries:
-                    break  # Todas as entregas foram processadas
-                
-                # Aloca entregas para este veículo
-                allocated_deliveries = []
-                for delivery in remaining_deliveries[:]:
-                    if self._can_add_delivery_to_vehicle(vehicle, delivery):
-                        self._add_delivery_to_vehicle(vehicle, delivery, area)
-                        allocated_deliveries.append(delivery)
-                        remaining_deliveries.remove(delivery)
-                
-                # Log do progresso
-                if allocated_deliveries:
-                    self._send_progress(
-                        f"Veículo {vehicle.name}: {len(allocated_deliveries)} entregas alocadas", 
-                        None
-                    )
+            remaining_deliveries = self._allocate_area(area, vehicles, deliveries)
             
             # Entregas que não couberam em nenhum veículo vão para não alocadas
             if remaining_deliveries:
@@ -441,9 +585,9 @@ class RoutePlanner:
             # Já existe LoadPlan para este veículo, pula
             return self.vehicle_load_plans[vehicle_id]
         
-        vehicle = vehicle_data['vehicle']
-        deliveries = vehicle_data['deliveries']
-        main_area = vehicle_data['main_area']
+        vehicle = vehicle_data.vehicle
+        deliveries = vehicle_data.deliveries
+        main_area = vehicle_data.main_area
         
         if not deliveries:
             return None
@@ -490,14 +634,13 @@ class RoutePlanner:
                 }
             )
         
-        # Otimiza rota
-        self._optimize_route(route, deliveries, vehicle)
+        # Otimização da rota fica para _optimize_routes (todas as rotas em paralelo)
+        self.routes_to_optimize.append((route, deliveries, vehicle))
         
         return plan
 
-    def _optimize_route(self, route, deliveries, vehicle):
-        """Otimiza rota usando serviço ORS"""
-        coords = [
+    def _route_coords(self, deliveries):
+        return [
             {
                 'lat': float(d.latitude),
                 'long': float(d.longitude),
@@ -505,40 +648,139 @@ class RoutePlanner:
             }
             for d in deliveries
         ]
+
+    def _optimize_routes(self):
+        """
+        Otimiza as rotas de todos os veículos usando serviço VROOM/ORS:
+        as chamadas HTTP rodam em paralelo (até ROUTE_OPTIMIZE_MAX_WORKERS) e
+        os resultados são gravados no banco de uma vez no final
+        """
+        jobs = self.routes_to_optimize
+        if not jobs:
+            return
+        
+        results = [None] * len(jobs)
+        workers = max(1, min(settings.ROUTE_OPTIMIZE_MAX_WORKERS, len(jobs)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self._route_geojson_job, deliveries, vehicle): index
+                for index, (_, deliveries, vehicle) in enumerate(jobs)
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    results[index] = e
+                self._send_progress(f"Otimizando rotas: {done}/{len(jobs)}", 90 + int(done / len(jobs) * 9))
+        
+        self._save_optimized_routes(jobs, results)
+
+    def _route_geojson_job(self, deliveries, vehicle):
+        """_route_geojson numa thread do pool: fecha a conexão com o banco que ela abrir"""
+        try:
+            return self._route_geojson(deliveries, vehicle)
+        finally:
+            connections.close_all()
+
+    def _route_geojson(self, deliveries, vehicle):
+        """
+        Rotas vindas do VRP já estão sequenciadas: só falta o traçado (directions).
+        Se o provedor falhar, usa o solver local (ROUTE_LOCAL_FALLBACK).
+        """
+        coords = self._route_coords(deliveries)
+        sequenced = vehicle.id in self.vrp_departures
+        departure = self.vrp_departures.get(vehicle.id, self.departure)
         
+        provider = get_routing_provider()
         try:
-            geo, dur, dist, ord_del = get_geojson_by_ors(coords, self.departure)
+            if sequenced:
+                return provider.directions(coords, departure)
+            return provider.optimize(coords, departure)
+        except Exception as e:
+            fallback = get_fallback_provider()
+            if not settings.ROUTE_LOCAL_FALLBACK or provider.name == fallback.name:
+                raise
+            logging.warning(f"[RoutePlanner] Provedor '{provider.name}' falhou para {vehicle.name}, usando solver local: {e}")
+            self.local_fallbacks.append(vehicle.name)
+            if sequenced:
+                return fallback.directions(coords, departure)
+            return fallback.optimize(coords, departure)
+
+    def _save_optimized_routes(self, jobs, results):
+        """
+        Grava rotas otimizadas e paradas em lote; falhas são notificadas por veículo.
+        Os bulk_*_with_history geram o histórico (simple_history), mas não disparam os
+        sinais do auditlog: as entradas de Route/RouteDelivery são criadas em _audit_log.
+        """
+        routes_to_update = []
+        stops_to_create = []
+        now = timezone.now()
+        
+        for (route, deliveries, vehicle), result in zip(jobs, results):
+            if isinstance(result, Exception):
+                self._notify(f"Erro otimização {vehicle.name}", str(result), 'error')
+                self.created_plans.append({
+                    'vehicle': vehicle.name,
+                    'area': route.route_area.name,
+                    'error': str(result)
+                })
+                continue
+            
+            geo, dur, dist, ord_del = result
             
             # Atualiza rota
             route.name = f"RT-{route.id}"
             route.distance_km = dist / 1000
             route.time_min = dur / 60
             route.geojson = geo
-            route.points = coords
-            route.save()
+            route.points = self._route_coords(deliveries)
+            route.updated_at = now   # bulk_update não aplica auto_now
+            routes_to_update.append(route)
             
             # Cria entregas da rota
+            by_order_number = {d.order_number: d for d in deliveries}
             for pos, od in enumerate(ord_del, start=1):
-                delivery_obj = Delivery.objects.get(order_number=od['order_number'])
-                RouteDelivery.objects.create(
+                stops_to_create.append(RouteDelivery(
                     route=route,
-                    delivery=delivery_obj,
+                    delivery=by_order_number[od['order_number']],
                     position=pos
-                )
+                ))
             
             self.created_plans.append({
                 'vehicle': vehicle.name,
                 'area': route.route_area.name,
                 'deliveries': len(deliveries)
             })
-            
-        except Exception as e:
-            self._notify(f"Erro otimização {vehicle.name}", str(e), 'error')
-            self.created_plans.append({
-                'vehicle': vehicle.name,
-                'area': route.route_area.name,
-                'error': str(e)
-            })
+        
+        if self.local_fallbacks:
+            self._notify(
+                "Rotas em linha reta",
+                f"VROOM/ORS indisponível: {len(self.local_fallbacks)} rota(s) sequenciadas pelo solver local "
+                f"({', '.join(sorted(self.local_fallbacks))}).",
+                'warning'
+            )
+        
+        if routes_to_update:
+            route_fields = ['name', 'distance_km', 'time_min', 'geojson', 'points', 'updated_at']
+            previous = Route.objects.in_bulk([route.pk for route in routes_to_update])
+            bulk_update_with_history(
+                routes_to_update, Route, route_fields,
+                batch_size=500, default_user=self.user
+            )
+            self._audit_log(LogEntry.Action.UPDATE, routes_to_update, previous, route_fields)
+        if stops_to_create:
+            stops = bulk_create_with_history(stops_to_create, RouteDelivery, batch_size=500, default_user=self.user)
+            self._audit_log(LogEntry.Action.CREATE, stops)
+
+    @staticmethod
+    def _audit_log(action, instances, previous=None, fields=None):
+        """Entradas do auditlog que os sinais de save() gerariam (os bulk_* não os disparam)"""
+        for instance in instances:
+            old = previous.get(instance.pk) if previous is not None else None
+            changes = model_instance_diff(old, instance, fields_to_check=fields)
+            if changes:
+                LogEntry.objects.log_create(instance, action=action, changes=changes)
 
     def finalize(self):
         """Finaliza roteirização e gera relatório"""
@@ -547,6 +789,7 @@ class RoutePlanner:
         # CORREÇÃO: Cria apenas UM LoadPlan por veículo
         for vehicle_id, vehicle_data in self.vehicle_loads.items():
             self._create_single_load_plan_for_vehicle(vehicle_id, vehicle_data)
+        self._optimize_routes()
         
         # Registra entregas não alocadas
         for delivery in self.unassigned_global:
@@ -626,13 +869,17 @@ def can_fit_delivery(vehicle, current_weight, current_volume, delivery):
 
 
 @shared_task(bind=True)
-def create_script_perso_task(self, user_id, tkrecord_id, vehicles_areas, start_date, end_date):
+def create_script_perso_task(self, user_id, tkrecord_id, vehicles_areas, start_date, end_date,
+                             allocation_mode=ALLOCATION_GREEDY):
     """
-    Task Celery para criação de roteirização otimizada
+    Task Celery para criação de roteirização otimizada.
+    allocation_mode: 'greedy' (padrão), 'ffd', 'bfd' ou 'vrp' — ver tmsapp.tasks.bin_packing
     """
     time_module.sleep(5)
     try:
-        planner = RoutePlanner(self, user_id, tkrecord_id, vehicles_areas, start_date, end_date)
+        planner = RoutePlanner(self, user_id, tkrecord_id, vehicles_areas, start_date, end_date,
+                               allocation_mode)
+        planner.prefill_area_matrix()
         with transaction.atomic():
             result = planner.run()
         return result
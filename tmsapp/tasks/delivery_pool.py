@@ -0,0 +1,85 @@
+from bisect import bisect_right
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+
+class _AreaIndex:
+    """Entregas de uma área: ordem de proximidade + ordenação por peso (para busca binária)."""
+
+    __slots__ = ('by_distance', 'by_weight', 'weights', 'taken_count')
+
+    def __init__(self, deliveries: List, size_of: Callable):
+        self.by_distance = list(deliveries)
+        entries = sorted(
+            ((*size_of(delivery), position, delivery) for position, delivery in enumerate(deliveries)),
+            key=lambda entry: (entry[0], -entry[2])   # peso; no empate, a mais próxima por último
+        )
+        self.by_weight = entries
+        self.weights = [entry[0] for entry in entries]
+        self.taken_count = 0
+
+
+class DeliveryPool:
+    """
+    Entregas ainda não alocadas, indexadas por área.
+
+    A remoção é preguiçosa: uma entrega sai do pool quando seu id entra no conjunto
+    `taken` (o mesmo processed_deliveries do RoutePlanner), sem percorrer listas.
+    Os índices de cada área são compactados quando metade das entradas já foi alocada.
+
+    largest_fitting() encontra por busca binária no peso a maior entrega que ainda
+    cabe no espaço livre (peso e volume) de um veículo.
+    """
+
+    def __init__(self, area_deliveries: Dict[object, List], size_of: Callable[[object], Tuple[int, int]],
+                 taken: Set[int]):
+        self.size_of = size_of
+        self.taken = taken
+        self.areas: Dict[object, _AreaIndex] = {
+            area: _AreaIndex(deliveries, size_of) for area, deliveries in area_deliveries.items() if deliveries
+        }
+
+    def available(self, area) -> List:
+        """Entregas livres da área, da mais próxima para a mais distante."""
+        index = self.areas.get(area)
+        if index is None:
+            return []
+        return [delivery for delivery in index.by_distance if delivery.id not in self.taken]
+
+    def iter_areas(self) -> Iterator:
+        return iter(list(self.areas))
+
+    def largest_fitting(self, area, free_weight: int, free_volume: int) -> Optional[object]:
+        """Maior entrega (em peso; empate: a mais próxima) da área que cabe no espaço livre."""
+        index = self.areas.get(area)
+        if index is None:
+            return None
+
+        position = bisect_right(index.weights, free_weight)
+        stale = 0
+        while position > 0:
+            position -= 1
+            _, volume, _, delivery = index.by_weight[position]
+            if delivery.id in self.taken:
+                stale += 1
+                continue
+            if volume <= free_volume:
+                self._note_taken(area, index, stale)
+                return delivery
+        self._note_taken(area, index, stale)
+        return None
+
+    def _note_taken(self, area, index: _AreaIndex, stale: int) -> None:
+        if not stale:
+            return
+        index.taken_count += stale
+        if index.taken_count * 2 >= len(index.by_weight):
+            self._compact(area, index)
+
+    def _compact(self, area, index: _AreaIndex) -> None:
+        index.by_distance = [delivery for delivery in index.by_distance if delivery.id not in self.taken]
+        if not index.by_distance:
+            del self.areas[area]
+            return
+        index.by_weight = [entry for entry in index.by_weight if entry[3].id not in self.taken]
+        index.weights = [entry[0] for entry in index.by_weight]
+        index.taken_count = 0
@@ -0,0 +1,301 @@
+import csv
+import io
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from crmapp.models import Customer
+from tmsapp.deliveryApp.models import Delivery, DeliveryStatus, GeocodeStatus
+from tmsapp.scriptApp.action import iter_file_chunks
+
+# Colunas da tabela de staging, na ordem em que são enviadas pelo COPY
+STAGE_COLUMNS = [
+    ('row_no', 'integer'),
+    ('cpf', 'text'),
+    ('full_name', 'text'),
+    ('email', 'text'),
+    ('phone', 'text'),
+    ('order_number', 'text'),
+    ('filial', 'text'),
+    ('street', 'text'),
+    ('number', 'text'),
+    ('neighborhood', 'text'),
+    ('city', 'text'),
+    ('state', 'text'),
+    ('postal_code', 'text'),
+    ('observation', 'text'),
+    ('reference', 'text'),
+    ('total_volume_m3', 'numeric'),
+    ('total_weight_kg', 'numeric'),
+    ('price', 'numeric'),
+    ('date_delivery', 'date'),
+    ('import_fingerprint', 'text'),
+]
+
+# Campos de endereço, na ordem dos argumentos de geocode_endereco
+ADDRESS_COLUMNS = ['street', 'number', 'postal_code', 'neighborhood', 'city', 'state']
+
+NULL = r'\N'
+
+
+class DeliveryStagingLoader:
+    """
+    Importação em massa para PostgreSQL:
+    1. as linhas normalizadas pelo DeliveryImporter são enviadas com COPY FROM STDIN
+       para uma tabela UNLOGGED temporária
+    2. uma consulta compara o endereço de cada pedido com o já cadastrado e lista
+       o que precisa ser geocodificado (geocodificação fora da transação)
+    3. clientes e entregas são mesclados com INSERT ... SELECT ... ON CONFLICT,
+       em uma única transação
+
+    As tabelas de staging são removidas ao final, com ou sem erro.
+    """
+
+    def __init__(self, importer):
+        self.importer = importer
+        suffix = uuid.uuid4().hex[:12]
+        self.stage_table = f"delivery_import_stage_{suffix}"
+        self.coords_table = f"delivery_import_coords_{suffix}"
+
+    @staticmethod
+    def is_supported() -> bool:
+        return connection.vendor == 'postgresql'
+
+    def load(self, temp_file_path: str, total_rows: Optional[int]) -> Tuple[int, int, int]:
+        """
+        Executa a importação completa.
+
+        Returns:
+            Tupla (clientes gravados, entregas criadas, entregas atualizadas)
+        """
+        try:
+            self.create_tables()
+            loaded = self.copy_rows(temp_file_path, total_rows)
+            self.importer.send_progress_update(f"{loaded} linhas carregadas na área de staging", 50)
+
+            self.fill_defaults()
+            pending = self.rows_to_geocode()
+            results = self.importer.geocode_addresses(
+                (address for _, address, _ in pending), progress_range=(50, 85)
+            )
+            self.copy_coordinates(pending, results)
+
+            with transaction.atomic():
+                customers_created, customers_total = self.merge_customers()
+                self.importer.send_progress_update(
+                    f"{customers_created} clientes criados, {customers_total - customers_created} atualizados", 90
+                )
+                created_count, updated_count = self.merge_deliveries()
+            self.importer.send_progress_update(
+                f"{created_count} entregas criadas, {updated_count} atualizadas", 95
+            )
+            return customers_total, created_count, updated_count
+        finally:
+            self.drop_tables()
+
+    def create_tables(self) -> None:
+        columns = ', '.join(f"{name} {kind}" for name, kind in STAGE_COLUMNS)
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE UNLOGGED TABLE {self.stage_table} ({columns})")
+            cursor.execute(
+                f"CREATE UNLOGGED TABLE {self.coords_table} "
+                f"(order_number text PRIMARY KEY, latitude numeric, longitude numeric, "
+                f"geocode_status text, geocode_attempts integer, "
+                f"geocode_last_attempt_at timestamptz, geocode_next_attempt_at timestamptz)"
+            )
+
+    def drop_tables(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.stage_table}, {self.coords_table}")
+
+    def copy_rows(self, temp_file_path: str, total_rows: Optional[int]) -> int:
+        """Lê a planilha em blocos, normaliza e envia cada bloco com COPY. Retorna as linhas enviadas."""
+        columns = ', '.join(name for name, _ in STAGE_COLUMNS)
+        statement = f"COPY {self.stage_table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{NULL}')"
+
+        loaded = 0
+        for chunk_number, chunk in enumerate(iter_file_chunks(temp_file_path, self.importer.chunk_size), start=1):
+            try:
+                processed_rows, _ = self.importer.collect_data_from_dataframe(chunk)
+            except Exception as error:
+                raise ValueError(f"{error} (bloco {chunk_number})") from error
+
+            buffer = self.to_csv(processed_rows, first_row_no=loaded)
+            with connection.cursor() as cursor:
+                cursor.copy_expert(statement, buffer)
+
+            loaded += len(processed_rows)
+            percent = 5 + int(min(loaded / total_rows, 1) * 45) if total_rows else 5
+            self.importer.send_progress_update(f"Carregando linhas: {loaded}", percent)
+            del chunk, processed_rows, buffer
+        return loaded
+
+    def to_csv(self, rows: List[Dict], first_row_no: int) -> io.StringIO:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row_no, row_data in enumerate(rows, start=first_row_no + 1):
+            values = dict(
+                row_data,
+                row_no=row_no,
+                city=self.importer.extract_city_name(row_data['city_full']),
+                import_fingerprint=self.importer.delivery_fingerprint(row_data),
+            )
+            writer.writerow([NULL if values[name] is None else values[name] for name, _ in STAGE_COLUMNS])
+        buffer.seek(0)
+        return buffer
+
+    def fill_defaults(self) -> None:
+        """Pedidos novos sem data de entrega recebem a data de hoje (default do model)."""
+        delivery_table = Delivery._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {self.stage_table} s SET date_delivery = %s "
+                f"WHERE s.date_delivery IS NULL AND NOT EXISTS "
+                f"(SELECT 1 FROM {delivery_table} d WHERE d.order_number = s.order_number)",
+                [timezone.now().date()],
+            )
+
+    def latest_rows_sql(self) -> str:
+        """Última linha de cada pedido (a planilha pode repetir o mesmo pedido)."""
+        return (
+            f"SELECT DISTINCT ON (order_number) * FROM {self.stage_table} "
+            f"WHERE order_number <> '' ORDER BY order_number, row_no DESC"
+        )
+
+    def rows_to_geocode(self) -> List[Tuple[str, Tuple, int]]:
+        """
+        Pedidos novos, sem coordenadas ou com endereço alterado.
+        Retorna [(order_number, chave de endereço na ordem de geocode_endereco,
+        tentativas anteriores — 0 para pedido novo ou endereço alterado)].
+        """
+        delivery_table = Delivery._meta.db_table
+        staged = ', '.join(f"s.{column}" for column in ADDRESS_COLUMNS)
+        stored = ', '.join(f"d.{column}" for column in ADDRESS_COLUMNS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT s.order_number, "
+                f"       CASE WHEN d.id IS NULL OR ({stored}) IS DISTINCT FROM ({staged}) "
+                f"            THEN 0 ELSE d.geocode_attempts END, "
+                f"       {staged} "
+                f"FROM ({self.latest_rows_sql()}) s "
+                f"LEFT JOIN {delivery_table} d ON d.order_number = s.order_number "
+                f"WHERE d.id IS NULL OR d.latitude IS NULL OR d.longitude IS NULL "
+                f"OR ({stored}) IS DISTINCT FROM ({staged})"
+            )
+            return [(row[0], tuple(row[2:]), row[1]) for row in cursor.fetchall()]
+
+    def copy_coordinates(self, pending: Iterable[Tuple[str, Tuple, int]], results: Dict[Tuple, Tuple]) -> None:
+        """
+        Resultado de cada pedido geocodificado, com o estado calculado como em
+        GeocodedModel.apply_geocode: não encontrado fica 'falhou', com retentativa agendada.
+        """
+        now = timezone.now()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for order_number, address, attempts in pending:
+            latitude, longitude = results.get(address, (None, None))
+            attempts += 1
+            if latitude and longitude:
+                row = [latitude, longitude, GeocodeStatus.OK.value, attempts, now.isoformat(), NULL]
+            else:
+                next_attempt = now + Delivery.geocode_retry_backoff(attempts)
+                row = [NULL, NULL, GeocodeStatus.FAILED.value, attempts, now.isoformat(), next_attempt.isoformat()]
+            writer.writerow([order_number, *row])
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {self.coords_table} (order_number, latitude, longitude, geocode_status, geocode_attempts, "
+                f"geocode_last_attempt_at, geocode_next_attempt_at) "
+                f"FROM STDIN WITH (FORMAT csv, NULL '{NULL}')",
+                buffer,
+            )
+
+    def merge_customers(self) -> Tuple[int, int]:
+        """
+        Upsert de clientes por CPF; para cada campo vale o último valor não vazio da planilha
+        e campos vazios mantêm o valor já cadastrado. Linhas sem CPF não geram cliente.
+        Retorna (criados, total gravado).
+        """
+        table = Customer._meta.db_table
+
+        def last_filled(column: str) -> str:
+            return f"(array_agg({column} ORDER BY row_no DESC) FILTER (WHERE {column} <> ''))[1]"
+
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"WITH upserted AS ("
+                f"  INSERT INTO {table} (cpf, full_name, email, phone, created_at, updated_at)"
+                f"  SELECT cpf, COALESCE({last_filled('full_name')}, ''), {last_filled('email')},"
+                f"         {last_filled('phone')}, %s, %s"
+                f"  FROM {self.stage_table} WHERE cpf <> '' GROUP BY cpf"
+                f"  ON CONFLICT (cpf) DO UPDATE SET"
+                f"    full_name = COALESCE(NULLIF(EXCLUDED.full_name, ''), {table}.full_name),"
+                f"    email = COALESCE(EXCLUDED.email, {table}.email),"
+                f"    phone = COALESCE(EXCLUDED.phone, {table}.phone),"
+                f"    updated_at = EXCLUDED.updated_at"
+                f"  RETURNING (xmax = 0) AS inserted"
+                f") SELECT count(*) FILTER (WHERE inserted), count(*) FROM upserted",
+                [now, now],
+            )
+            created, total = cursor.fetchone()
+        return created, total
+
+    def merge_deliveries(self) -> Tuple[int, int]:
+        """
+        Upsert de entregas por número do pedido, com o cliente já gravado (nenhum para
+        linhas sem CPF) e as coordenadas obtidas na geocodificação (ou as atuais, quando
+        não houve geocodificação ou ela falhou).
+        O estado da geocodificação vem de copy_coordinates para os pedidos geocodificados
+        (geocode_last_attempt_at preenchido) e é mantido nos demais; um endereço alterado
+        e não encontrado fica 'falhou', marcando as coordenadas antigas como desatualizadas.
+        Pedidos com a mesma impressão digital e sem nova geocodificação não são reescritos.
+        Colunas NOT NULL cujo default só existe no model (geocode_attempts) entram
+        explicitamente no INSERT.
+        Retorna (criadas, atualizadas).
+        """
+        table = Delivery._meta.db_table
+        customer_table = Customer._meta.db_table
+        overwritten = [
+            'street', 'number', 'neighborhood', 'city', 'state', 'postal_code',
+            'observation', 'reference', 'filial', 'total_volume_m3', 'total_weight_kg', 'price',
+            'import_fingerprint',
+        ]
+        kept_when_empty = ['customer_id', 'latitude', 'longitude', 'date_delivery']
+        geocode_state = ['geocode_status', 'geocode_attempts', 'geocode_last_attempt_at', 'geocode_next_attempt_at']
+        assignments = [f"{column} = EXCLUDED.{column}" for column in overwritten + ['updated_at']]
+        assignments += [f"{column} = COALESCE(EXCLUDED.{column}, {table}.{column})" for column in kept_when_empty]
+        assignments += [
+            f"{column} = CASE WHEN EXCLUDED.geocode_last_attempt_at IS NULL "
+            f"THEN {table}.{column} ELSE EXCLUDED.{column} END"
+            for column in geocode_state
+        ]
+
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"WITH upserted AS ("
+                f"  INSERT INTO {table} (order_number, {', '.join(overwritten)}, date_delivery,"
+                f"         customer_id, latitude, longitude, {', '.join(geocode_state)}, status, is_active,"
+                f"         created_at, updated_at, created_by_id)"
+                f"  SELECT s.order_number, {', '.join(f's.{column}' for column in overwritten)}, s.date_delivery,"
+                f"         c.id, g.latitude, g.longitude,"
+                f"         COALESCE(g.geocode_status, '{GeocodeStatus.PENDING.value}'), COALESCE(g.geocode_attempts, 0),"
+                f"         g.geocode_last_attempt_at, g.geocode_next_attempt_at,"
+                f"         %s, TRUE, %s, %s, %s"
+                f"  FROM ({self.latest_rows_sql()}) s"
+                f"  LEFT JOIN {customer_table} c ON c.cpf = s.cpf AND s.cpf <> ''"
+                f"  LEFT JOIN {self.coords_table} g ON g.order_number = s.order_number"
+                f"  ON CONFLICT (order_number) DO UPDATE SET {', '.join(assignments)}"
+                f"  WHERE {table}.import_fingerprint IS DISTINCT FROM EXCLUDED.import_fingerprint"
+                f"     OR EXCLUDED.geocode_last_attempt_at IS NOT NULL"
+                f"  RETURNING (xmax = 0) AS inserted"
+                f") SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM upserted",
+                [DeliveryStatus.PENDING, now, now, self.importer.user.pk],
+            )
+            created, updated = cursor.fetchone()
+            cursor.execute(f"SELECT count(DISTINCT order_number) FROM {self.stage_table} WHERE order_number <> ''")
+            self.importer.unchanged_count += cursor.fetchone()[0] - created - updated
+        return created, updated
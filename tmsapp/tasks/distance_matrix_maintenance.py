@@ -0,0 +1,13 @@
+from celery import shared_task
+
+from tmsapp.scriptApp.action.distance_matrix import distance_matrix_stats, warm_distance_matrix
+
+
+@shared_task
+def warm_distance_matrix_task():
+    """
+    Tarefa Celery periódica que completa a matriz de distâncias entre pontos de saída,
+    centróides das áreas e endereços frequentes (só os pares que ainda faltam).
+    """
+    points = warm_distance_matrix()
+    return {"status": "success", "points": points, "stats": distance_matrix_stats()}
@@ -0,0 +1,117 @@
+import logging
+import time
+
+import redis
+from celery import shared_task
+from django.conf import settings
+
+from djangonotify.utils import send_notification
+from tmsapp.scriptApp.action.geocode_cache import evict_expired, geocode_cache_stats
+from tmsapp.scriptApp.action.geocode_queue import (
+    SCHEDULED_KEY, geocode_pending_records, geocode_retry_due, group_by_user,
+)
+
+# Impede duas execuções simultâneas de retry_geocoding
+RETRY_LOCK_KEY = "geocode_retry:lock"
+
+
+@shared_task
+def evict_geocode_cache():
+    """
+    Tarefa Celery periódica que remove entradas vencidas do cache de geocodificação.
+    """
+    deleted = evict_expired()
+    return {"status": "success", "deleted": deleted, "stats": geocode_cache_stats()}
+
+
+@shared_task
+def process_geocode_queue():
+    """
+    Geocodifica em lote as entregas e locais salvos com geocode_status='pending'
+    e avisa (canal de alertas) quem fez as alterações.
+    """
+    from djangonotify.progress import get_redis
+    from tmsapp.deliveryApp.models import Delivery, GeocodeStatus
+    from tmsapp.scriptApp.models import CompanyLocation
+
+    # libera o agendamento: saves feitos a partir daqui agendam uma nova execução
+    try:
+        get_redis().delete(SCHEDULED_KEY)
+    except redis.RedisError:
+        pass
+
+    summary = {}
+    for model in (Delivery, CompanyLocation):
+        label = model._meta.label
+        processed = found = 0
+        while True:
+            records = geocode_pending_records(model, settings.GEOCODE_QUEUE_BATCH_SIZE)
+            if not records:
+                break
+            processed += len(records)
+            found += sum(1 for record in records if record.geocode_status == GeocodeStatus.OK)
+            for user_id, user_records in group_by_user(label, records).items():
+                _notify_geocoded(user_id, model, user_records)
+        summary[label] = {"processed": processed, "geocoded": found}
+
+    return {"status": "success", **summary}
+
+
+@shared_task
+def retry_geocoding():
+    """
+    Tarefa Celery periódica que retenta a geocodificação de entregas e locais sem
+    coordenadas (falhas com espera exponencial vencida e pendências esquecidas),
+    em lotes, até esgotar GEOCODE_RETRY_TIME_BUDGET segundos. O que sobrar fica
+    para a próxima execução.
+    """
+    from djangonotify.progress import get_redis
+    from tmsapp.deliveryApp.models import Delivery, GeocodeStatus
+    from tmsapp.scriptApp.models import CompanyLocation
+
+    budget = settings.GEOCODE_RETRY_TIME_BUDGET
+    try:
+        if not get_redis().set(RETRY_LOCK_KEY, 1, nx=True, ex=budget + 60):
+            return {"status": "skipped", "reason": "already running"}
+    except redis.RedisError as e:
+        logging.warning(f"[Geocode] Falha ao obter trava da retentativa: {e}")
+
+    deadline = time.monotonic() + budget
+    summary = {}
+    try:
+        for model in (Delivery, CompanyLocation):
+            retried = found = 0
+            while time.monotonic() < deadline:
+                records = geocode_retry_due(model, settings.GEOCODE_RETRY_BATCH_SIZE)
+                if not records:
+                    break
+                retried += len(records)
+                found += sum(1 for record in records if record.geocode_status == GeocodeStatus.OK)
+            summary[model._meta.label] = {"retried": retried, "geocoded": found}
+    finally:
+        try:
+            get_redis().delete(RETRY_LOCK_KEY)
+        except redis.RedisError:
+            pass
+
+    return {"status": "success", "out_of_time": time.monotonic() >= deadline, **summary}
+
+
+def _notify_geocoded(user_id: int, model, records) -> None:
+    from tmsapp.deliveryApp.models import GeocodeStatus
+
+    failed = [record for record in records if record.geocode_status != GeocodeStatus.OK]
+    name = model._meta.verbose_name_plural.lower()
+    if not failed:
+        send_notification(
+            user_id, "Geocodificação concluída",
+            f"{len(records)} endereço(s) de {name} geocodificado(s) com sucesso.", level='success'
+        )
+        return
+    sample = ', '.join(str(record) for record in failed[:5])
+    send_notification(
+        user_id, "Endereço não encontrado",
+        f"{len(failed)} de {len(records)} endereço(s) de {name} não encontrado(s): {sample}"
+        + ('...' if len(failed) > 5 else ''),
+        level='warning'
+    )
@@ -0,0 +1,259 @@
+import logging
+import os
+import pickle
+import tempfile
+from typing import Dict, List, Optional
+
+import redis
+from celery import chord, shared_task
+from django.conf import settings
+from django.db import transaction
+
+from djangonotify.progress import get_redis
+from djangonotify.utils import send_notification, send_progress
+from tmsapp.scriptApp.action import iter_file_chunks
+
+FANOUT_KEY = "delivery_import_fanout:{task_id}"
+ABORTED_KEY = "delivery_import_fanout:{task_id}:aborted"
+
+
+class DeliveryImportFanOut:
+    """
+    Divide uma importação grande entre os workers do Celery:
+    1. o coordenador lê e valida a planilha bloco a bloco, gravando cada bloco
+       normalizado num arquivo temporário
+    2. os clientes de todos os blocos são deduplicados e gravados uma única vez,
+       antes do disparo, para que os blocos não disputem o mesmo CPF
+    3. um chord com uma task por bloco grava as entregas; o finalizador soma os
+       resultados e envia a notificação final
+
+    O progresso dos blocos é somado no Redis e publicado no TaskRecord do coordenador.
+    """
+
+    def __init__(self, importer):
+        self.importer = importer
+
+    def dispatch(self, temp_file_path: str, total_rows: Optional[int], file_hash: str, file_name: str) -> int:
+        """
+        Prepara os blocos e dispara o chord.
+
+        Returns:
+            Número de blocos disparados
+        """
+        importer = self.importer
+        chunk_paths: List[str] = []
+        customers: Dict[str, Dict] = {}
+        rows_count = 0
+
+        try:
+            for chunk_number, chunk in enumerate(iter_file_chunks(temp_file_path, importer.chunk_size), start=1):
+                try:
+                    processed_rows, unique_cpfs = importer.collect_data_from_dataframe(chunk)
+                except Exception as error:
+                    raise ValueError(f"{error} (bloco {chunk_number}; nada foi importado)") from error
+
+                self.merge_customers(customers, processed_rows)
+                chunk_paths.append(self.write_chunk(temp_file_path, processed_rows, unique_cpfs))
+                rows_count += len(processed_rows)
+
+                percent = int(min(rows_count / total_rows, 1) * 10) if total_rows else 5
+                importer.send_progress_update(f"Dividindo planilha: {rows_count} linhas", percent)
+                del chunk, processed_rows, unique_cpfs
+
+            with transaction.atomic():
+                if importer.use_upsert:
+                    importer.upsert_customers(list(customers.values()), set(customers))
+                else:
+                    importer.process_customers(list(customers.values()), set(customers))
+        except Exception:
+            for chunk_path in chunk_paths:
+                if os.path.exists(chunk_path):
+                    os.remove(chunk_path)
+            raise
+
+        self.start_progress(len(chunk_paths), rows_count)
+
+        header = [
+            import_deliveries_chunk.s(importer.user_id, importer.task_id, chunk_path, chunk_number)
+            for chunk_number, chunk_path in enumerate(chunk_paths, start=1)
+        ]
+        finalizer = finalize_deliveries_import.s(
+            importer.user_id, importer.task_id, file_hash, file_name, len(customers)
+        ).on_error(deliveries_import_failed.s(
+            user_id=importer.user_id, parent_task_id=importer.task_id, chunk_paths=chunk_paths
+        ))
+        chord(header)(finalizer)
+
+        importer.send_progress_update(f"{len(chunk_paths)} blocos enviados para processamento", 10)
+        # A partir daqui quem mantém o TaskRecord vivo são os blocos e o finalizador
+        importer.progress.release()
+        return len(chunk_paths)
+
+    @staticmethod
+    def merge_customers(customers: Dict[str, Dict], rows: List[Dict]) -> None:
+        """
+        Um registro por CPF; para cada campo vale o último valor não vazio.
+        Linhas sem CPF não geram cliente (a entrega fica sem cliente, como na importação direta).
+        """
+        for row_data in rows:
+            if not row_data['cpf']:
+                continue
+            customer = customers.setdefault(
+                row_data['cpf'], {'cpf': row_data['cpf'], 'full_name': '', 'email': '', 'phone': ''}
+            )
+            for field in ('full_name', 'email', 'phone'):
+                if row_data[field]:
+                    customer[field] = row_data[field]
+
+    @staticmethod
+    def write_chunk(temp_file_path: str, rows: List[Dict], cpfs) -> str:
+        """Grava o bloco normalizado ao lado da planilha (mesmo volume visto pelos workers)."""
+        fd, chunk_path = tempfile.mkstemp(
+            suffix='.pkl', prefix='delivery_chunk_', dir=os.path.dirname(temp_file_path) or None
+        )
+        with os.fdopen(fd, 'wb') as handle:
+            pickle.dump((rows, cpfs), handle, protocol=pickle.HIGHEST_PROTOCOL)
+        return chunk_path
+
+    def start_progress(self, total_chunks: int, total_rows: int) -> None:
+        key = FANOUT_KEY.format(task_id=self.importer.task_id)
+        try:
+            get_redis().hset(key, mapping={
+                'total_chunks': total_chunks, 'total_rows': total_rows, 'chunks_done': 0, 'rows_done': 0,
+            })
+            get_redis().expire(key, settings.TASK_PROGRESS_TTL)
+        except redis.RedisError as e:
+            logging.warning(f"[Import] Falha ao iniciar progresso agregado: {e}")
+
+    @staticmethod
+    def report_chunk_done(importer, rows_count: int) -> None:
+        """Soma o bloco concluído no Redis e publica o progresso agregado (10% a 95%)."""
+        key = FANOUT_KEY.format(task_id=importer.task_id)
+        try:
+            pipeline = get_redis().pipeline()
+            pipeline.hincrby(key, 'rows_done', rows_count)
+            pipeline.hincrby(key, 'chunks_done', 1)
+            pipeline.hmget(key, 'total_rows', 'total_chunks')
+            rows_done, chunks_done, (total_rows, total_chunks) = pipeline.execute()
+        except redis.RedisError as e:
+            logging.warning(f"[Import] Falha ao atualizar progresso agregado: {e}")
+            return
+
+        total_rows = int(total_rows or 0) or rows_done
+        percent = 10 + int(rows_done / total_rows * 85) if total_rows else 95
+        importer.progress.publish(
+            f"Blocos concluídos: {chunks_done}/{int(total_chunks or chunks_done)} ({rows_done} linhas)", percent
+        )
+
+    @staticmethod
+    def clear_progress(task_id: str) -> None:
+        try:
+            get_redis().delete(FANOUT_KEY.format(task_id=task_id))
+        except redis.RedisError:
+            pass
+
+    @staticmethod
+    def mark_aborted(task_id: str) -> None:
+        """Sinaliza aos blocos ainda não iniciados que a importação falhou."""
+        try:
+            get_redis().set(ABORTED_KEY.format(task_id=task_id), 1, ex=settings.TASK_PROGRESS_TTL)
+        except redis.RedisError as e:
+            logging.warning(f"[Import] Falha ao sinalizar importação abortada: {e}")
+
+    @staticmethod
+    def is_aborted(task_id: str) -> bool:
+        try:
+            return bool(get_redis().exists(ABORTED_KEY.format(task_id=task_id)))
+        except redis.RedisError:
+            return False
+
+
+@shared_task(bind=True)
+def import_deliveries_chunk(self, user_id: int, parent_task_id: str, chunk_path: str, chunk_number: int):
+    """
+    Grava as entregas de um bloco já normalizado (clientes gravados pelo coordenador).
+    """
+    from .import_deliveries_from_sheet import DeliveryImporter
+
+    aborted = {'chunk': chunk_number, 'aborted': True, 'created': 0, 'updated': 0, 'unchanged': 0}
+    if DeliveryImportFanOut.is_aborted(parent_task_id):
+        # outro bloco já falhou: este não é mais gravado
+        if os.path.exists(chunk_path):
+            os.remove(chunk_path)
+        return aborted
+
+    importer = DeliveryImporter(user_id, parent_task_id)
+    importer.report_progress = False
+
+    try:
+        with open(chunk_path, 'rb') as handle:
+            rows, cpfs = pickle.load(handle)
+    except FileNotFoundError:
+        logging.info(f"[Import] Bloco {chunk_number} sem arquivo; importação {parent_task_id} já encerrada")
+        return aborted
+    try:
+        with transaction.atomic():
+            created, updated = importer.import_delivery_rows(rows, cpfs)
+    except Exception as error:
+        raise ValueError(f"{error} (bloco {chunk_number})") from error
+    finally:
+        os.remove(chunk_path)
+
+    DeliveryImportFanOut.report_chunk_done(importer, len(rows))
+    importer.progress.release()
+
+    return {
+        'chunk': chunk_number,
+        'created': created,
+        'updated': updated,
+        'unchanged': importer.unchanged_count,
+    }
+
+
+@shared_task(bind=True)
+def finalize_deliveries_import(self, results: List[Dict], user_id: int, parent_task_id: str,
+                               file_hash: str, file_name: str, customers_count: int):
+    """
+    Soma os resultados dos blocos, registra o arquivo e notifica a conclusão.
+    """
+    from .import_deliveries_from_sheet import DeliveryImporter
+
+    importer = DeliveryImporter(user_id, parent_task_id)
+    created_count = sum(result['created'] for result in results)
+    updated_count = sum(result['updated'] for result in results)
+    importer.unchanged_count = sum(result['unchanged'] for result in results)
+
+    importer.record_import_file(file_hash, file_name, created_count, updated_count)
+    importer.send_progress_update(
+        f"{created_count} criados, {updated_count} atualizados, {importer.unchanged_count} sem alteração",
+        100,
+        status='success'
+    )
+    importer.send_final_notification(created_count, updated_count)
+    DeliveryImportFanOut.clear_progress(parent_task_id)
+
+    return {
+        'status': 'success',
+        'created_customers': customers_count,
+        'deliveries_created': created_count,
+        'deliveries_updated': updated_count,
+        'deliveries_unchanged': importer.unchanged_count,
+        'chunks': len(results),
+    }
+
+
+@shared_task
+def deliveries_import_failed(request, exc, traceback, user_id: int = None, parent_task_id: str = None,
+                             chunk_paths: List[str] = ()):
+    """
+    Errback do chord: algum bloco falhou. Os blocos já concluídos permanecem gravados;
+    os pendentes veem a sinalização de importação abortada e só removem o próprio arquivo
+    (os arquivos não são apagados aqui porque blocos em andamento ainda podem estar lendo).
+    chunk_paths é mantido na assinatura pelos errbacks já enfileirados.
+    """
+    DeliveryImportFanOut.mark_aborted(parent_task_id)
+    DeliveryImportFanOut.clear_progress(parent_task_id)
+
+    message = f"{exc} (os blocos concluídos antes da falha foram mantidos)"
+    send_notification(user_id, "Importação de entregas falhou", message, level='danger')
+    send_progress(parent_task_id, user_id, "Importação falhou", 100, status='failure')
@@ -1,5 +1,7 @@
 # tmsapp/deliveryApp/tasks.py
 
+import copy
+import hashlib
 import os
 import pandas as pd
 import time 
@@ -9,16 +11,23 @@ from typing import List, Dict, Set, Tuple, Optional
 from datetime import datetime
 
 from celery import shared_task
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import transaction
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 
 from crmapp.models import Customer
-from tmsapp.deliveryApp.models import Delivery
+from tmsapp.deliveryApp.models import Delivery, DeliveryImportFile, GEOCODE_STATE_FIELDS
 from djangonotify.models import TaskRecord
-from tmsapp.scriptApp.action import read_file_to_dataframe, geocode_endereco
+from tmsapp.scriptApp.action import (
+    read_file_to_dataframe, iter_file_chunks, count_file_rows, geocode_endereco, geocode_many,
+    bulk_upsert, supports_bulk_upsert
+)
 from djangonotify.utils import send_progress, send_notification
+from djangonotify.progress import ProgressPublisher
+from .delivery_staging_loader import DeliveryStagingLoader
+from .import_deliveries_fanout import DeliveryImportFanOut
 
 User = get_user_model()
 
@@ -29,6 +38,62 @@ class DeliveryImporter:
     Organiza todo o processo de importação em métodos especializados.
     """
     
+    # Campo interno -> (coluna da planilha, valor padrão quando a coluna não existe)
+    TEXT_COLUMNS = {
+        'cpf': ('doctocliente', ''),
+        'full_name': ('nomecliente', ''),
+        'email': ('emailcliente', ''),
+        'phone': ('telefoneentrega', ''),
+        'order_number': ('numerosaida', ''),
+        'filial': ('idfilial', ''),
+        'street': ('enderecoentrega', ''),
+        'number': ('numeroentrega', ''),
+        'neighborhood': ('bairroentrega', ''),
+        'city_full': ('cidadeentrega', ''),
+        'state': ('estadoentrega', 'RJ'),
+        'postal_code': ('cepentrega', ''),
+        'observation': ('observacao', ''),
+        'reference': ('pontoreferenciaentrega', ''),
+    }
+    DECIMAL_COLUMNS = {
+        'total_volume_m3': 'cubagemm3',
+        'total_weight_kg': 'peso',
+        'price': 'valtotnota',
+    }
+    DATE_COLUMNS = {
+        'date_delivery': 'dataentrega',
+    }
+
+    # Formatos comuns de data que podem vir da planilha (testados nesta ordem)
+    DATE_FORMATS = [
+        '%d/%m/%Y %H:%M:%S',  # 09/07/2025 00:00:00
+        '%d/%m/%Y',           # 09/07/2025
+        '%d-%m-%Y %H:%M:%S',  # 09-07-2025 00:00:00
+        '%d-%m-%Y',           # 09-07-2025
+        '%Y-%m-%d %H:%M:%S',  # 2025-07-09 00:00:00
+        '%Y-%m-%d',           # 2025-07-09 (já no formato correto)
+        '%d/%m/%y',           # 09/07/25
+        '%d-%m-%y',           # 09-07-25
+    ]
+
+    DECIMAL_THOUSANDS_PATTERN = r'\.(?=\d{3}(?:[,\s]|$))'
+
+    # Campos sobrescritos quando a entrega já existe
+    DELIVERY_UPDATE_FIELDS = [
+        'customer', 'street', 'number', 'neighborhood', 'city', 'state',
+        'postal_code', 'observation', 'reference', 'filial',
+        'latitude', 'longitude', 'total_volume_m3', 'total_weight_kg',
+        'price', 'date_delivery', 'import_fingerprint',
+        'geocode_status', 'geocode_attempts', 'geocode_last_attempt_at', 'geocode_next_attempt_at',
+    ]
+
+    # Campos da linha que compõem a impressão digital da entrega
+    FINGERPRINT_FIELDS = [
+        'cpf', 'order_number', 'filial', 'street', 'number', 'neighborhood', 'city_full',
+        'state', 'postal_code', 'observation', 'reference',
+        'total_volume_m3', 'total_weight_kg', 'price', 'date_delivery',
+    ]
+
     def __init__(self, user_id: int, task_id: str):
         """
         Inicializa o importador com as informações da tarefa.
@@ -39,7 +104,20 @@ class DeliveryImporter:
         """
         self.user_id = user_id
         self.task_id = task_id
+        self.progress = ProgressPublisher(task_id, user_id)
         self.user = User.objects.get(pk=user_id)
+        self.chunk_size = settings.DELIVERY_IMPORT_CHUNK_SIZE
+        self.streaming_min_rows = settings.DELIVERY_IMPORT_STREAMING_MIN_ROWS
+        self.copy_min_rows = settings.DELIVERY_IMPORT_COPY_MIN_ROWS
+        self.fanout_min_rows = settings.DELIVERY_IMPORT_FANOUT_MIN_ROWS
+        # Blocos do modo fan-out não publicam o próprio progresso (ver DeliveryImportFanOut)
+        self.report_progress = True
+        # Entregas da planilha idênticas ao que já está gravado (não reescritas)
+        self.unchanged_count = 0
+        # Sem suporte a ON CONFLICT ... RETURNING, usa bulk_create/bulk_update
+        self.use_upsert = supports_bulk_upsert(Delivery) and supports_bulk_upsert(Customer)
+        # Faixa (início, fim) em que o progresso de um bloco é reportado no modo streaming
+        self.progress_window: Optional[Tuple[int, int]] = None
         
     def sanitize_value(self, value) -> str:
         """
@@ -65,11 +143,11 @@ class DeliveryImporter:
         """
         if not value_str or not value_str.strip():
             return Decimal('0')
-        sanitized = re.sub(r'\.(?=\d{3}(?:[,\s]|$))', '', value_str).replace(',', '.')
+        sanitized = re.sub(self.DECIMAL_THOUSANDS_PATTERN, '', value_str).replace(',', '.')
         try:
             return Decimal(sanitized)
         except InvalidOperation:
-            raise ValueError(f'O valor "{value_str}" não é um decimal válido para o campo {field_name}.')
+            raise ValueError(self.invalid_decimal_message(value_str, field_name))
             
     def parse_date_value(self, date_str: str, field_name: str = "") -> Optional[str]:
         """
@@ -91,22 +169,10 @@ class DeliveryImporter:
             
         date_str = date_str.strip()
         
-        # Formatos comuns de data que podem vir da planilha
-        date_formats = [
-            '%d/%m/%Y %H:%M:%S',  # 09/07/2025 00:00:00
-            '%d/%m/%Y',           # 09/07/2025
-            '%d-%m-%Y %H:%M:%S',  # 09-07-2025 00:00:00
-            '%d-%m-%Y',           # 09-07-2025
-            '%Y-%m-%d %H:%M:%S',  # 2025-07-09 00:00:00
-            '%Y-%m-%d',           # 2025-07-09 (já no formato correto)
-            '%d/%m/%y',           # 09/07/25
-            '%d-%m-%y',           # 09-07-25
-        ]
-        
         parsed_date = None
         
         # Tenta cada formato até encontrar um que funcione
-        for date_format in date_formats:
+        for date_format in self.DATE_FORMATS:
             try:
                 parsed_date = datetime.strptime(date_str, date_format)
                 break
@@ -114,10 +180,7 @@ class DeliveryImporter:
                 continue
         
         if parsed_date is None:
-            raise ValueError(
-                f'O valor "{date_str}" tem um formato de data inválido para o campo {field_name}. '
-                f'Formatos suportados: DD/MM/YYYY, DD-MM-YYYY, YYYY-MM-DD'
-            )
+            raise ValueError(self.invalid_date_message(date_str, field_name))
         
         # Converte para timezone aware se necessário
         if timezone.is_naive(parsed_date):
@@ -152,6 +215,17 @@ class DeliveryImporter:
         except InvalidOperation:
             raise ValueError(f'O valor "{value_str}" não é um decimal válido para o campo {field_name}.')
 
+    def invalid_decimal_message(self, value_str: str, field_name: str) -> str:
+        """Mensagem de erro usada para decimais inválidos (linha a linha ou por coluna)."""
+        return f'O valor "{value_str}" não é um decimal válido para o campo {field_name}.'
+
+    def invalid_date_message(self, date_str: str, field_name: str) -> str:
+        """Mensagem de erro usada para datas inválidas (linha a linha ou por coluna)."""
+        return (
+            f'O valor "{date_str}" tem um formato de data inválido para o campo {field_name}. '
+            f'Formatos suportados: DD/MM/YYYY, DD-MM-YYYY, YYYY-MM-DD'
+        )
+
     def extract_data_from_row(self, row) -> Dict:
         """
         Extrai e sanitiza dados de uma linha da planilha.
@@ -188,6 +262,137 @@ class DeliveryImporter:
             'date_delivery': self.parse_date_value(self.sanitize_value(getattr(row, 'dataentrega', '')), 'date_delivery')
         }
 
+    def sanitize_column(self, series: pd.Series) -> pd.Series:
+        """
+        Versão vetorizada de sanitize_value: aplica a mesma limpeza a uma coluna inteira.
+        
+        Args:
+            series: Coluna da planilha
+            
+        Returns:
+            Coluna de strings sanitizadas (NaN/vazios viram string vazia)
+        """
+        missing = series.isna()
+        text = series.astype(str)
+
+        # Floats inteiros (ex: CPF lido como 12345678901.0) viram inteiros
+        if series.dtype.kind == 'f':
+            floats = series
+            float_mask = ~missing
+        elif series.dtype == object:
+            float_mask = series.map(type).eq(float) & ~missing
+            floats = pd.to_numeric(series.where(float_mask), errors='coerce')
+        else:
+            float_mask = None
+
+        if float_mask is not None and float_mask.any():
+            integral = float_mask & (floats % 1 == 0) & (floats.abs() < 2 ** 63)
+            if integral.any():
+                text[integral] = floats[integral].astype('int64').astype(str)
+
+        text = text.str.strip()
+        text[missing | text.str.lower().eq('nan')] = ''
+        return text
+
+    def parse_decimal_column(self, text: pd.Series, field_name: str) -> Tuple[pd.Series, pd.Series]:
+        """
+        Versão vetorizada de parse_decimal_value para uma coluna já sanitizada.
+        
+        Args:
+            text: Coluna de strings sanitizadas
+            field_name: Nome do campo (para mensagens de erro)
+            
+        Returns:
+            Tupla (coluna de Decimal, coluna com a mensagem de erro ou None por linha)
+        """
+        blank = text.str.strip().eq('')
+        sanitized = (
+            text.str.replace(self.DECIMAL_THOUSANDS_PATTERN, '', regex=True)
+                .str.replace(',', '.', regex=False)
+        )
+        numeric = pd.to_numeric(sanitized.where(~blank), errors='coerce')
+        invalid = numeric.isna() & ~blank
+
+        values = sanitized.where(~blank & ~invalid, '0').map(Decimal)
+        errors = pd.Series(None, index=text.index, dtype=object)
+        if invalid.any():
+            errors[invalid] = [
+                self.invalid_decimal_message(value, field_name) for value in text[invalid]
+            ]
+        return values, errors
+
+    def parse_date_column(self, text: pd.Series, field_name: str) -> Tuple[pd.Series, pd.Series]:
+        """
+        Versão vetorizada de parse_date_value: cada formato de DATE_FORMATS é testado
+        uma única vez sobre todas as linhas ainda não convertidas.
+        
+        Args:
+            text: Coluna de strings sanitizadas
+            field_name: Nome do campo (para mensagens de erro)
+            
+        Returns:
+            Tupla (coluna com datas YYYY-MM-DD ou None, coluna com a mensagem de erro ou None por linha)
+        """
+        stripped = text.str.strip()
+        pending = stripped.ne('')
+        parsed = pd.Series(pd.NaT, index=text.index, dtype='datetime64[ns]')
+
+        for date_format in self.DATE_FORMATS:
+            if not pending.any():
+                break
+            attempt = pd.to_datetime(stripped[pending], format=date_format, errors='coerce')
+            matched = attempt.index[attempt.notna()]
+            parsed[matched] = attempt[matched]
+            pending[matched] = False
+
+        values = parsed.dt.strftime('%Y-%m-%d').astype(object).where(parsed.notna(), None)
+        errors = pd.Series(None, index=text.index, dtype=object)
+        if pending.any():
+            errors[pending] = [
+                self.invalid_date_message(value, field_name) for value in stripped[pending]
+            ]
+        return values, errors
+
+    def normalize_dataframe(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[int, List[str]]]:
+        """
+        Normaliza a planilha inteira coluna a coluna (equivalente a extract_data_from_row
+        aplicado a cada linha, mas sem iterar linha a linha em Python).
+        
+        Args:
+            df: DataFrame com os dados da planilha
+            
+        Returns:
+            Tupla (DataFrame com as mesmas chaves de extract_data_from_row,
+                   mapeamento número da linha -> lista de erros encontrados)
+        """
+        df = df.reset_index(drop=True)
+        normalized = pd.DataFrame(index=df.index)
+
+        for field, (column, default) in self.TEXT_COLUMNS.items():
+            if column in df.columns:
+                normalized[field] = self.sanitize_column(df[column])
+            else:
+                normalized[field] = default
+
+        error_columns = []
+        for field, column in self.DECIMAL_COLUMNS.items():
+            text = self.sanitize_column(df[column]) if column in df.columns else pd.Series('', index=df.index)
+            normalized[field], field_errors = self.parse_decimal_column(text, field)
+            error_columns.append(field_errors)
+
+        for field, column in self.DATE_COLUMNS.items():
+            text = self.sanitize_column(df[column]) if column in df.columns else pd.Series('', index=df.index)
+            normalized[field], field_errors = self.parse_date_column(text, field)
+            error_columns.append(field_errors)
+
+        # Erros por linha, na mesma ordem em que extract_data_from_row os levantaria
+        row_errors: Dict[int, List[str]] = {}
+        for field_errors in error_columns:
+            for index, message in field_errors.dropna().items():
+                row_errors.setdefault(index + 1, []).append(message)
+
+        return normalized, row_errors
+
     def collect_data_from_dataframe(self, df: pd.DataFrame) -> Tuple[List[Dict], Set[str]]:
         """
         Coleta e processa todos os dados da planilha.
@@ -197,24 +402,23 @@ class DeliveryImporter:
             
         Returns:
             Tupla contendo lista de dados e set de CPFs únicos
+            
+        Raises:
+            ValueError: Com a mensagem da primeira linha inválida da planilha
         """
         total_rows = len(df)
-        processed_rows = []
-        unique_cpfs = set()
-        
-        for index, row in enumerate(df.itertuples(index=False), start=1):
-            row_data = self.extract_data_from_row(row)
-            
-            if row_data['cpf']:
-                unique_cpfs.add(row_data['cpf'])
-            processed_rows.append(row_data)
-            
-            # Atualiza progresso a cada linha processada
-            progress_percent = int(index / total_rows * 10)
-            self.send_progress_update(
-                f"Coletando dados: {index}/{total_rows}", 
-                progress_percent
-            )
+        self.send_progress_update(f"Coletando dados: 0/{total_rows}", 0)
+
+        normalized, row_errors = self.normalize_dataframe(df)
+        if row_errors:
+            first_row = min(row_errors)
+            raise ValueError(row_errors[first_row][0])
+
+        processed_rows = normalized.to_dict('records')
+        cpfs = normalized['cpf']
+        unique_cpfs = set(cpfs[cpfs != ''])
+
+        self.send_progress_update(f"Coletando dados: {total_rows}/{total_rows}", 10)
         
         return processed_rows, unique_cpfs
 
@@ -260,10 +464,14 @@ class DeliveryImporter:
         """
         new_cpfs = cpfs - customer_map.keys()
         
+        # Dados do primeiro registro de cada CPF, em uma única passada
+        first_rows = {}
+        for row in rows:
+            first_rows.setdefault(row['cpf'], row)
+        
         customers_to_create = []
         for cpf in new_cpfs:
-            # Encontra os dados do primeiro registro com este CPF
-            customer_data = next(row for row in rows if row['cpf'] == cpf)
+            customer_data = first_rows[cpf]
             
             customers_to_create.append(Customer(
                 cpf=cpf,
@@ -350,13 +558,22 @@ class DeliveryImporter:
             return False
             
         # Verifica se algum campo de endereço foi alterado
-        address_fields = ['street', 'number', 'postal_code', 'neighborhood', 'city', 'state']
-        
-        for field in address_fields:
-            if getattr(existing_delivery, field) != getattr(delivery, field):
-                return True
-                
-        return False
+        return self.address_changed(delivery, existing_delivery)
+
+    def address_changed(self, delivery: Delivery, existing_delivery: Optional[Delivery]) -> bool:
+        """True se a entrega é nova ou se algum campo de endereço mudou."""
+        if not existing_delivery:
+            return True
+        return self.geocode_address_key(delivery) != self.geocode_address_key(existing_delivery)
+
+    def start_geocode_attempt(self, delivery: Delivery, existing_delivery: Optional[Delivery]) -> None:
+        """
+        Prepara a entrega para uma nova tentativa, como GeocodedModel.save(): endereço
+        novo/alterado zera as tentativas; a retentativa agendada deixa de valer.
+        """
+        if self.address_changed(delivery, existing_delivery):
+            delivery.geocode_attempts = 0
+        delivery.geocode_next_attempt_at = None
 
     def geocode_delivery_if_needed(self, delivery: Delivery, existing_delivery: Optional[Delivery]) -> None:
         """
@@ -380,6 +597,72 @@ class DeliveryImporter:
                 delivery.latitude = latitude
                 delivery.longitude = longitude
 
+    def geocode_address_key(self, delivery: Delivery) -> Tuple:
+        """
+        Chave de endereço de uma entrega, na ordem dos argumentos de geocode_endereco.
+        """
+        return (
+            delivery.street,
+            delivery.number,
+            delivery.postal_code,
+            delivery.neighborhood,
+            delivery.city,
+            delivery.state,
+        )
+
+    def geocode_addresses(self, addresses, progress_range: Tuple[int, int] = (60, 95)) -> Dict[Tuple, Tuple]:
+        """
+        Geocodifica endereços em paralelo (ver geocode_many), reportando o progresso.
+        
+        Args:
+            addresses: Chaves de endereço (ver geocode_address_key)
+            progress_range: Faixa (início, fim) do progresso durante a geocodificação
+            
+        Returns:
+            Mapeamento endereço -> (latitude, longitude)
+        """
+        start, end = progress_range
+
+        def report(done: int, total: int) -> None:
+            progress_percent = start + int(done / total * (end - start))
+            self.send_progress_update(f"Geocodificando endereços: {done}/{total}", progress_percent)
+
+        return geocode_many(
+            addresses,
+            max_workers=settings.GEOCODE_MAX_WORKERS,
+            rate_limit=settings.GEOCODE_RATE_LIMIT,
+            batch_size=settings.GEOCODE_PROGRESS_BATCH,
+            on_batch_done=report,
+        )
+
+    def geocode_deliveries_concurrently(self, deliveries: List[Delivery]) -> int:
+        """
+        Geocodifica em paralelo as entregas que precisam de coordenadas e aplica os resultados
+        com GeocodedModel.apply_geocode: endereço não encontrado fica como 'falhou' (com
+        retentativa agendada), mesmo que a entrega ainda tenha as coordenadas do endereço anterior.
+        Endereços repetidos são resolvidos uma única vez.
+        
+        Args:
+            deliveries: Entregas que precisam ser geocodificadas
+            
+        Returns:
+            Número de entregas que receberam coordenadas
+        """
+        if not deliveries:
+            return 0
+
+        results = self.geocode_addresses(self.geocode_address_key(delivery) for delivery in deliveries)
+
+        geocoded = 0
+        for delivery in deliveries:
+            latitude, longitude = results.get(self.geocode_address_key(delivery), (None, None))
+            if not (latitude and longitude):
+                latitude = longitude = None
+            delivery.apply_geocode(latitude, longitude)
+            if latitude is not None:
+                geocoded += 1
+        return geocoded
+
     def validate_date_format(self, date_str: Optional[str]) -> bool:
         """
         Valida se a data está no formato correto YYYY-MM-DD.
@@ -414,40 +697,76 @@ class DeliveryImporter:
             return ''
         return city_full.split('-')[0].strip()
 
-    def create_delivery_object(self, row_data: Dict, customer_map: Dict[str, Customer]) -> Delivery:
+    def delivery_fingerprint(self, row_data: Dict) -> str:
         """
-        Cria um objeto Delivery a partir dos dados da linha.
+        Hash dos campos importados de uma linha; igual ao gravado significa que nada mudou.
         
         Args:
             row_data: Dados da linha processada
-            customer_map: Mapeamento de clientes
             
         Returns:
-            Objeto Delivery criado
+            Hash SHA-256 em hexadecimal
+        """
+        values = ('' if row_data[field] is None else str(row_data[field]) for field in self.FINGERPRINT_FIELDS)
+        return hashlib.sha256('\x1f'.join(values).encode('utf-8')).hexdigest()
+
+    def is_unchanged(self, existing_delivery: Optional[Delivery], fingerprint: str) -> bool:
+        """
+        Indica se a entrega gravada já corresponde à linha (mesma impressão e com coordenadas).
+        """
+        return bool(
+            existing_delivery
+            and existing_delivery.import_fingerprint == fingerprint
+            and existing_delivery.latitude and existing_delivery.longitude
+        )
+
+    def build_delivery_fields(self, row_data: Dict) -> Dict:
         """
-        city_name = self.extract_city_name(row_data['city_full'])
+        Monta os campos de Delivery (exceto cliente e autor) a partir dos dados da linha.
         
-        # Valida formato da data antes de criar o objeto
+        Args:
+            row_data: Dados da linha processada
+            
+        Returns:
+            Dicionário campo -> valor
+        """
+        # Valida formato da data antes de montar os campos
         if row_data['date_delivery'] and not self.validate_date_format(row_data['date_delivery']):
             raise ValueError(f"Data de entrega inválida: {row_data['date_delivery']}")
         
+        return {
+            'filial': row_data['filial'],
+            'order_number': row_data['order_number'],
+            'street': row_data['street'],
+            'number': row_data['number'],
+            'neighborhood': row_data['neighborhood'],
+            'city': self.extract_city_name(row_data['city_full']),
+            'state': row_data['state'],
+            'postal_code': row_data['postal_code'],
+            'observation': row_data['observation'],
+            'reference': row_data['reference'],
+            'total_volume_m3': row_data['total_volume_m3'],
+            'total_weight_kg': row_data['total_weight_kg'],
+            'date_delivery': row_data['date_delivery'],
+            'price': row_data['price'],
+            'import_fingerprint': self.delivery_fingerprint(row_data),
+        }
+
+    def create_delivery_object(self, row_data: Dict, customer_map: Dict[str, Customer]) -> Delivery:
+        """
+        Cria um objeto Delivery a partir dos dados da linha.
+        
+        Args:
+            row_data: Dados da linha processada
+            customer_map: Mapeamento de clientes
+            
+        Returns:
+            Objeto Delivery criado
+        """
         return Delivery(
             customer=customer_map.get(row_data['cpf']),
-            filial=row_data['filial'],
-            order_number=row_data['order_number'],
-            street=row_data['street'],
-            number=row_data['number'],
-            neighborhood=row_data['neighborhood'],
-            city=city_name,
-            state=row_data['state'],
-            postal_code=row_data['postal_code'],
-            observation=row_data['observation'],
-            reference=row_data['reference'],
-            total_volume_m3=row_data['total_volume_m3'],
-            total_weight_kg=row_data['total_weight_kg'],
-            date_delivery=row_data['date_delivery'],
-            price=row_data['price'],
-            created_by=self.user
+            created_by=self.user,
+            **self.build_delivery_fields(row_data)
         )
 
     def update_delivery_object(self, delivery: Delivery, row_data: Dict, customer_map: Dict[str, Customer]) -> None:
@@ -459,26 +778,12 @@ class DeliveryImporter:
             row_data: Novos dados da linha
             customer_map: Mapeamento de clientes
         """
-        city_name = self.extract_city_name(row_data['city_full'])
-        
-        # Valida formato da data antes de atualizar
-        if row_data['date_delivery'] and not self.validate_date_format(row_data['date_delivery']):
-            raise ValueError(f"Data de entrega inválida: {row_data['date_delivery']}")
+        fields = self.build_delivery_fields(row_data)
+        fields.pop('order_number')
         
         delivery.customer = customer_map.get(row_data['cpf'])
-        delivery.filial = row_data['filial']
-        delivery.street = row_data['street']
-        delivery.number = row_data['number']
-        delivery.neighborhood = row_data['neighborhood']
-        delivery.city = city_name
-        delivery.state = row_data['state']
-        delivery.postal_code = row_data['postal_code']
-        delivery.observation = row_data['observation']
-        delivery.reference = row_data['reference']
-        delivery.total_volume_m3 = row_data['total_volume_m3']
-        delivery.total_weight_kg = row_data['total_weight_kg']
-        delivery.date_delivery = row_data['date_delivery']
-        delivery.price = row_data['price']
+        for field, value in fields.items():
+            setattr(delivery, field, value)
 
     def process_deliveries(self, rows: List[Dict], customer_map: Dict[str, Customer]) -> Tuple[List[Delivery], List[Delivery]]:
         """
@@ -500,6 +805,8 @@ class DeliveryImporter:
         
         deliveries_to_create = []
         deliveries_to_update = []
+        deliveries_to_geocode = []
+        new_deliveries = {}
         total_rows = len(rows)
         
         for index, row_data in enumerate(rows, start=1):
@@ -509,22 +816,38 @@ class DeliveryImporter:
                 continue
             
             if order_number in delivery_map:
-                # Atualiza entrega existente
+                # Atualiza entrega existente (guardando o endereço anterior para comparação)
                 existing_delivery = delivery_map[order_number]
+                if self.is_unchanged(existing_delivery, self.delivery_fingerprint(row_data)):
+                    self.unchanged_count += 1
+                    continue
+                previous_delivery = copy.copy(existing_delivery)
                 self.update_delivery_object(existing_delivery, row_data, customer_map)
-                self.geocode_delivery_if_needed(existing_delivery, delivery_map[order_number])
+                if self.should_geocode_delivery(existing_delivery, previous_delivery):
+                    self.start_geocode_attempt(existing_delivery, previous_delivery)
+                    deliveries_to_geocode.append(existing_delivery)
                 deliveries_to_update.append(existing_delivery)
+            elif order_number in new_deliveries:
+                # Pedido novo repetido na planilha: vale a última linha (order_number é único)
+                new_delivery = new_deliveries[order_number]
+                self.update_delivery_object(new_delivery, row_data, customer_map)
             else:
                 # Cria nova entrega
                 new_delivery = self.create_delivery_object(row_data, customer_map)
-                self.geocode_delivery_if_needed(new_delivery, None)
+                if self.should_geocode_delivery(new_delivery, None):
+                    self.start_geocode_attempt(new_delivery, None)
+                    deliveries_to_geocode.append(new_delivery)
                 deliveries_to_create.append(new_delivery)
+                new_deliveries[order_number] = new_delivery
             
             # Atualiza progresso periodicamente
-            if index % 10 == 0:
-                progress_percent = min(95, 25 + int(index / total_rows * 70))
+            if index % 1000 == 0:
+                progress_percent = 25 + int(index / total_rows * 35)
                 self.send_progress_update(f"Preparando entregas: {index}", progress_percent)
         
+        # Geocodifica em paralelo tudo o que precisa de coordenadas
+        self.geocode_deliveries_concurrently(deliveries_to_geocode)
+        
         return deliveries_to_create, deliveries_to_update
 
     def save_deliveries(self, deliveries_to_create: List[Delivery], deliveries_to_update: List[Delivery]) -> None:
@@ -539,12 +862,7 @@ class DeliveryImporter:
         if deliveries_to_update:
             Delivery.objects.bulk_update(
                 deliveries_to_update,
-                [
-                    'customer', 'street', 'number', 'neighborhood', 'city', 'state',
-                    'postal_code', 'observation', 'reference', 'filial',
-                    'latitude', 'longitude', 'total_volume_m3', 'total_weight_kg',
-                    'price', 'date_delivery'
-                ],
+                self.DELIVERY_UPDATE_FIELDS,
                 batch_size=500
             )
         
@@ -552,6 +870,107 @@ class DeliveryImporter:
         if deliveries_to_create:
             Delivery.objects.bulk_create(deliveries_to_create, batch_size=500)
 
+    def upsert_customers(self, rows: List[Dict], cpfs: Set[str]) -> Dict[str, int]:
+        """
+        Grava todos os clientes do bloco com INSERT ... ON CONFLICT (cpf).
+        Campos vazios na planilha mantêm o valor já cadastrado.
+        
+        Args:
+            rows: Lista com dados das linhas processadas
+            cpfs: Set com CPFs únicos encontrados
+            
+        Returns:
+            Mapeamento de CPF para id do cliente
+        """
+        customers = [
+            Customer(
+                cpf=row_data['cpf'],
+                full_name=row_data['full_name'] or '',
+                email=row_data['email'] or None,
+                phone=row_data['phone'] or None,
+            )
+            for row_data in rows
+            if row_data['cpf'] in cpfs
+        ]
+        customer_ids = bulk_upsert(
+            customers,
+            unique_field='cpf',
+            update_fields=['full_name', 'email', 'phone'],
+            keep_existing_when_blank=['full_name', 'email', 'phone'],
+        )
+        
+        self.send_progress_update(f"{len(customer_ids)} clientes gravados", 25)
+        
+        return customer_ids
+
+    def upsert_deliveries(self, rows: List[Dict], customer_ids: Dict[str, int]) -> Tuple[int, int]:
+        """
+        Grava todas as entregas do bloco com INSERT ... ON CONFLICT (order_number).
+        Antes, lê o endereço e as coordenadas atuais (uma consulta) para decidir
+        o que precisa ser geocodificado.
+        
+        Args:
+            rows: Lista com dados das linhas processadas
+            customer_ids: Mapeamento de CPF para id do cliente
+            
+        Returns:
+            Tupla (entregas criadas, entregas atualizadas)
+        """
+        deliveries = {}
+        total_rows = len(rows)
+        for index, row_data in enumerate(rows, start=1):
+            if row_data['order_number']:
+                deliveries[row_data['order_number']] = Delivery(
+                    customer_id=customer_ids.get(row_data['cpf']),
+                    created_by=self.user,
+                    **self.build_delivery_fields(row_data)
+                )
+            
+            # Atualiza progresso periodicamente
+            if index % 1000 == 0:
+                progress_percent = 25 + int(index / total_rows * 35)
+                self.send_progress_update(f"Preparando entregas: {index}", progress_percent)
+        
+        existing_map = {
+            delivery.order_number: delivery
+            for delivery in Delivery.objects.filter(order_number__in=deliveries.keys()).only(
+                'order_number', 'street', 'number', 'postal_code', 'neighborhood', 'city', 'state',
+                'import_fingerprint', *GEOCODE_STATE_FIELDS
+            )
+        }
+        
+        # Entregas idênticas ao que já está gravado não são reescritas
+        for order_number, existing_delivery in existing_map.items():
+            if self.is_unchanged(existing_delivery, deliveries[order_number].import_fingerprint):
+                del deliveries[order_number]
+                self.unchanged_count += 1
+        
+        deliveries_to_geocode = []
+        for order_number, delivery in deliveries.items():
+            existing_delivery = existing_map.get(order_number)
+            if existing_delivery:
+                # coordenadas e estado da geocodificação seguem os gravados até nova tentativa
+                for field in GEOCODE_STATE_FIELDS:
+                    setattr(delivery, field, getattr(existing_delivery, field))
+            elif delivery.date_delivery is None:
+                delivery.date_delivery = timezone.now().date()
+            if self.should_geocode_delivery(delivery, existing_delivery):
+                self.start_geocode_attempt(delivery, existing_delivery)
+                deliveries_to_geocode.append(delivery)
+        
+        # Geocodifica em paralelo tudo o que precisa de coordenadas
+        self.geocode_deliveries_concurrently(deliveries_to_geocode)
+        
+        bulk_upsert(
+            deliveries.values(),
+            unique_field='order_number',
+            update_fields=self.DELIVERY_UPDATE_FIELDS,
+            keep_existing_when_blank=['customer', 'latitude', 'longitude', 'date_delivery'],
+        )
+        
+        updated_count = sum(1 for order_number in deliveries if order_number in existing_map)
+        return len(deliveries) - updated_count, updated_count
+
     def send_progress_update(self, message: str, percent: int, status: str = 'progress') -> None:
         """
         Envia atualização de progresso para o usuário.
@@ -561,7 +980,12 @@ class DeliveryImporter:
             percent: Porcentagem de progresso (0-100)
             status: Status da operação
         """
-        send_progress(self.task_id, self.user_id, message, percent, status=status)
+        if not self.report_progress and status == 'progress':
+            return
+        if self.progress_window and status == 'progress' and percent is not None:
+            start, end = self.progress_window
+            percent = start + int(percent * (end - start) / 100)
+        self.progress.publish(message, percent, status=status)
 
     def send_final_notification(self, created_count: int, updated_count: int) -> None:
         """
@@ -574,10 +998,42 @@ class DeliveryImporter:
         send_notification(
             self.user_id,
             'Importação de entregas concluída',
-            f"{created_count} novas entregas criadas e {updated_count} atualizadas.",
+            f"{created_count} novas entregas criadas, {updated_count} atualizadas "
+            f"e {self.unchanged_count} sem alteração.",
             level='success'
         )
 
+    def compute_file_hash(self, file_path: str) -> str:
+        """
+        Calcula o hash SHA-256 do conteúdo do arquivo, lendo em blocos.
+        
+        Args:
+            file_path: Caminho do arquivo
+            
+        Returns:
+            Hash em hexadecimal
+        """
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as handle:
+            for block in iter(lambda: handle.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def record_import_file(self, file_hash: str, file_name: str, created_count: int, updated_count: int) -> None:
+        """
+        Registra o arquivo importado para que uploads idênticos sejam ignorados.
+        """
+        DeliveryImportFile.objects.update_or_create(
+            file_hash=file_hash,
+            defaults={
+                'file_name': file_name[:255],
+                'deliveries_created': created_count,
+                'deliveries_updated': updated_count,
+                'deliveries_unchanged': self.unchanged_count,
+                'imported_by': self.user,
+            }
+        )
+
     def cleanup_temp_file(self, file_path: str) -> None:
         """
         Remove arquivo temporário após processamento.
@@ -588,12 +1044,152 @@ class DeliveryImporter:
         if os.path.exists(file_path):
             os.remove(file_path)
 
-    def import_deliveries(self, temp_file_path: str) -> Dict:
+    def import_rows(self, processed_rows: List[Dict], unique_cpfs: Set[str]) -> Tuple[int, int]:
+        """
+        Processa clientes e entregas de um conjunto de linhas já normalizadas.
+        Deve ser chamado dentro de uma transação.
+        
+        Args:
+            processed_rows: Linhas normalizadas
+            unique_cpfs: CPFs únicos presentes nas linhas
+            
+        Returns:
+            Tupla (entregas criadas, entregas atualizadas)
+        """
+        # PostgreSQL / SQLite: grava clientes e entregas com INSERT ... ON CONFLICT
+        if self.use_upsert:
+            customer_ids = self.upsert_customers(processed_rows, unique_cpfs)
+            return self.upsert_deliveries(processed_rows, customer_ids)
+        
+        # Processa clientes (criação e atualização)
+        customer_map = self.process_customers(processed_rows, unique_cpfs)
+        
+        # Processa entregas (criação e atualização)
+        deliveries_to_create, deliveries_to_update = self.process_deliveries(processed_rows, customer_map)
+        
+        # Salva as entregas no banco
+        self.save_deliveries(deliveries_to_create, deliveries_to_update)
+        
+        return len(deliveries_to_create), len(deliveries_to_update)
+
+    def import_delivery_rows(self, processed_rows: List[Dict], unique_cpfs: Set[str]) -> Tuple[int, int]:
+        """
+        Grava apenas as entregas de um bloco cujos clientes já foram gravados
+        (modo fan-out). Deve ser chamado dentro de uma transação.
+        
+        Args:
+            processed_rows: Linhas normalizadas
+            unique_cpfs: CPFs únicos presentes nas linhas
+            
+        Returns:
+            Tupla (entregas criadas, entregas atualizadas)
+        """
+        customers = Customer.objects.filter(cpf__in=unique_cpfs)
+        if self.use_upsert:
+            return self.upsert_deliveries(processed_rows, dict(customers.values_list('cpf', 'id')))
+        
+        customer_map = {customer.cpf: customer for customer in customers}
+        deliveries_to_create, deliveries_to_update = self.process_deliveries(processed_rows, customer_map)
+        self.save_deliveries(deliveries_to_create, deliveries_to_update)
+        return len(deliveries_to_create), len(deliveries_to_update)
+
+    def should_fan_out(self, total_rows: Optional[int]) -> bool:
+        """
+        Decide se a importação deve ser dividida entre vários workers do Celery.
+        
+        Args:
+            total_rows: Número estimado de linhas (None se desconhecido)
+            
+        Returns:
+            True para o modo fan-out
+        """
+        if not self.fanout_min_rows or not self.chunk_size or total_rows is None:
+            return False
+        return total_rows >= self.fanout_min_rows
+
+    def should_stream(self, total_rows: Optional[int]) -> bool:
+        """
+        Decide se a planilha deve ser importada em blocos.
+        
+        Args:
+            total_rows: Número estimado de linhas (None se desconhecido)
+            
+        Returns:
+            True para o modo streaming
+        """
+        if not self.chunk_size:
+            return False
+        return total_rows is None or total_rows > self.streaming_min_rows
+
+    def should_use_staging(self, total_rows: Optional[int]) -> bool:
+        """
+        Decide se a planilha deve ser carregada via COPY + tabela de staging (PostgreSQL).
+        
+        Args:
+            total_rows: Número estimado de linhas (None se desconhecido)
+            
+        Returns:
+            True para o modo staging
+        """
+        if not self.copy_min_rows or total_rows is None:
+            return False
+        return total_rows >= self.copy_min_rows and DeliveryStagingLoader.is_supported()
+
+    def import_deliveries_streaming(self, temp_file_path: str, total_rows: Optional[int]) -> Tuple[int, int, int]:
+        """
+        Importa a planilha bloco a bloco: cada bloco é lido, normalizado e gravado
+        em sua própria transação, mantendo em memória apenas um bloco por vez.
+        
+        Args:
+            temp_file_path: Caminho do arquivo temporário
+            total_rows: Número estimado de linhas (None se desconhecido)
+            
+        Returns:
+            Tupla (CPFs processados, entregas criadas, entregas atualizadas)
+        """
+        customers_count = created_count = updated_count = 0
+        rows_done = 0
+        
+        for chunk_number, chunk in enumerate(iter_file_chunks(temp_file_path, self.chunk_size), start=1):
+            chunk_rows = len(chunk)
+            start = 5 + int(rows_done / total_rows * 90) if total_rows else 5
+            end = 5 + int(min(rows_done + chunk_rows, total_rows) / total_rows * 90) if total_rows else 95
+            self.progress_window = (start, max(start, end))
+            
+            try:
+                processed_rows, unique_cpfs = self.collect_data_from_dataframe(chunk)
+                with transaction.atomic():
+                    created, updated = self.import_rows(processed_rows, unique_cpfs)
+            except Exception as error:
+                raise ValueError(
+                    f"{error} (bloco {chunk_number}; {rows_done} linhas anteriores já foram importadas)"
+                ) from error
+            finally:
+                self.progress_window = None
+            
+            customers_count += len(unique_cpfs)
+            created_count += created
+            updated_count += updated
+            rows_done += chunk_rows
+            
+            self.send_progress_update(
+                f"Bloco {chunk_number}: {rows_done} linhas importadas",
+                end if total_rows else 95
+            )
+            
+            # Libera o bloco antes de ler o próximo
+            del chunk, processed_rows, unique_cpfs
+        
+        return customers_count, created_count, updated_count
+
+    def import_deliveries(self, temp_file_path: str, force: bool = False, file_name: str = '') -> Dict:
         """
         Método principal que executa todo o processo de importação.
         
         Args:
             temp_file_path: Caminho do arquivo temporário
+            force: Reimporta mesmo que um arquivo idêntico já tenha sido importado
+            file_name: Nome original do arquivo enviado
             
         Returns:
             Dicionário com resultado da importação
@@ -603,41 +1199,69 @@ class DeliveryImporter:
             time.sleep(5)  # Pequena pausa para estabilizar
             self.send_progress_update("Importação iniciada", 0, status='started')
             
-            # Carrega dados da planilha
-            dataframe = read_file_to_dataframe(temp_file_path)
+            # Arquivo idêntico a um já importado: nada a fazer
+            file_hash = self.compute_file_hash(temp_file_path)
+            previous_import = None if force else DeliveryImportFile.objects.filter(file_hash=file_hash).first()
+            if previous_import:
+                message = (
+                    f"Arquivo idêntico já importado em "
+                    f"{previous_import.imported_at.strftime('%d/%m/%Y %H:%M')}; nenhuma alteração."
+                )
+                self.send_progress_update(message, 100, status='success')
+                send_notification(self.user_id, 'Importação de entregas ignorada', message, level='info')
+                self.cleanup_temp_file(temp_file_path)
+                return {'status': 'skipped', 'import_file': previous_import.pk}
             
-            # Processa dados das linhas
-            processed_rows, unique_cpfs = self.collect_data_from_dataframe(dataframe)
+            total_rows = count_file_rows(temp_file_path)
             
-            with transaction.atomic():
-                # Processa clientes (criação e atualização)
-                customer_map = self.process_customers(processed_rows, unique_cpfs)
-                
-                # Processa entregas (criação e atualização)
-                deliveries_to_create, deliveries_to_update = self.process_deliveries(processed_rows, customer_map)
-                
-                # Salva as entregas no banco
-                self.save_deliveries(deliveries_to_create, deliveries_to_update)
-                
-                # Envia progresso final
-                self.send_progress_update(
-                    f"{len(deliveries_to_create)} criados, {len(deliveries_to_update)} atualizados",
-                    100,
-                    status='success'
+            if self.should_use_staging(total_rows):
+                # Cargas muito grandes: COPY para staging e merge em SQL
+                customers_count, created_count, updated_count = DeliveryStagingLoader(self).load(
+                    temp_file_path, total_rows
+                )
+            elif self.should_fan_out(total_rows):
+                # Blocos processados em paralelo; o finalizador do chord conclui a importação
+                chunks = DeliveryImportFanOut(self).dispatch(temp_file_path, total_rows, file_hash, file_name)
+                self.cleanup_temp_file(temp_file_path)
+                return {'status': 'dispatched', 'chunks': chunks}
+            elif self.should_stream(total_rows):
+                # Planilhas grandes: memória limitada a um bloco por vez
+                customers_count, created_count, updated_count = self.import_deliveries_streaming(
+                    temp_file_path, total_rows
                 )
+            else:
+                # Carrega dados da planilha
+                dataframe = read_file_to_dataframe(temp_file_path)
+                
+                # Processa dados das linhas
+                processed_rows, unique_cpfs = self.collect_data_from_dataframe(dataframe)
                 
-                # Notifica conclusão
-                self.send_final_notification(len(deliveries_to_create), len(deliveries_to_update))
+                with transaction.atomic():
+                    created_count, updated_count = self.import_rows(processed_rows, unique_cpfs)
+                customers_count = len(unique_cpfs)
+            
+            self.record_import_file(file_hash, file_name, created_count, updated_count)
+            
+            # Envia progresso final
+            self.send_progress_update(
+                f"{created_count} criados, {updated_count} atualizados, {self.unchanged_count} sem alteração",
+                100,
+                status='success'
+            )
+            
+            # Notifica conclusão
+            self.send_final_notification(created_count, updated_count)
             
             # Remove arquivo temporário
             self.cleanup_temp_file(temp_file_path)
             
             return {
                 'status': 'success',
-                'created_customers': len([cpf for cpf in unique_cpfs if cpf]),
+                'created_customers': customers_count,
                 'updated_customers': 0,  # Seria necessário rastrear melhor
-                'deliveries_created': len(deliveries_to_create),
-                'deliveries_updated': len(deliveries_to_update),
+                'deliveries_created': created_count,
+                'deliveries_updated': updated_count,
+                'deliveries_unchanged': self.unchanged_count,
             }
             
         except Exception as error:
@@ -666,7 +1290,8 @@ class DeliveryImporter:
 
 
 @shared_task(bind=True)
-def import_deliveries_from_sheet(self, user_id: int, tkrecord_id: int, temp_file_path: str):
+def import_deliveries_from_sheet(self, user_id: int, tkrecord_id: int, temp_file_path: str,
+                                 force: bool = False, file_name: str = ''):
     """
     Tarefa Celery para importação de entregas de planilhas.
     
@@ -674,6 +1299,8 @@ def import_deliveries_from_sheet(self, user_id: int, tkrecord_id: int, temp_file
         user_id: ID do usuário
         tkrecord_id: ID do registro da tarefa
         temp_file_path: Caminho do arquivo temporário
+        force: Reimporta mesmo que um arquivo idêntico já tenha sido importado
+        file_name: Nome original do arquivo enviado
         
     Returns:
         Resultado da importação
@@ -687,7 +1314,7 @@ def import_deliveries_from_sheet(self, user_id: int, tkrecord_id: int, temp_file
         
         # Executa a importação usando a classe especializada
         importer = DeliveryImporter(user_id, task_id)
-        return importer.import_deliveries(temp_file_path)
+        return importer.import_deliveries(temp_file_path, force=force, file_name=file_name)
         
     except Exception as error:
         # Fallback para erros não tratados pela classe
@@ -0,0 +1,61 @@
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import List, Optional, Set
+
+
+def to_grams(weight_kg: Optional[Decimal]) -> int:
+    """kg (Decimal com 2 casas) -> gramas inteiras, sem perda."""
+    return int((weight_kg or Decimal('0')) * 1000)
+
+
+def to_cm3(volume_m3: Optional[Decimal]) -> int:
+    """m³ (Decimal com 2 casas) -> cm³ inteiros, sem perda."""
+    return int((volume_m3 or Decimal('0')) * 1000000)
+
+
+def delivery_size(delivery) -> tuple:
+    """(gramas, cm³) da entrega."""
+    return to_grams(delivery.total_weight_kg), to_cm3(delivery.total_volume_m3)
+
+
+@dataclass
+class VehicleLoad:
+    """
+    Carga de um veículo durante a roteirização, com totais acumulados em inteiros
+    (gramas e cm³): verificar se uma entrega cabe e adicioná-la custam O(1).
+    """
+    vehicle: object
+    capacity_g: int
+    capacity_cm3: int
+    main_area: object = None
+    deliveries: List = field(default_factory=list)
+    areas: Set = field(default_factory=set)
+    used_g: int = 0
+    used_cm3: int = 0
+
+    @classmethod
+    def for_vehicle(cls, vehicle) -> 'VehicleLoad':
+        return cls(
+            vehicle=vehicle,
+            capacity_g=to_grams(vehicle.max_weight_kg),
+            capacity_cm3=to_cm3(vehicle.max_volume_m3),
+        )
+
+    @property
+    def remaining_g(self) -> int:
+        return self.capacity_g - self.used_g
+
+    @property
+    def remaining_cm3(self) -> int:
+        return self.capacity_cm3 - self.used_cm3
+
+    def fits(self, weight_g: int, volume_cm3: int) -> bool:
+        return weight_g <= self.remaining_g and volume_cm3 <= self.remaining_cm3
+
+    def add(self, delivery, area, weight_g: int, volume_cm3: int) -> None:
+        if self.main_area is None:
+            self.main_area = area
+        self.deliveries.append(delivery)
+        self.areas.add(area)
+        self.used_g += weight_g
+        self.used_cm3 += volume_cm3